@@ -4,9 +4,14 @@ This module initializes the FastAPI app and exposes basic health and webhook end
 TODO: Wire up Telegram webhook handling and core agent loop in later phases.
 """
 
+import base64
+import html
 import os
 import secrets
-from urllib.parse import urlencode
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from typing import Optional
+from urllib.parse import quote
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
@@ -15,32 +20,141 @@ from fastapi import status
 from fastapi.responses import JSONResponse
 from fastapi.responses import HTMLResponse
 from fastapi.responses import RedirectResponse
+from fastapi.responses import Response
 
 import httpx
+import orjson
 
+from src.core.agent import drain_background_tasks
+from src.core.memory import start_memory_writer
+from src.core.memory import stop_memory_writer
 from src.services.telegram import handle_telegram_update
+from src.utils.oauth_state import add_state
+from src.utils.oauth_state import consume_state
+from src.utils.logger import REQUEST_ID
 from src.utils.logger import generate_request_id
+from src.utils.logger import is_debug_enabled
+from src.utils.logger import log_debug
 from src.utils.logger import log_error
 from src.utils.logger import log_info
 
 
 load_dotenv()
 
-app = FastAPI(title="Jarvis AI Agent", version="0.1.0")
+_b64encode = base64.urlsafe_b64encode
+
+# OAuth settings resolved once at startup; see reload_env().
+_OAUTH_SETUP_TOKEN: Optional[str] = None
+_GOOGLE_CLIENT_ID: Optional[str] = None
+_GOOGLE_CLIENT_SECRET: Optional[str] = None
+_EXPLICIT_REDIRECT_URI: Optional[str] = None
+_GOOGLE_CLIENT_ID_ENC = ""
+
+_SCOPE = " ".join(
+    [
+        "https://www.googleapis.com/auth/gmail.modify",
+        "https://www.googleapis.com/auth/gmail.send",
+        "https://www.googleapis.com/auth/calendar",
+    ]
+)
+_SCOPE_ENC = quote(_SCOPE, safe="")
+
+# Only client_id, redirect_uri and state vary between /oauth/start requests.
+_OAUTH_URL_TEMPLATE = (
+    "https://accounts.google.com/o/oauth2/v2/auth"
+    "?client_id={cid}"
+    "&redirect_uri={ruri}"
+    "&response_type=code"
+    f"&scope={_SCOPE_ENC}"
+    "&access_type=offline"
+    "&prompt=consent"
+    "&include_granted_scopes=true"
+    "&state={state}"
+)
+
+
+def reload_env() -> None:
+    """Re-read the OAuth environment variables into module constants.
+
+    Called once at import time. Tests that patch the environment should call
+    this again afterwards.
+    """
+
+    global _OAUTH_SETUP_TOKEN, _GOOGLE_CLIENT_ID, _GOOGLE_CLIENT_SECRET, _EXPLICIT_REDIRECT_URI
+    global _GOOGLE_CLIENT_ID_ENC
+    _OAUTH_SETUP_TOKEN = os.getenv("OAUTH_SETUP_TOKEN")
+    _GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+    _GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+    _EXPLICIT_REDIRECT_URI = os.getenv("GOOGLE_OAUTH_REDIRECT_URI")
+    _GOOGLE_CLIENT_ID_ENC = quote(_GOOGLE_CLIENT_ID or "", safe="")
+
+
+reload_env()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Create process-wide resources on startup and release them on shutdown.
+
+    A single pooled HTTP client is shared by the OAuth endpoints so token
+    exchanges reuse keep-alive connections to Google. The memory
+    write-behind writer runs for the app's lifetime; on shutdown, pending
+    background memory updates get a bounded window to finish and queued
+    rows are flushed.
+    """
+
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(20.0, connect=5.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        http2=True,
+    )
+    await start_memory_writer()
+    try:
+        yield
+    finally:
+        await drain_background_tasks()
+        await stop_memory_writer()
+        await app.state.http.aclose()
+
+
+app = FastAPI(title="Jarvis AI Agent", version="0.1.0", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Bind a correlation id to the request for all logs emitted while handling it.
 
-_OAUTH_STATE_CACHE: set[str] = set()
+    Honors an incoming X-Request-Id header and echoes the id back on the
+    response.
+    """
+
+    request_id = request.headers.get("x-request-id") or generate_request_id()
+    request.state.request_id = request_id
+    token = REQUEST_ID.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        REQUEST_ID.reset(token)
+    response.headers["X-Request-Id"] = request_id
+    return response
 
 
 def _require_setup_token(request: Request) -> bool:
-    required = os.getenv("OAUTH_SETUP_TOKEN")
+    required = _OAUTH_SETUP_TOKEN
     if not required:
         return True
     provided = request.query_params.get("setup_token")
     return bool(provided) and secrets.compare_digest(provided, required)
 
 
+def _new_state() -> str:
+    """Return a random URL-safe OAuth state token (192 bits of entropy)."""
+
+    return _b64encode(os.urandom(24)).rstrip(b"=").decode("ascii")
+
+
 def _get_redirect_uri(request: Request) -> str:
-    explicit = os.getenv("GOOGLE_OAUTH_REDIRECT_URI")
+    explicit = _EXPLICIT_REDIRECT_URI
     if explicit:
         return explicit
     base = str(request.base_url).rstrip("/")
@@ -48,42 +162,32 @@ def _get_redirect_uri(request: Request) -> str:
 
 
 @app.get("/oauth/start", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
-async def google_oauth_start(request: Request) -> RedirectResponse:
+async def google_oauth_start(request: Request) -> Response:
     if not _require_setup_token(request):
         return RedirectResponse(url="/health", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
-    client_id = os.getenv("GOOGLE_CLIENT_ID")
+    client_id = _GOOGLE_CLIENT_ID
     if not client_id:
         return RedirectResponse(url="/health", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
     redirect_uri = _get_redirect_uri(request)
 
-    state = secrets.token_urlsafe(24)
-    _OAUTH_STATE_CACHE.add(state)
-
-    scope = " ".join(
-        [
-            "https://www.googleapis.com/auth/gmail.modify",
-            "https://www.googleapis.com/auth/gmail.send",
-            "https://www.googleapis.com/auth/calendar",
-        ]
-    )
-
-    params = {
-        "client_id": client_id,
-        "redirect_uri": redirect_uri,
-        "response_type": "code",
-        "scope": scope,
-        "access_type": "offline",
-        "prompt": "consent",
-        "include_granted_scopes": "true",
-        "state": state,
-    }
+    state = _new_state()
+    if not await add_state(state):
+        return HTMLResponse(
+            "Too many pending OAuth requests; try again later",
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        )
 
-    if request.query_params.get("setup_token"):
-        params["state"] = f"{state}:{request.query_params.get('setup_token')}"
+    setup_token = request.query_params.get("setup_token")
+    if setup_token:
+        state = f"{state}:{setup_token}"
 
-    url = "https://accounts.google.com/o/oauth2/v2/auth?" + urlencode(params)
+    url = _OAUTH_URL_TEMPLATE.format(
+        cid=_GOOGLE_CLIENT_ID_ENC,
+        ruri=quote(redirect_uri, safe=""),
+        state=quote(state, safe=""),
+    )
     return RedirectResponse(url=url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 
 
@@ -91,7 +195,7 @@ async def google_oauth_start(request: Request) -> RedirectResponse:
 async def google_oauth_callback(request: Request) -> HTMLResponse:
     error = request.query_params.get("error")
     if error:
-        return HTMLResponse(f"OAuth error: {error}", status_code=status.HTTP_400_BAD_REQUEST)
+        return HTMLResponse(f"OAuth error: {html.escape(error)}", status_code=status.HTTP_400_BAD_REQUEST)
 
     code = request.query_params.get("code")
     if not code:
@@ -101,17 +205,16 @@ async def google_oauth_callback(request: Request) -> HTMLResponse:
     state = raw_state.split(":", 1)[0] if raw_state else ""
     setup_token = raw_state.split(":", 1)[1] if ":" in raw_state else request.query_params.get("setup_token")
 
-    required = os.getenv("OAUTH_SETUP_TOKEN")
+    required = _OAUTH_SETUP_TOKEN
     if required:
         if not setup_token or not secrets.compare_digest(setup_token, required):
             return HTMLResponse("Forbidden", status_code=status.HTTP_403_FORBIDDEN)
 
-    if not state or state not in _OAUTH_STATE_CACHE:
+    if not await consume_state(state):
         return HTMLResponse("Invalid state", status_code=status.HTTP_400_BAD_REQUEST)
-    _OAUTH_STATE_CACHE.discard(state)
 
-    client_id = os.getenv("GOOGLE_CLIENT_ID")
-    client_secret = os.getenv("GOOGLE_CLIENT_SECRET")
+    client_id = _GOOGLE_CLIENT_ID
+    client_secret = _GOOGLE_CLIENT_SECRET
     if not client_id or not client_secret:
         return HTMLResponse(
             "Missing GOOGLE_CLIENT_ID/GOOGLE_CLIENT_SECRET on server",
@@ -128,12 +231,11 @@ async def google_oauth_callback(request: Request) -> HTMLResponse:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            resp = await client.post("https://oauth2.googleapis.com/token", data=data)
+        resp = await request.app.state.http.post("https://oauth2.googleapis.com/token", data=data)
         resp.raise_for_status()
     except Exception as exc:  # noqa: BLE001
         return HTMLResponse(
-            f"Token exchange failed: {exc!r}",
+            f"Token exchange failed: {html.escape(repr(exc))}",
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
@@ -148,14 +250,16 @@ async def google_oauth_callback(request: Request) -> HTMLResponse:
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
-    html = "<h2>Google OAuth success</h2>"
-    html += "<p>Copy this into your VPS .env as <b>GOOGLE_REFRESH_TOKEN</b>:</p>"
-    html += f"<pre>{refresh_token}</pre>"
+    parts = [
+        "<h2>Google OAuth success</h2>",
+        "<p>Copy this into your VPS .env as <b>GOOGLE_REFRESH_TOKEN</b>:</p>",
+        f"<pre>{html.escape(str(refresh_token))}</pre>",
+    ]
     if isinstance(scope, str) and scope.strip():
-        html += f"<p><b>Granted scopes:</b> {scope}</p>"
+        parts.append(f"<p><b>Granted scopes:</b> {html.escape(scope)}</p>")
     if isinstance(access_token, str) and access_token.strip():
-        html += "<p>Access token received (short-lived).</p>"
-    return HTMLResponse(html)
+        parts.append("<p>Access token received (short-lived).</p>")
+    return HTMLResponse("".join(parts))
 
 
 @app.get("/health", status_code=status.HTTP_200_OK)
@@ -177,26 +281,28 @@ async def telegram_webhook(request: Request) -> dict:
     TODO: Extend with security checks, error handling, and agent integration.
     """
 
-    payload = await request.json()
-
-    # Generate a correlation id so all logs for this request can be tied
-    # together across services.
-    request_id = generate_request_id()
-    request.state.request_id = request_id
-
-    # Log the raw incoming update for observability.
-    log_info("Received raw Telegram update", request_id=request_id, payload=payload)
+    payload = orjson.loads(await request.body())
+
+    # Log the incoming update for observability. The full payload is only
+    # serialized when DEBUG is enabled. The correlation id is bound by
+    # request_id_middleware.
+    if is_debug_enabled():
+        log_debug("Received raw Telegram update", payload=payload)
+    else:
+        update = payload if isinstance(payload, dict) else {}
+        chat = (update.get("message") or {}).get("chat") or {}
+        log_info(
+            "Received Telegram update",
+            update_id=update.get("update_id"),
+            chat_id=chat.get("id"),
+        )
 
     try:
-        await handle_telegram_update(payload, request_id=request_id)
+        await handle_telegram_update(payload, request_id=REQUEST_ID.get())
     except Exception as exc:  # noqa: BLE001
         # Log and continue to respond with 200 OK so Telegram does not
         # repeatedly retry the webhook.
-        log_error(
-            "Error while handling Telegram update",
-            request_id=request_id,
-            error=repr(exc),
-        )
+        log_error("Error while handling Telegram update", error=repr(exc))
 
     return {"status": "ok"}
 
@@ -216,3 +322,17 @@ async def global_exception_handler(request: Request, exc: Exception):
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={"detail": "Internal server error"},
     )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        # Pending confirmations and the response cache live in process memory.
+        workers=1,
+    )
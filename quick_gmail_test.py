@@ -2,6 +2,10 @@
 
 Run this for a fast check:
     python quick_gmail_test.py
+
+This is a correctness smoke test only. It labels a single message with
+gmail_label(); code that labels many messages should make one
+gmail_batch_modify_labels() call instead.
 """
 
 import asyncio
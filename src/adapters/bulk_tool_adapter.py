@@ -19,12 +19,13 @@ Tools only know how to:
 
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class PreparedBulkContext:
     """Represents a prepared bulk operation context.
 
@@ -48,22 +49,65 @@ class PreparedBulkContext:
     metadata: Optional[Dict[str, Any]] = None
 
 
-@dataclass
 class BulkItem:
     """Represents a single item in a bulk operation.
 
     Attributes:
         id: Unique identifier for the item (e.g., Gmail message ID).
-        display_name: Human-readable name for logging/display.
+        display_name: Human-readable name for logging/display. Defaults to id.
         raw_data: Optional full item data if needed for execution.
     """
 
-    id: str
-    display_name: str
-    raw_data: Optional[Dict[str, Any]] = None
+    __slots__ = ("id", "_display_name", "raw_data")
 
+    def __init__(
+        self,
+        id: str,
+        display_name: Optional[str] = None,
+        raw_data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.id = id
+        self._display_name = display_name
+        self.raw_data = raw_data
 
-@dataclass
+    @classmethod
+    def id_only(cls, item_id: str) -> "BulkItem":
+        """Build an item carrying only its id, skipping __init__.
+
+        Used for large ID-only pages (e.g., Gmail message IDs) where the
+        display name is the id itself and no raw data is attached.
+        """
+        item = object.__new__(cls)
+        item.id = item_id
+        item._display_name = None
+        item.raw_data = None
+        return item
+
+    @property
+    def display_name(self) -> str:
+        return self._display_name or self.id
+
+    @display_name.setter
+    def display_name(self, value: Optional[str]) -> None:
+        self._display_name = value
+
+    def __repr__(self) -> str:
+        return (
+            f"BulkItem(id={self.id!r}, display_name={self.display_name!r}, "
+            f"raw_data={self.raw_data!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BulkItem):
+            return NotImplemented
+        return (
+            self.id == other.id
+            and self.display_name == other.display_name
+            and self.raw_data == other.raw_data
+        )
+
+
+@dataclass(slots=True, frozen=True)
 class BulkResult:
     """Represents the result of executing an action on one item.
 
@@ -173,7 +217,7 @@ class BulkToolAdapter(ABC):
 
     @abstractmethod
     async def execute_batch(
-        self, items: List[BulkItem], context: PreparedBulkContext
+        self, items: Iterable[BulkItem], context: PreparedBulkContext
     ) -> List[BulkResult]:
         """Execute the action on a batch of items.
 
@@ -182,7 +226,8 @@ class BulkToolAdapter(ABC):
         they should be captured in the BulkResult.
 
         Args:
-            items: List of items to process.
+            items: Items to process. May be a one-shot iterable (e.g. a
+                generator), so implementations must iterate it only once.
             context: The prepared bulk context with action parameters.
 
         Returns:
@@ -194,6 +239,26 @@ class BulkToolAdapter(ABC):
         """
         pass
 
+    def prefetch_next_batch(
+        self, context: PreparedBulkContext, batch_size: int
+    ) -> "asyncio.Task[List[BulkItem]]":
+        """Start fetching the next batch in the background.
+
+        The returned task runs get_next_batch() so the controller can overlap
+        the fetch with execute_batch() for the current batch. Adapters whose
+        fetch and execute calls interfere may override this.
+
+        Args:
+            context: The prepared bulk context from prepare().
+            batch_size: Maximum number of items to fetch.
+
+        Returns:
+            An asyncio.Task resolving to the fetched BulkItem list.
+        """
+        return asyncio.create_task(
+            self.get_next_batch(context=context, batch_size=batch_size, offset=0)
+        )
+
 
 # ============================================================================
 # USAGE EXAMPLE (Conceptual — not actual implementation)
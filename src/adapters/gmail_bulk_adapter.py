@@ -10,7 +10,7 @@ Supported actions:
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 from src.adapters.bulk_tool_adapter import (
     BulkToolAdapter,
@@ -22,6 +22,19 @@ from src.services.gmail_advanced import gmail_resolve_label_id
 from src.services.gmail_bulk import gmail_batch_modify_labels, gmail_list_message_ids_page
 
 
+_VALID_ACTIONS = frozenset({"label", "archive", "move_to_label"})
+_VALID_QUERY_TYPES = frozenset({"sender", "keyword", "subject", "label", "date_range"})
+
+# Gmail search syntax per single-value query_type (date_range is built separately).
+_QUERY_FORMATS = {
+    "sender": "from:{}",
+    "keyword": "{}",
+    "subject": "subject:{}",
+    # Label query can be either name or ID; Gmail query syntax uses label:
+    "label": "label:{}",
+}
+
+
 class GmailBulkAdapter(BulkToolAdapter):
     """Gmail bulk operations adapter.
 
@@ -54,19 +67,13 @@ class GmailBulkAdapter(BulkToolAdapter):
         """
 
         action = params.get("action")
-        if not action or action not in ["label", "archive", "move_to_label"]:
+        if not action or action not in _VALID_ACTIONS:
             raise ValueError(
                 f"Invalid or missing action. Must be one of: label, archive, move_to_label"
             )
 
         query_type = params.get("query_type")
-        if not query_type or query_type not in [
-            "sender",
-            "keyword",
-            "subject",
-            "label",
-            "date_range",
-        ]:
+        if not query_type or query_type not in _VALID_QUERY_TYPES:
             raise ValueError(
                 f"Invalid or missing query_type. Must be one of: sender, keyword, subject, label, date_range"
             )
@@ -79,20 +86,11 @@ class GmailBulkAdapter(BulkToolAdapter):
         # This MUST remain deterministic and MUST NOT trigger any network calls.
         query_params: Dict[str, Any] = {"query_type": query_type}
 
-        if query_type == "sender":
-            query_params["sender"] = query_value
-            query_params["gmail_query"] = f"from:{query_value}"
-        elif query_type == "keyword":
-            query_params["keyword"] = query_value
-            query_params["gmail_query"] = str(query_value)
-        elif query_type == "subject":
-            query_params["subject"] = query_value
-            query_params["gmail_query"] = f"subject:{query_value}"
-        elif query_type == "label":
-            query_params["label"] = query_value
-            # Label query can be either name or ID; Gmail query syntax uses label:
-            query_params["gmail_query"] = f"label:{query_value}"
-        elif query_type == "date_range":
+        query_format = _QUERY_FORMATS.get(query_type)
+        if query_format is not None:
+            query_params[query_type] = query_value
+            query_params["gmail_query"] = query_format.format(query_value)
+        else:  # date_range
             after = params.get("after")
             before = params.get("before")
             if not after and not before:
@@ -109,7 +107,7 @@ class GmailBulkAdapter(BulkToolAdapter):
         # Build action_params based on action
         action_params = {}
 
-        if action in ["label", "move_to_label"]:
+        if action in ("label", "move_to_label"):
             label_name = params.get("label_name")
             if not label_name:
                 raise ValueError(f"label_name is required for action '{action}'")
@@ -159,10 +157,11 @@ class GmailBulkAdapter(BulkToolAdapter):
         if not page.get("success"):
             raise Exception(f"Failed to count emails: {page.get('error', 'Unknown error')}")
 
-        estimate = page.get("data", {}).get("result_size_estimate")
+        data = page.get("data") or {}
+        estimate = data.get("result_size_estimate")
         if estimate is None:
             # Gmail may omit estimate; fall back to at-least-1 if any messages returned.
-            return len(page.get("data", {}).get("message_ids", []) or [])
+            return len(data.get("message_ids") or ())
 
         return int(estimate)
 
@@ -189,9 +188,8 @@ class GmailBulkAdapter(BulkToolAdapter):
         if not query:
             raise ValueError("Missing gmail_query in prepared context")
 
-        page_token = None
-        if context.metadata:
-            page_token = context.metadata.get("page_token")
+        md = context.metadata
+        page_token = md.get("page_token") if md else None
 
         page = await gmail_list_message_ids_page(
             query=query,
@@ -202,26 +200,27 @@ class GmailBulkAdapter(BulkToolAdapter):
         if not page.get("success"):
             raise Exception(f"Failed to fetch message IDs: {page.get('error', 'Unknown error')}")
 
-        data = page.get("data", {})
+        data = page.get("data") or {}
         next_token = data.get("next_page_token")
         estimate = data.get("result_size_estimate")
+        message_ids = data.get("message_ids") or ()
 
-        if context.metadata is None:
-            context.metadata = {}
-        context.metadata["page_token"] = next_token
+        if md is None:
+            md = context.metadata = {}
+        md["page_token"] = next_token
         if estimate is not None:
-            context.metadata["total_estimated_count"] = int(estimate)
+            md["total_estimated_count"] = int(estimate)
 
-        message_ids = data.get("message_ids", []) or []
-        return [BulkItem(id=mid, display_name=mid, raw_data=None) for mid in message_ids]
+        id_only = BulkItem.id_only
+        return [id_only(mid) for mid in message_ids]
 
     async def execute_batch(
-        self, items: List[BulkItem], context: PreparedBulkContext
+        self, items: Iterable[BulkItem], context: PreparedBulkContext
     ) -> List[BulkResult]:
         """Execute the action on a batch of emails.
 
         Args:
-            items: List of emails to process.
+            items: Emails to process; iterated once.
             context: Prepared bulk context with action parameters.
 
         Returns:
@@ -230,41 +229,37 @@ class GmailBulkAdapter(BulkToolAdapter):
 
         # Execute exactly ONE Gmail batchModify call.
         action = context.action
-        message_ids = [i.id for i in items]
+        action_params = context.action_params
+        message_ids = tuple(i.id for i in items)
+        result_cls = BulkResult
 
         add_label_ids: List[str] = []
         remove_label_ids: List[str] = []
 
         if action == "label":
-            add_label_ids = [context.action_params["label_id"]]
+            add_label_ids = [action_params["label_id"]]
         elif action == "archive":
             remove_label_ids = ["INBOX"]
         elif action == "move_to_label":
-            add_label_ids = [context.action_params["label_id"]]
+            add_label_ids = [action_params["label_id"]]
             remove_label_ids = ["INBOX"]
         else:
-            return [
-                BulkResult(
-                    item_id=mid,
-                    success=False,
-                    error=f"Unsupported Gmail bulk action: {action}",
-                )
-                for mid in message_ids
-            ]
+            err_str = f"Unsupported Gmail bulk action: {action}"
+            return [result_cls(mid, False, err_str) for mid in message_ids]
 
         result = await gmail_batch_modify_labels(
-            message_ids=message_ids,
+            message_ids=list(message_ids),
             add_label_ids=add_label_ids,
             remove_label_ids=remove_label_ids,
         )
 
         if result.get("success"):
-            return [BulkResult(item_id=mid, success=True) for mid in message_ids]
+            return [result_cls(mid, True, None) for mid in message_ids]
 
         # Auth/permission errors should terminate the bulk operation immediately.
         status_code = result.get("status_code")
         if status_code in (401, 403):
             raise PermissionError(result.get("error") or "GMAIL_AUTH_ERROR")
 
-        err = result.get("error", "Unknown error")
-        return [BulkResult(item_id=mid, success=False, error=str(err)) for mid in message_ids]
+        err_str = str(result.get("error", "Unknown error"))
+        return [result_cls(mid, False, err_str) for mid in message_ids]
@@ -3,6 +3,7 @@
 This module provides a central registry for all bulk-capable tool adapters.
 """
 
+from functools import cache
 from typing import Dict
 
 from src.adapters.bulk_tool_adapter import BulkToolAdapter
@@ -19,9 +20,14 @@ BULK_ADAPTERS: Dict[str, BulkToolAdapter] = {
 }
 
 
+@cache
 def get_adapter(tool_name: str) -> BulkToolAdapter:
     """Get a bulk adapter by tool name.
 
+    Adapters are stateless singletons and BULK_ADAPTERS is fixed at import,
+    so lookups are memoized. Call get_adapter.cache_clear() if the registry
+    is ever mutated at runtime.
+
     Args:
         tool_name: The name of the tool (e.g., "gmail", "calendar", "trello").
 
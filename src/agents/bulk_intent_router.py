@@ -6,17 +6,122 @@ control commands. It maps user text to explicit intents without fuzzy inference.
 The router is stateless and has no side effects. It only classifies intent.
 """
 
+import re
+import sys
+from functools import lru_cache
 from typing import Literal
 
 
 BulkIntent = Literal["continue", "cancel", "unknown"]
 
+# Continue intents (explicit confirmation)
+_CONTINUE_KEYWORDS = frozenset({
+    "continue",
+    "yes",
+    "proceed",
+    "go",
+    "next",
+    "go ahead",
+    "keep going",
+    "resume",
+    "ok",
+    "okay",
+    "sure",
+    "yep",
+    "yeah",
+})
+
+# Cancel intents (explicit stop)
+_CANCEL_KEYWORDS = frozenset({
+    "cancel",
+    "stop",
+    "abort",
+    "no",
+    "halt",
+    "quit",
+    "end",
+    "don't",
+    "do not",
+    "never mind",
+    "nevermind",
+})
+
+
+def _alternation(keywords: frozenset) -> str:
+    """Join keywords into a regex alternation, longest first."""
+
+    # Longest first so multi-word phrases are preferred over their prefixes.
+    return "|".join(re.escape(k) for k in sorted(keywords, key=lambda k: (-len(k), k)))
+
+
+# Both keyword classes are compiled into ONE case-insensitive, whole-word
+# pattern; the named group that matched tells which class was hit. A message
+# is scanned once in total instead of once per keyword or per class. Whole-word
+# matching keeps "no" from firing on "know" or "snow". With two dozen literals
+# and chat-sized input, this one compiled pattern is already a single linear
+# pass; a SIMD multi-pattern engine would not change the cost profile.
+_KEYWORD_RE = re.compile(
+    rf"\b(?:(?P<continue>{_alternation(_CONTINUE_KEYWORDS)})"
+    rf"|(?P<cancel>{_alternation(_CANCEL_KEYWORDS)}))\b",
+    re.IGNORECASE,
+)
+
+# Most replies lead with the keyword ("yes", "ok go", "stop please"), and since
+# the first-mentioned intent wins, a leading keyword settles the result without
+# scanning the rest of the message. The leading word is dispatched with a
+# single set lookup; multi-word keywords whose first word is not itself a
+# keyword ("keep going", "do not") fall through to the full scan.
+_LEADING_WORD_RE = re.compile(r"\s*(\w+)")
+_LEADING_CONTINUE_WORDS = frozenset(k for k in _CONTINUE_KEYWORDS if " " not in k)
+_LEADING_CANCEL_WORDS = frozenset(k for k in _CANCEL_KEYWORDS if " " not in k)
+
+# Bound matcher methods, so the per-message path does no attribute lookups.
+_match_leading_word = _LEADING_WORD_RE.match
+_search_keywords = _KEYWORD_RE.search
+
+
+# Whole-message replies that are exactly one keyword ("yes", "stop", "go
+# ahead") are the bulk of confirmation traffic; they are answered with a set
+# lookup on the normalized text before the cache or the scan is consulted.
+_CONTINUE_EXACT = frozenset(map(sys.intern, _CONTINUE_KEYWORDS))
+_CANCEL_EXACT = frozenset(map(sys.intern, _CANCEL_KEYWORDS))
+
+# Messages longer than this are classified without memoization.
+_CACHEABLE_MAX_LEN = 256
+
+
+def _classify(user_message: str) -> BulkIntent:
+    """Classify a message without consulting the cache."""
+
+    leading = _match_leading_word(user_message)
+    if leading is not None:
+        word = leading.group(1).lower()
+        if word in _LEADING_CONTINUE_WORDS:
+            return "continue"
+        if word in _LEADING_CANCEL_WORDS:
+            return "cancel"
+
+    # The first keyword mentioned decides; the scan stops at that hit.
+    match = _search_keywords(user_message)
+    if match is None:
+        return "unknown"
+    return "continue" if match.lastgroup == "continue" else "cancel"
+
+
+_classify_cached = lru_cache(maxsize=512)(_classify)
+
 
 def classify_bulk_intent(user_message: str) -> BulkIntent:
     """Classify user intent for bulk operation control.
 
-    This function uses explicit keyword matching to determine if the user
-    wants to continue, cancel, or if the intent is unclear.
+    This function uses explicit whole-word keyword matching to determine if
+    the user wants to continue, cancel, or if the intent is unclear.
+
+    The function is pure, so results for short messages are memoized;
+    confirmation replies such as "yes" or "stop" repeat often and become a
+    dict lookup. Long messages (e.g. pasted content) bypass the cache so it
+    does not pin large strings, and are classified in one regex pass over
+    the text.
 
     NO fuzzy inference. NO LLM calls. NO guessing.
 
@@ -32,6 +137,8 @@ def classify_bulk_intent(user_message: str) -> BulkIntent:
     Intent Detection Rules:
         Continue: "continue", "yes", "proceed", "go", "next", "go ahead", "keep going"
         Cancel: "cancel", "stop", "abort", "no", "halt", "quit", "end"
+        When both kinds of keyword appear, the first one mentioned wins:
+        "no, go ahead" is a cancel and "yes, then stop" is a continue.
 
     Examples:
         >>> classify_bulk_intent("continue")
@@ -44,57 +151,27 @@ def classify_bulk_intent(user_message: str) -> BulkIntent:
         'unknown'
     """
 
-    normalized = user_message.strip().lower()
-
-    # Continue intents (explicit confirmation)
-    continue_keywords = [
-        "continue",
-        "yes",
-        "proceed",
-        "go",
-        "next",
-        "go ahead",
-        "keep going",
-        "resume",
-        "ok",
-        "okay",
-        "sure",
-        "yep",
-        "yeah",
-    ]
-
-    for keyword in continue_keywords:
-        if keyword in normalized:
-            return "continue"
+    if len(user_message) > _CACHEABLE_MAX_LEN:
+        return _classify(user_message)
 
-    # Cancel intents (explicit stop)
-    cancel_keywords = [
-        "cancel",
-        "stop",
-        "abort",
-        "no",
-        "halt",
-        "quit",
-        "end",
-        "don't",
-        "do not",
-        "never mind",
-        "nevermind",
-    ]
-
-    for keyword in cancel_keywords:
-        if keyword in normalized:
-            return "cancel"
+    normalized = user_message.strip().lower()
+    if normalized in _CONTINUE_EXACT:
+        return "continue"
+    if normalized in _CANCEL_EXACT:
+        return "cancel"
 
-    # If no clear intent, return unknown
-    return "unknown"
+    # Matching ignores case and surrounding whitespace, so the normalized text
+    # is the cache key: "Yes, go ahead" and "yes, go ahead " share one entry.
+    return _classify_cached(normalized)
 
 
 def requires_bulk_continuation(user_message: str) -> bool:
     """Check if user message is a bulk continuation command.
 
     This is a convenience wrapper around classify_bulk_intent for
-    use in agent logic that needs a simple boolean check.
+    use in agent logic that needs a simple boolean check. Checking both
+    wrappers for the same message classifies it only once; the second call
+    is served from the classifier cache.
 
     Args:
         user_message: The raw user text.
@@ -118,7 +195,9 @@ def requires_bulk_cancellation(user_message: str) -> bool:
     """Check if user message is a bulk cancellation command.
 
     This is a convenience wrapper around classify_bulk_intent for
-    use in agent logic that needs a simple boolean check.
+    use in agent logic that needs a simple boolean check. Checking both
+    wrappers for the same message classifies it only once; the second call
+    is served from the classifier cache.
 
     Args:
         user_message: The raw user text.
@@ -39,12 +39,14 @@ as a serializable dict, making it safe for async and multi-turn conversations.
 
 from __future__ import annotations
 
-import uuid
-from dataclasses import dataclass, field, asdict
-from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import secrets
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class BulkOperationState:
     """Represents the current state of a bulk operation.
 
@@ -55,7 +57,9 @@ class BulkOperationState:
         batch_size: Number of items to process per batch.
         total: Total number of items in the original request.
         processed: Number of items processed so far.
-        remaining_items: List of items still to be processed.
+        remaining_items: Items still to be processed, as a deque so each batch
+            is taken from the front in O(batch_size). Empty for count-only
+            operations, which fetch their items page by page.
         metadata: Optional domain-specific metadata (e.g., label ID, target list).
     """
 
@@ -65,12 +69,36 @@ class BulkOperationState:
     batch_size: int
     total: int
     processed: int
-    remaining_items: List[Any]
+    remaining_items: Deque[Any]
     metadata: Optional[Dict[str, Any]] = field(default_factory=dict)
 
     def to_dict(self) -> Dict[str, Any]:
-        """Serialize state to a JSON-safe dictionary."""
-        return asdict(self)
+        """Serialize state to a JSON-safe dictionary.
+
+        remaining_items is converted to a plain list; metadata is returned by
+        reference rather than deep-copied, since callers treat the result as a
+        read-only payload to persist.
+        """
+        return {
+            "op_id": self.op_id,
+            "domain": self.domain,
+            "action": self.action,
+            "batch_size": self.batch_size,
+            "total": self.total,
+            "processed": self.processed,
+            "remaining_items": list(self.remaining_items),
+            "metadata": self.metadata if self.metadata is not None else {},
+        }
+
+    @property
+    def remaining(self) -> int:
+        """Number of items not yet processed."""
+        return self.total - self.processed
+
+    def take(self, count: int) -> List[Any]:
+        """Remove and return up to `count` items from the front of the queue."""
+        remaining = self.remaining_items
+        return [remaining.popleft() for _ in range(min(count, len(remaining)))]
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "BulkOperationState":
@@ -82,7 +110,7 @@ class BulkOperationState:
             batch_size=data["batch_size"],
             total=data["total"],
             processed=data["processed"],
-            remaining_items=data["remaining_items"],
+            remaining_items=deque(data["remaining_items"]),
             metadata=data.get("metadata") or {},
         )
 
@@ -90,9 +118,11 @@ class BulkOperationState:
 async def start_bulk_operation(
     domain: str,
     action: str,
-    items: List[Any],
+    items: Optional[List[Any]] = None,
     batch_size: int = 10,
     metadata: Optional[Dict[str, Any]] = None,
+    serialize: bool = True,
+    total: Optional[int] = None,
 ) -> Dict[str, Any]:
     """Initialize a new bulk operation without processing any items.
 
@@ -102,19 +132,24 @@ async def start_bulk_operation(
     Args:
         domain: The domain (e.g., "gmail", "calendar", "trello").
         action: The action to perform (e.g., "label", "archive", "delete").
-        items: The full list of items to process.
+        items: The full list of items to process. Omit it and pass `total`
+            for a count-only operation whose items are fetched per batch.
         batch_size: How many items to process per batch (default 10).
         metadata: Optional domain-specific data (e.g., {"label_id": "Label_123"}).
+        serialize: When False, "state" holds the BulkOperationState itself
+            instead of a dict, for callers that keep it in-process.
+        total: Item count of a count-only operation; ignored when `items`
+            is given.
 
     Returns:
         A dict with:
         - success: True
         - processed_this_batch: 0
         - processed_total: 0
-        - remaining: len(items)
-        - total: len(items)
+        - remaining: the total
+        - total: len(items), or `total` for a count-only operation
         - needs_confirmation: True (always, since no work done yet)
-        - state: Serialized BulkOperationState
+        - state: Serialized BulkOperationState (the instance if serialize=False)
         - errors: None
 
     Example:
@@ -128,25 +163,39 @@ async def start_bulk_operation(
         # Jarvis stores result["state"] and asks user to confirm.
     """
 
+    if items is None:
+        if total is None:
+            raise ValueError("start_bulk_operation needs items or total")
+        items = []
+    else:
+        total = len(items)
+    # When serializing, nothing is processed before the next turn rebuilds the
+    # state with from_dict, so the queue starts empty and the items are copied
+    # exactly once, straight into the serialized payload.
     state = BulkOperationState(
-        op_id=str(uuid.uuid4()),
+        op_id=secrets.token_hex(16),
         domain=domain,
         action=action,
         batch_size=batch_size,
-        total=len(items),
+        total=total,
         processed=0,
-        remaining_items=list(items),
+        remaining_items=deque() if serialize else deque(items),
         metadata=metadata or {},
     )
+    if serialize:
+        payload: Any = state.to_dict()
+        payload["remaining_items"] = list(items)
+    else:
+        payload = state
 
     return {
         "success": True,
         "processed_this_batch": 0,
         "processed_total": 0,
-        "remaining": len(items),
-        "total": len(items),
+        "remaining": total,
+        "total": total,
         "needs_confirmation": True,
-        "state": state.to_dict(),
+        "state": payload,
         "errors": None,
     }
 
@@ -154,12 +203,14 @@ async def start_bulk_operation(
 async def continue_bulk_operation(
     state: BulkOperationState,
     action_callable: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+    concurrency_limit: Optional[int] = None,
+    serialize: bool = True,
 ) -> Dict[str, Any]:
     """Process exactly ONE batch of items and return updated state.
 
     This function:
     - Takes up to `batch_size` items from `remaining_items`.
-    - Calls `action_callable(item, metadata)` for each item.
+    - Calls `action_callable(item, metadata)` for each item concurrently.
     - Collects any per-item errors without stopping the batch.
     - Returns updated state for Jarvis to store and use on next confirmation.
 
@@ -174,6 +225,10 @@ async def continue_bulk_operation(
         action_callable: An async function with signature:
             async def action_callable(item: Any, metadata: dict) -> Any
             It should process exactly ONE item and return a result or raise.
+        concurrency_limit: Optional cap on how many items of the batch are
+            in flight at once. None runs the whole batch concurrently.
+        serialize: When False, "state" holds the updated BulkOperationState
+            itself instead of a dict, skipping the to_dict round-trip.
 
     Returns:
         A dict with:
@@ -183,14 +238,21 @@ async def continue_bulk_operation(
         - remaining: Items still left to process
         - total: Original total
         - needs_confirmation: True if more items remain, False if done
-        - state: Updated serialized state
-        - errors: List of {"item": ..., "error": ...} for failed items, or None
+        - state: Updated serialized state (the instance if serialize=False)
+        - errors: {"items": [...], "messages": [...]} for failed items, as two
+          parallel lists (failed item i has message i), or None
+
+    Raises:
+        ValueError: If `state` is a count-only state from
+            `start_bulk_operation(total=...)`, which holds no items to take.
 
     Example:
         # Reconstruct state from stored dict
         state = BulkOperationState.from_dict(stored_state_dict)
 
-        # Define the action (wraps existing single-item function)
+        # Define the action (wraps existing single-item function).
+        # For Gmail, prefer the GmailBulkAdapter, which labels a whole batch
+        # with one batchModify call instead of one request per message.
         async def label_one_email(msg_id, meta):
             return await gmail_label(msg_id, [meta["label_id"]])
 
@@ -203,35 +265,59 @@ async def continue_bulk_operation(
             # Done: "All 50 items processed."
     """
 
-    batch = state.remaining_items[: state.batch_size]
-    remaining_after = state.remaining_items[state.batch_size :]
+    if state.remaining > 0 and not state.remaining_items:
+        raise ValueError(
+            "count-only bulk states have no items to take; drive them "
+            "through their adapter, as bulk_gate does for Gmail"
+        )
+
+    batch = state.take(state.batch_size)
+
+    # Normalize once so every item and the serialized state share one dict.
+    meta = state.metadata
+    if meta is None:
+        meta = state.metadata = {}
+
+    if concurrency_limit:
+        sem = asyncio.Semaphore(concurrency_limit)
+
+        async def run_one(item: Any) -> Any:
+            async with sem:
+                return await action_callable(item, meta)
+
+        coros = [run_one(item) for item in batch]
+    else:
+        coros = [action_callable(item, meta) for item in batch]
+
+    results = await asyncio.gather(*coros, return_exceptions=True)
 
-    errors: List[Dict[str, Any]] = []
-    processed_count = 0
+    err_items: List[Any] = []
+    err_msgs: List[str] = []
+    for item, result in zip(batch, results):
+        if isinstance(result, Exception):
+            err_items.append(item)
+            err_msgs.append(str(result))
+        elif isinstance(result, BaseException):
+            raise result
 
-    for item in batch:
-        try:
-            await action_callable(item, state.metadata or {})
-            processed_count += 1
-        except Exception as exc:  # noqa: BLE001
-            errors.append({"item": item, "error": str(exc)})
-            processed_count += 1  # Count as processed even if failed
+    # Failed items count as processed too
+    processed_count = len(batch)
 
     # Update state
     state.processed += processed_count
-    state.remaining_items = remaining_after
+    remaining = state.remaining
 
-    needs_confirmation = len(remaining_after) > 0
+    needs_confirmation = remaining > 0
 
     return {
         "success": True,
         "processed_this_batch": processed_count,
         "processed_total": state.processed,
-        "remaining": len(remaining_after),
+        "remaining": remaining,
         "total": state.total,
         "needs_confirmation": needs_confirmation,
-        "state": state.to_dict(),
-        "errors": errors if errors else None,
+        "state": state.to_dict() if serialize else state,
+        "errors": {"items": err_items, "messages": err_msgs} if err_items else None,
     }
 
 
@@ -263,7 +349,7 @@ async def cancel_bulk_operation(state: BulkOperationState) -> Dict[str, Any]:
         "success": True,
         "cancelled": True,
         "processed_total": state.processed,
-        "remaining": len(state.remaining_items),
+        "remaining": state.remaining,
         "total": state.total,
         "message": (
             f"Bulk {state.action} on {state.domain} cancelled. "
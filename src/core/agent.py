@@ -7,14 +7,20 @@ LLM calls, tools, memory, and external services.
 from __future__ import annotations
 
 import asyncio
-import json
-from typing import Any, Dict, List, Optional
+import atexit
+import hashlib
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
 from functools import lru_cache
 from pathlib import Path
 from threading import Lock
 
 import logging
 
+import orjson
+
 from src.core.context import build_context
 from src.core.llm import call_llm
 from src.core.memory import append_message
@@ -30,7 +36,7 @@ from src.core.calendar_cancel_flow import handle_calendar_cancel_turn
 from src.core.calendar_cancel_flow import maybe_store_calendar_cancel_state_from_tool_result
 from src.core.calendar_note_flow import handle_calendar_note_turn
 from src.core.calendar_note_flow import maybe_store_calendar_note_state_from_tool_result
-from src.core.confidence import compute_tool_confidence, format_confidence_prefix
+from src.core.confidence import cached_tool_confidence, format_confidence_prefix
 from src.utils.logger import get_logger
 from src.utils.logger import log_error
 from src.utils.logger import log_info
@@ -38,143 +44,257 @@ from src.utils.formatter import format_agent_response, strip_system_commentary
 
 logger = logging.getLogger("jarvis.agent")
 
+# When enabled, the deterministic guard flows are started together and their
+# replies are still honoured in priority order. Off by default: a bare "yes"
+# could then advance more than one pending flow in the same turn.
+_PARALLEL_GUARD_FLOWS = os.getenv("JARVIS_PARALLEL_GUARD_FLOWS", "").strip().lower() in {"1", "true", "yes"}
+
+# Opt-in exact-match cache of plain LLM replies (turns that used no tools),
+# keyed by user and message. Off by default (TTL 0): a cached reply ignores
+# anything said in between, so repeating a question returns the same answer.
+_RESPONSE_CACHE_TTL = float(os.getenv("JARVIS_RESPONSE_CACHE_TTL", "0") or 0)
+_RESPONSE_CACHE_MAX = 4096
+# key -> (expiry timestamp (monotonic seconds), reply)
+_RESPONSE_CACHE: Dict[tuple, tuple] = {}
+
+# Per-user operations on a pending store take one of _PENDING_LOCK_STRIPES
+# striped locks chosen by the user key, so users rarely contend with each
+# other. The single *_LOCK of each store is only used for the full-store load
+# at startup.
+_PENDING_LOCK_STRIPES = 64
+
+
+def _lock_stripes() -> List[Lock]:
+    return [Lock() for _ in range(_PENDING_LOCK_STRIPES)]
+
+
+def _lock_for(uid_key: str, locks: List[Lock]) -> Lock:
+    return locks[hash(uid_key) & (_PENDING_LOCK_STRIPES - 1)]
+
+
 _PENDING_TOOL_CONFIRM: Dict[str, Dict[str, Any]] = {}
 _PENDING_TOOL_CONFIRM_LOCK = Lock()
+_PENDING_TOOL_CONFIRM_LOCKS = _lock_stripes()
+_PENDING_TOOL_CONFIRM_DIR = Path("data") / "pending_tool_confirm"
 _PENDING_TOOL_CONFIRM_FILE = Path("data") / "pending_tool_confirm.json"
 
 _PENDING_TRELLO_COMMENT: Dict[str, Dict[str, Any]] = {}
 _PENDING_TRELLO_COMMENT_LOCK = Lock()
+_PENDING_TRELLO_COMMENT_LOCKS = _lock_stripes()
+_PENDING_TRELLO_COMMENT_DIR = Path("data") / "pending_trello_comment"
 _PENDING_TRELLO_COMMENT_FILE = Path("data") / "pending_trello_comment.json"
 
 _PENDING_TRELLO_DISPATCH: Dict[str, Dict[str, Any]] = {}
 _PENDING_TRELLO_DISPATCH_LOCK = Lock()
+_PENDING_TRELLO_DISPATCH_LOCKS = _lock_stripes()
+_PENDING_TRELLO_DISPATCH_DIR = Path("data") / "pending_trello_dispatch"
 _PENDING_TRELLO_DISPATCH_FILE = Path("data") / "pending_trello_dispatch.json"
 
 _PENDING_CONFIDENCE_CLARIFY: Dict[str, Dict[str, Any]] = {}
 _PENDING_CONFIDENCE_CLARIFY_LOCK = Lock()
+_PENDING_CONFIDENCE_CLARIFY_LOCKS = _lock_stripes()
+_PENDING_CONFIDENCE_CLARIFY_DIR = Path("data") / "pending_confidence_clarify"
 _PENDING_CONFIDENCE_CLARIFY_FILE = Path("data") / "pending_confidence_clarify.json"
 
+# Each store keeps one file per user, <store dir>/<user id>.json, so a turn
+# only rewrites the entry it touched. The *_FILE paths are the older
+# single-file layout, migrated into per-user files on load.
+#
+# Files are written as UTF-8 JSON bytes straight from orjson. Non-string keys
+# are stringified, matching what json.dumps used to write.
+_PENDING_DUMPS_OPTS = orjson.OPT_NON_STR_KEYS
 
-def _load_pending_tool_confirm() -> None:
+
+def _dumps_pending_entry(entry: Dict[str, Any]) -> bytes:
+    return orjson.dumps(entry, option=_PENDING_DUMPS_OPTS)
+
+
+def _write_pending_entry(directory: Path, uid_key: str, entry: Optional[Dict[str, Any]]) -> None:
+    path = directory / f"{uid_key}.json"
+    if entry is None:
+        path.unlink(missing_ok=True)
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(_dumps_pending_entry(entry))
+    os.replace(tmp, path)
+
+
+def _load_pending(
+    directory: Path,
+    legacy_file: Path,
+    target: Dict[str, Dict[str, Any]],
+    lock: Lock,
+    normalize: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]] = lambda v: v,
+) -> None:
     try:
-        _PENDING_TOOL_CONFIRM_FILE.parent.mkdir(parents=True, exist_ok=True)
-        if not _PENDING_TOOL_CONFIRM_FILE.exists():
-            return
-        raw = _PENDING_TOOL_CONFIRM_FILE.read_text(encoding="utf-8")
-        if not raw.strip():
-            return
-        data = json.loads(raw)
-        if not isinstance(data, dict):
+        directory.mkdir(parents=True, exist_ok=True)
+        for path in directory.glob("*.json"):
+            try:
+                value = orjson.loads(path.read_bytes())
+            except Exception:
+                continue
+            if isinstance(value, dict):
+                value = normalize(value)
+                if value is not None:
+                    with lock:
+                        target[path.stem] = value
+
+        if not legacy_file.exists():
             return
-        with _PENDING_TOOL_CONFIRM_LOCK:
-            _PENDING_TOOL_CONFIRM.clear()
+        raw = legacy_file.read_bytes()
+        data = orjson.loads(raw) if raw.strip() else {}
+        if isinstance(data, dict):
             for k, v in data.items():
-                if isinstance(k, str) and isinstance(v, dict):
-                    _PENDING_TOOL_CONFIRM[k] = v
+                if not isinstance(k, str) or not isinstance(v, dict):
+                    continue
+                if (directory / f"{k}.json").exists():
+                    continue
+                v = normalize(v)
+                if v is None:
+                    continue
+                with lock:
+                    target[k] = v
+                _write_pending_entry(directory, k, v)
+        legacy_file.unlink()
     except Exception:
         return
 
 
+def _normalize_pending_trello_dispatch(v: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if "tool_name" not in v or not isinstance(v.get("tool_name"), str) or not str(v.get("tool_name") or "").strip():
+        v = dict(v)
+        v["tool_name"] = "trello_dispatch"
+    return v
+
+
+def _normalize_pending_confidence_clarify(v: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    awaiting = v.get("awaiting")
+    if isinstance(awaiting, str) and awaiting.strip().lower() == "details":
+        return None
+    return v
+
+
+def _load_pending_tool_confirm() -> None:
+    _load_pending(
+        _PENDING_TOOL_CONFIRM_DIR,
+        _PENDING_TOOL_CONFIRM_FILE,
+        _PENDING_TOOL_CONFIRM,
+        _PENDING_TOOL_CONFIRM_LOCK,
+    )
+
+
 def _load_pending_trello_comment() -> None:
-    try:
-        _PENDING_TRELLO_COMMENT_FILE.parent.mkdir(parents=True, exist_ok=True)
-        if not _PENDING_TRELLO_COMMENT_FILE.exists():
-            return
-        raw = _PENDING_TRELLO_COMMENT_FILE.read_text(encoding="utf-8")
-        if not raw.strip():
-            return
-        data = json.loads(raw)
-        if not isinstance(data, dict):
-            return
-        with _PENDING_TRELLO_COMMENT_LOCK:
-            _PENDING_TRELLO_COMMENT.clear()
-            for k, v in data.items():
-                if isinstance(k, str) and isinstance(v, dict):
-                    _PENDING_TRELLO_COMMENT[k] = v
-    except Exception:
-        return
+    _load_pending(
+        _PENDING_TRELLO_COMMENT_DIR,
+        _PENDING_TRELLO_COMMENT_FILE,
+        _PENDING_TRELLO_COMMENT,
+        _PENDING_TRELLO_COMMENT_LOCK,
+    )
 
 
 def _load_pending_trello_dispatch() -> None:
-    try:
-        _PENDING_TRELLO_DISPATCH_FILE.parent.mkdir(parents=True, exist_ok=True)
-        if not _PENDING_TRELLO_DISPATCH_FILE.exists():
-            return
-        raw = _PENDING_TRELLO_DISPATCH_FILE.read_text(encoding="utf-8")
-        if not raw.strip():
-            return
-        data = json.loads(raw)
-        if not isinstance(data, dict):
-            return
-        with _PENDING_TRELLO_DISPATCH_LOCK:
-            _PENDING_TRELLO_DISPATCH.clear()
-            for k, v in data.items():
-                if isinstance(k, str) and isinstance(v, dict):
-                    if "tool_name" not in v or not isinstance(v.get("tool_name"), str) or not str(v.get("tool_name") or "").strip():
-                        v = dict(v)
-                        v["tool_name"] = "trello_dispatch"
-                    _PENDING_TRELLO_DISPATCH[k] = v
-    except Exception:
-        return
+    _load_pending(
+        _PENDING_TRELLO_DISPATCH_DIR,
+        _PENDING_TRELLO_DISPATCH_FILE,
+        _PENDING_TRELLO_DISPATCH,
+        _PENDING_TRELLO_DISPATCH_LOCK,
+        _normalize_pending_trello_dispatch,
+    )
 
 
 def _load_pending_confidence_clarify() -> None:
-    try:
-        _PENDING_CONFIDENCE_CLARIFY_FILE.parent.mkdir(parents=True, exist_ok=True)
-        if not _PENDING_CONFIDENCE_CLARIFY_FILE.exists():
-            return
-        raw = _PENDING_CONFIDENCE_CLARIFY_FILE.read_text(encoding="utf-8")
-        if not raw.strip():
-            return
-        data = json.loads(raw)
-        if not isinstance(data, dict):
-            return
-        with _PENDING_CONFIDENCE_CLARIFY_LOCK:
-            _PENDING_CONFIDENCE_CLARIFY.clear()
-            for k, v in data.items():
-                if isinstance(k, str) and isinstance(v, dict):
-                    awaiting = v.get("awaiting")
-                    if isinstance(awaiting, str) and awaiting.strip().lower() == "details":
-                        continue
-                    _PENDING_CONFIDENCE_CLARIFY[k] = v
-    except Exception:
-        return
+    _load_pending(
+        _PENDING_CONFIDENCE_CLARIFY_DIR,
+        _PENDING_CONFIDENCE_CLARIFY_FILE,
+        _PENDING_CONFIDENCE_CLARIFY,
+        _PENDING_CONFIDENCE_CLARIFY_LOCK,
+        _normalize_pending_confidence_clarify,
+    )
 
 
-def _save_pending_tool_confirm() -> None:
+# Pending-state writes are coalesced: _save_* only marks a user's entry dirty,
+# and a debounced flush writes every dirty entry once. Both the orjson
+# serialization and the disk write run in a worker thread (asyncio.to_thread),
+# so the setters called from agent() never do I/O on the event loop.
+# Outside a running loop (scripts, sync callers) the flush happens
+# immediately, and any still-dirty state is flushed at interpreter exit.
+_PENDING_STORES: Dict[str, tuple] = {
+    "tool_confirm": (_PENDING_TOOL_CONFIRM, _PENDING_TOOL_CONFIRM_LOCKS, _PENDING_TOOL_CONFIRM_DIR),
+    "trello_comment": (_PENDING_TRELLO_COMMENT, _PENDING_TRELLO_COMMENT_LOCKS, _PENDING_TRELLO_COMMENT_DIR),
+    "trello_dispatch": (_PENDING_TRELLO_DISPATCH, _PENDING_TRELLO_DISPATCH_LOCKS, _PENDING_TRELLO_DISPATCH_DIR),
+    "confidence_clarify": (
+        _PENDING_CONFIDENCE_CLARIFY,
+        _PENDING_CONFIDENCE_CLARIFY_LOCKS,
+        _PENDING_CONFIDENCE_CLARIFY_DIR,
+    ),
+}
+_PENDING_FLUSH_DELAY = 0.05
+_PENDING_DIRTY: set[tuple[str, str]] = set()
+_PENDING_DIRTY_LOCK = Lock()
+# Serializes snapshot + write so an older snapshot never lands after a newer one.
+_PENDING_WRITE_LOCK = Lock()
+_pending_flush_loop: Optional[asyncio.AbstractEventLoop] = None
+_pending_flush_tasks: set[asyncio.Task] = set()
+
+
+def _flush_pending_state() -> None:
+    with _PENDING_WRITE_LOCK:
+        with _PENDING_DIRTY_LOCK:
+            dirty = list(_PENDING_DIRTY)
+            _PENDING_DIRTY.clear()
+        for name, uid_key in dirty:
+            store, locks, directory = _PENDING_STORES[name]
+            try:
+                # Entries are replaced, never mutated, so the reference is a
+                # stable snapshot once read.
+                with _lock_for(uid_key, locks):
+                    entry = store.get(uid_key)
+                _write_pending_entry(directory, uid_key, entry)
+            except Exception:
+                continue
+
+
+def _start_pending_flush() -> None:
+    global _pending_flush_loop
+    _pending_flush_loop = None
+    task = asyncio.get_running_loop().create_task(asyncio.to_thread(_flush_pending_state))
+    _pending_flush_tasks.add(task)
+    task.add_done_callback(_pending_flush_tasks.discard)
+
+
+def _mark_pending_dirty(name: str, uid_key: str) -> None:
+    global _pending_flush_loop
+    with _PENDING_DIRTY_LOCK:
+        _PENDING_DIRTY.add((name, uid_key))
     try:
-        _PENDING_TOOL_CONFIRM_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with _PENDING_TOOL_CONFIRM_LOCK:
-            _PENDING_TOOL_CONFIRM_FILE.write_text(json.dumps(_PENDING_TOOL_CONFIRM), encoding="utf-8")
-    except Exception:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _flush_pending_state()
+        return
+    if _pending_flush_loop is loop:
         return
+    _pending_flush_loop = loop
+    loop.call_later(_PENDING_FLUSH_DELAY, _start_pending_flush)
 
 
-def _save_pending_trello_comment() -> None:
-    try:
-        _PENDING_TRELLO_COMMENT_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with _PENDING_TRELLO_COMMENT_LOCK:
-            _PENDING_TRELLO_COMMENT_FILE.write_text(json.dumps(_PENDING_TRELLO_COMMENT), encoding="utf-8")
-    except Exception:
-        return
+atexit.register(_flush_pending_state)
 
 
-def _save_pending_trello_dispatch() -> None:
-    try:
-        _PENDING_TRELLO_DISPATCH_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with _PENDING_TRELLO_DISPATCH_LOCK:
-            _PENDING_TRELLO_DISPATCH_FILE.write_text(json.dumps(_PENDING_TRELLO_DISPATCH), encoding="utf-8")
-    except Exception:
-        return
+def _save_pending_tool_confirm(uid_key: str) -> None:
+    _mark_pending_dirty("tool_confirm", uid_key)
 
 
-def _save_pending_confidence_clarify() -> None:
-    try:
-        _PENDING_CONFIDENCE_CLARIFY_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with _PENDING_CONFIDENCE_CLARIFY_LOCK:
-            _PENDING_CONFIDENCE_CLARIFY_FILE.write_text(json.dumps(_PENDING_CONFIDENCE_CLARIFY), encoding="utf-8")
-    except Exception:
-        return
+def _save_pending_trello_comment(uid_key: str) -> None:
+    _mark_pending_dirty("trello_comment", uid_key)
+
+
+def _save_pending_trello_dispatch(uid_key: str) -> None:
+    _mark_pending_dirty("trello_dispatch", uid_key)
+
+
+def _save_pending_confidence_clarify(uid_key: str) -> None:
+    _mark_pending_dirty("confidence_clarify", uid_key)
 
 
 _load_pending_tool_confirm()
@@ -183,94 +303,484 @@ _load_pending_trello_dispatch()
 _load_pending_confidence_clarify()
 
 
-def _get_pending_tool_confirm(user_id: int) -> Optional[Dict[str, Any]]:
-    with _PENDING_TOOL_CONFIRM_LOCK:
-        pending = _PENDING_TOOL_CONFIRM.get(str(user_id))
-        if not isinstance(pending, dict):
-            return None
-        return dict(pending)
+# Stored pending entries are copy-on-write snapshots: setters store a private
+# copy once and getters hand out that reference without copying. Callers must
+# not mutate what a getter returns; copy it (as the agent does for tool_args)
+# and call the setter instead.
+#
+# Getters first test membership without a lock (a single dict lookup is atomic
+# under the GIL), so users with nothing pending never touch a lock. An entry
+# that appears right after the check is treated as not yet pending.
+def _get_pending_tool_confirm(uid_key: str) -> Optional[Dict[str, Any]]:
+    if uid_key not in _PENDING_TOOL_CONFIRM:
+        return None
+    with _lock_for(uid_key, _PENDING_TOOL_CONFIRM_LOCKS):
+        pending = _PENDING_TOOL_CONFIRM.get(uid_key)
+    return pending if isinstance(pending, dict) else None
+
+
+def _get_pending_trello_comment(uid_key: str) -> Optional[Dict[str, Any]]:
+    if uid_key not in _PENDING_TRELLO_COMMENT:
+        return None
+    with _lock_for(uid_key, _PENDING_TRELLO_COMMENT_LOCKS):
+        pending = _PENDING_TRELLO_COMMENT.get(uid_key)
+    return pending if isinstance(pending, dict) else None
+
+
+def _get_pending_trello_dispatch(uid_key: str) -> Optional[Dict[str, Any]]:
+    if uid_key not in _PENDING_TRELLO_DISPATCH:
+        return None
+    with _lock_for(uid_key, _PENDING_TRELLO_DISPATCH_LOCKS):
+        pending = _PENDING_TRELLO_DISPATCH.get(uid_key)
+    return pending if isinstance(pending, dict) else None
+
+
+def _get_pending_confidence_clarify(uid_key: str) -> Optional[Dict[str, Any]]:
+    if uid_key not in _PENDING_CONFIDENCE_CLARIFY:
+        return None
+    with _lock_for(uid_key, _PENDING_CONFIDENCE_CLARIFY_LOCKS):
+        pending = _PENDING_CONFIDENCE_CLARIFY.get(uid_key)
+    return pending if isinstance(pending, dict) else None
+
+
+def _set_pending_tool_confirm(uid_key: str, pending: Dict[str, Any]) -> None:
+    with _lock_for(uid_key, _PENDING_TOOL_CONFIRM_LOCKS):
+        _PENDING_TOOL_CONFIRM[uid_key] = dict(pending)
+    _save_pending_tool_confirm(uid_key)
+
+
+def _set_pending_trello_comment(uid_key: str, pending: Dict[str, Any]) -> None:
+    with _lock_for(uid_key, _PENDING_TRELLO_COMMENT_LOCKS):
+        _PENDING_TRELLO_COMMENT[uid_key] = dict(pending)
+    _save_pending_trello_comment(uid_key)
+
 
+def _set_pending_trello_dispatch(uid_key: str, pending: Dict[str, Any]) -> None:
+    with _lock_for(uid_key, _PENDING_TRELLO_DISPATCH_LOCKS):
+        _PENDING_TRELLO_DISPATCH[uid_key] = dict(pending)
+    _save_pending_trello_dispatch(uid_key)
 
-def _get_pending_trello_comment(user_id: int) -> Optional[Dict[str, Any]]:
-    with _PENDING_TRELLO_COMMENT_LOCK:
-        pending = _PENDING_TRELLO_COMMENT.get(str(user_id))
-        if not isinstance(pending, dict):
-            return None
-        return dict(pending)
 
+def _set_pending_confidence_clarify(uid_key: str, pending: Dict[str, Any]) -> None:
+    with _lock_for(uid_key, _PENDING_CONFIDENCE_CLARIFY_LOCKS):
+        _PENDING_CONFIDENCE_CLARIFY[uid_key] = dict(pending)
+    _save_pending_confidence_clarify(uid_key)
 
-def _get_pending_trello_dispatch(user_id: int) -> Optional[Dict[str, Any]]:
-    with _PENDING_TRELLO_DISPATCH_LOCK:
-        pending = _PENDING_TRELLO_DISPATCH.get(str(user_id))
-        if not isinstance(pending, dict):
-            return None
-        return dict(pending)
 
+def _clear_pending_tool_confirm(uid_key: str) -> None:
+    with _lock_for(uid_key, _PENDING_TOOL_CONFIRM_LOCKS):
+        _PENDING_TOOL_CONFIRM.pop(uid_key, None)
+    _save_pending_tool_confirm(uid_key)
 
-def _get_pending_confidence_clarify(user_id: int) -> Optional[Dict[str, Any]]:
-    with _PENDING_CONFIDENCE_CLARIFY_LOCK:
-        pending = _PENDING_CONFIDENCE_CLARIFY.get(str(user_id))
-        if not isinstance(pending, dict):
-            return None
-        return dict(pending)
 
+def _clear_pending_trello_comment(uid_key: str) -> None:
+    with _lock_for(uid_key, _PENDING_TRELLO_COMMENT_LOCKS):
+        _PENDING_TRELLO_COMMENT.pop(uid_key, None)
+    _save_pending_trello_comment(uid_key)
 
-def _set_pending_tool_confirm(user_id: int, pending: Dict[str, Any]) -> None:
-    with _PENDING_TOOL_CONFIRM_LOCK:
-        _PENDING_TOOL_CONFIRM[str(user_id)] = pending
-    _save_pending_tool_confirm()
 
+def _clear_pending_trello_dispatch(uid_key: str) -> None:
+    with _lock_for(uid_key, _PENDING_TRELLO_DISPATCH_LOCKS):
+        _PENDING_TRELLO_DISPATCH.pop(uid_key, None)
+    _save_pending_trello_dispatch(uid_key)
 
-def _set_pending_trello_comment(user_id: int, pending: Dict[str, Any]) -> None:
-    with _PENDING_TRELLO_COMMENT_LOCK:
-        _PENDING_TRELLO_COMMENT[str(user_id)] = pending
-    _save_pending_trello_comment()
 
+def _clear_pending_confidence_clarify(uid_key: str) -> None:
+    with _lock_for(uid_key, _PENDING_CONFIDENCE_CLARIFY_LOCKS):
+        _PENDING_CONFIDENCE_CLARIFY.pop(uid_key, None)
+    _save_pending_confidence_clarify(uid_key)
 
-def _set_pending_trello_dispatch(user_id: int, pending: Dict[str, Any]) -> None:
-    with _PENDING_TRELLO_DISPATCH_LOCK:
-        _PENDING_TRELLO_DISPATCH[str(user_id)] = pending
-    _save_pending_trello_dispatch()
 
+async def _run_guard_flow(handler: Any, *args: Any) -> tuple:
+    """Run one deterministic guard flow, returning (reply, exception)."""
+    try:
+        return await handler(*args), None
+    except Exception as exc:  # noqa: BLE001
+        return None, exc
+
+
+# Flow hooks that may persist follow-up state from a tool result, in priority
+# order; the first one that returns a reply ends the turn with it.
+_TOOL_RESULT_STATE_STORERS = (
+    maybe_store_calendar_cancel_state_from_tool_result,
+    maybe_store_calendar_note_state_from_tool_result,
+    maybe_store_gmail_send_state_from_tool_result,
+)
+
+# Exact replies (stripped, lowercased) that confirm or cancel a pending action.
+_CONFIRM_TEXTS = frozenset({"yes", "proceed"})
+_CANCEL_TEXTS = frozenset({"cancel"})
+
+# First whitespace-delimited token of a tool result message that is an http(s) URL.
+_URL_RE = re.compile(r"(?<!\S)https?://\S+")
+# Any http(s) scheme anywhere in the text, found in a single scan.
+_URL_SCHEME_RE = re.compile(r"https?://")
+
+# Trello dispatch arguments a resumed turn may fill in from the user's reply.
+_TRELLO_AWAITING_FIELDS = frozenset({"board_name", "card_name", "title", "list_name", "to_list_name"})
+
+# "add note", "add a note", "add comment", "add a comment", "comment on" and
+# "leave a comment", matched in one pass over the lowercased message.
+_TRELLO_COMMENT_INTENT_RE = re.compile(r"add (?:a )?(?:note|comment)|comment on|leave a comment")
+
+
+# Returned by _resume_tool when the tool raised; the failure is already logged.
+_RESUME_FAILED = object()
+
+
+async def _resume_tool(
+    user_id: int,
+    uid_key: str,
+    tool_name: str,
+    args: Dict[str, Any],
+    request_id: str | None,
+    clear_pending: Callable[[str], None],
+    error_event: str,
+) -> Any:
+    """Run the tool for a resumed pending request, then clear that request.
+
+    The pending entry is cleared whether or not the tool succeeds. On failure
+    the error is logged under `error_event` and _RESUME_FAILED is returned.
+    """
+    try:
+        tool_result = await run_tool(tool_name, args, user_id)
+    except Exception as exc:  # noqa: BLE001
+        clear_pending(uid_key)
+        log_error(
+            error_event,
+            user_id=uid_key,
+            request_id=request_id,
+            tool=str(tool_name),
+            error=str(exc),
+        )
+        return _RESUME_FAILED
+
+    clear_pending(uid_key)
+    return tool_result
 
-def _set_pending_confidence_clarify(user_id: int, pending: Dict[str, Any]) -> None:
-    with _PENDING_CONFIDENCE_CLARIFY_LOCK:
-        _PENDING_CONFIDENCE_CLARIFY[str(user_id)] = pending
-    _save_pending_confidence_clarify()
 
+# Large tool outputs are truncated before going back to the LLM to avoid
+# context length issues; the full result is still used for logs and side
+# effects. The cap is applied to the encoded bytes.
+_MAX_TOOL_CONTENT_BYTES = 8000
+_TOOL_DUMPS_OPTS = orjson.OPT_NON_STR_KEYS
 
-def _clear_pending_tool_confirm(user_id: int) -> None:
-    with _PENDING_TOOL_CONFIRM_LOCK:
-        _PENDING_TOOL_CONFIRM.pop(str(user_id), None)
-    _save_pending_tool_confirm()
 
+class _ContentLimitReached(Exception):
+    pass
 
-def _clear_pending_trello_comment(user_id: int) -> None:
-    with _PENDING_TRELLO_COMMENT_LOCK:
-        _PENDING_TRELLO_COMMENT.pop(str(user_id), None)
-    _save_pending_trello_comment()
 
+def _encode_bounded(obj: Any, buf: bytearray, limit: int) -> None:
+    """Append the JSON encoding of obj to buf, stopping once it exceeds limit.
 
-def _clear_pending_trello_dispatch(user_id: int) -> None:
-    with _PENDING_TRELLO_DISPATCH_LOCK:
-        _PENDING_TRELLO_DISPATCH.pop(str(user_id), None)
-    _save_pending_trello_dispatch()
+    Containers are walked so that a large result is only encoded up to the
+    cap; leaves go through orjson. The bytes written are always a prefix of
+    orjson.dumps(obj).
+    """
+    if isinstance(obj, dict):
+        buf += b"{"
+        for i, (key, value) in enumerate(obj.items()):
+            if i:
+                buf += b","
+            if (value and isinstance(value, (dict, list, tuple))) or (
+                isinstance(value, str) and len(value) > limit
+            ):
+                # '{"key":null}' -> '"key":', letting orjson encode the key.
+                buf += orjson.dumps({key: None}, option=_TOOL_DUMPS_OPTS)[1:-5]
+                _encode_bounded(value, buf, limit)
+            else:
+                buf += orjson.dumps({key: value}, option=_TOOL_DUMPS_OPTS)[1:-1]
+                if len(buf) > limit:
+                    raise _ContentLimitReached
+        buf += b"}"
+    elif isinstance(obj, (list, tuple)):
+        buf += b"["
+        for i, item in enumerate(obj):
+            if i:
+                buf += b","
+            _encode_bounded(item, buf, limit)
+        buf += b"]"
+    elif isinstance(obj, str) and len(obj) > limit:
+        # Any limit + 1 characters encode to more than limit bytes, so the
+        # rest of the string can never make it into the output.
+        buf += orjson.dumps(obj[: limit + 1])
+    else:
+        buf += orjson.dumps(obj, option=_TOOL_DUMPS_OPTS)
+    if len(buf) > limit:
+        raise _ContentLimitReached
+
+
+def _bounded_dumps(obj: Any, limit: int = _MAX_TOOL_CONTENT_BYTES) -> str:
+    """Return obj as JSON, truncated to limit bytes with a "...[truncated]" marker."""
+    buf = bytearray()
+    try:
+        _encode_bounded(obj, buf, limit)
+    except _ContentLimitReached:
+        # A cut inside a multi-byte character drops that partial character.
+        return buf[:limit].decode(errors="ignore") + "...[truncated]"
+    return buf.decode()
+
+
+def _reroute_keys(*specs: str) -> tuple:
+    """Turn "key" / "src->dst" specs into (source, target) pairs."""
+    return tuple(tuple(spec.split("->")) if "->" in spec else (spec, spec) for spec in specs)
+
+
+# Low-level Trello tools the model sometimes picks are routed through
+# trello_dispatch: tool -> (action, required keys, optional keys). Required
+# keys fall back to "" when missing or empty; optional keys are copied only
+# when set.
+_TRELLO_REROUTE: Dict[str, tuple] = {
+    "trello_update_card": ("update", _reroute_keys("card_id"), _reroute_keys("fields")),
+    "trello_move_card": ("move", _reroute_keys("card_id", "list_id->to_list_id"), _reroute_keys("board_id")),
+    "trello_archive_card": (
+        "archive",
+        (),
+        _reroute_keys("card_id", "card_name", "board_id", "board_name", "archive", "confirm"),
+    ),
+    "trello_delete_task": ("delete", (), _reroute_keys("card_id", "card_name", "board_id", "board_name", "confirm")),
+    "trello_delete_card": ("delete", _reroute_keys("card_id"), ()),
+}
+_TRELLO_COMMENT_REROUTE = ("comment", (), _reroute_keys("card_id", "card_name", "board_id", "board_name"))
+
+
+def _reroute_trello_args(spec: tuple, args: Dict[str, Any]) -> Dict[str, Any]:
+    action, required, optional = spec
+    rerouted: Dict[str, Any] = {"action": action}
+    for src, dst in required:
+        rerouted[dst] = args.get(src) or ""
+    for src, dst in optional:
+        value = args.get(src)
+        if value is not None:
+            rerouted[dst] = value
+    return rerouted
+
+
+def _response_cache_key(uid_key: str, message: str) -> tuple:
+    return (uid_key, hashlib.blake2b(message.strip().encode(), digest_size=16).digest())
+
+
+def _cached_response(key: tuple) -> Optional[str]:
+    entry = _RESPONSE_CACHE.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.monotonic():
+        _RESPONSE_CACHE.pop(key, None)
+        return None
+    return entry[1]
+
+
+def _store_response(key: tuple, reply: str) -> None:
+    now = time.monotonic()
+    # Insertion order matches expiry order because the TTL is fixed, so
+    # expired and over-capacity entries are all at the front.
+    _RESPONSE_CACHE.pop(key, None)
+    while _RESPONSE_CACHE:
+        oldest = next(iter(_RESPONSE_CACHE))
+        if _RESPONSE_CACHE[oldest][0] > now and len(_RESPONSE_CACHE) < _RESPONSE_CACHE_MAX:
+            break
+        del _RESPONSE_CACHE[oldest]
+    _RESPONSE_CACHE[key] = (now + _RESPONSE_CACHE_TTL, reply)
+
+
+# Tools that skip the confidence check: cheap, safe ones, and trello_dispatch,
+# which asks for any missing detail itself via "dispatch_required".
+_CONFIDENCE_EXEMPT_TOOLS = frozenset(
+    {"get_current_utc_time", "echo", "parse_human_time_expression", "trello_dispatch"}
+)
+
+# Tools whose successful result carries a link that is returned to the user as-is.
+_LINK_REPLY_TOOLS = frozenset(
+    {
+        "trello_get_card_link",
+        "trello_find_card_by_name",
+        "trello_create_card",
+        "trello_create_task",
+    }
+)
+
+
+def _prepare_tool_call(
+    call: Dict[str, Any],
+    index: int,
+    message: str,
+    looks_like_trello_comment_intent: bool,
+) -> tuple:
+    """Return (tool_id, tool_name, tool_args, raw_arguments) for an LLM tool call.
 
+    Low-level Trello tools are rerouted through trello_dispatch. The model's
+    own argument string is echoed back unless the call was rerouted.
+    """
+    tool_id = call.get("id", f"tool-call-{index}")
+    tool_name = call.get("name", "")
+    tool_args = call.get("arguments") or {}
+
+    original_tool_name = tool_name
+    original_tool_args = tool_args
+
+    # Special-case: user intent looks like a comment, but the model chose update.
+    # Force the Trello comment endpoint.
+    if looks_like_trello_comment_intent and original_tool_name == "trello_update_card" and isinstance(original_tool_args, dict):
+        tool_args = _reroute_trello_args(_TRELLO_COMMENT_REROUTE, original_tool_args)
+        note_text = _extract_note_text(message)
+        if note_text:
+            tool_args["comment_text"] = note_text
+        tool_name = "trello_dispatch"
+
+    # General Trello robustness: route low-level Trello tools into trello_dispatch.
+    elif original_tool_name in _TRELLO_REROUTE and isinstance(original_tool_args, dict):
+        tool_args = _reroute_trello_args(_TRELLO_REROUTE[original_tool_name], original_tool_args)
+        tool_name = "trello_dispatch"
+
+    raw_arguments = call.get("raw_arguments")
+    if tool_args is not original_tool_args or not isinstance(raw_arguments, str):
+        raw_arguments = orjson.dumps(tool_args).decode()
+    return tool_id, tool_name, tool_args, raw_arguments
+
+
+def _tool_result_direct_reply(uid_key: str, tool_name: str, tool_result: Any) -> Optional[str]:
+    """Return a reply that ends the turn for this tool result, or None to continue.
+
+    Results asking for a comment or a confirmation park the call in pending
+    state; successful link lookups are answered with the link directly.
+    """
+    if not isinstance(tool_result, dict):
+        return None
 
-def _clear_pending_confidence_clarify(user_id: int) -> None:
-    with _PENDING_CONFIDENCE_CLARIFY_LOCK:
-        _PENDING_CONFIDENCE_CLARIFY.pop(str(user_id), None)
-    _save_pending_confidence_clarify()
+    status = tool_result.get("status")
+    if status == "comment_required":
+        msg = _extract_message(tool_result)
+        data = tool_result.get("data")
+        if isinstance(data, dict):
+            _set_pending_trello_comment(
+                uid_key,
+                {
+                    "tool_args": data,
+                    "message": msg or "",
+                },
+            )
+        return msg or "What note should I add to that Trello task?"
+
+    if status == "confirmation_required":
+        msg = _extract_message(tool_result)
+        data = tool_result.get("data")
+        if isinstance(data, dict):
+            _set_pending_tool_confirm(
+                uid_key,
+                {
+                    "tool_name": tool_name,
+                    "tool_args": data,
+                    "message": msg or "",
+                },
+            )
+        return msg or "Please confirm by replying YES or PROCEED, or say CANCEL."
 
+    if tool_result.get("success") is True and tool_name in _LINK_REPLY_TOOLS:
+        url = _extract_tool_url(tool_result)
+        if url:
+            msg = tool_result.get("message")
+            if isinstance(msg, str) and _URL_SCHEME_RE.search(msg) is not None:
+                return msg.strip()
 
-def _is_confirm_text(text: str) -> bool:
-    t = (text or "").strip().lower()
-    return t in {"yes", "proceed"}
+            card_name = None
+            data = tool_result.get("data")
+            if isinstance(data, dict) and isinstance(data.get("name"), str):
+                card_name = data.get("name")
 
+            if isinstance(card_name, str) and card_name.strip():
+                return f"Here is the link to '{card_name.strip()}': {url}"
+            return f"Here is the link: {url}"
 
-def _is_cancel_text(text: str) -> bool:
-    t = (text or "").strip().lower()
-    return t in {"cancel"}
+    return None
+
+
+# Sent to the model in place of a second result that needed the user's input
+# in the same turn; only the first such call is parked.
+_DEFERRED_TOOL_RESULT = {
+    "success": False,
+    "status": "deferred",
+    "message": "Not run: another action in this turn is waiting for the user's reply. Ask again after it is answered.",
+}
+
+
+def _needs_user_input(tool_result: Any) -> bool:
+    """True for results that park the call until the user replies."""
+    return isinstance(tool_result, dict) and tool_result.get("status") in ("comment_required", "confirmation_required")
+
+
+def _tool_error_result(uid_key: str, request_id: str, tool_name: str, exc: BaseException) -> Dict[str, Any]:
+    """Log a failed tool call and return the error result reported to the model."""
+    logger.error("Error while running tool %s: %r", tool_name, exc)
+    log_error(
+        "Tool execution failed",
+        user_id=uid_key,
+        request_id=request_id,
+        tool=tool_name,
+        error=str(exc),
+    )
+    return {
+        "success": False,
+        "error": "TOOL_EXECUTION_FAILED",
+        "message": f"The {tool_name} call failed before completing.",
+    }
+
+
+def _index_tool_schemas(tool_schemas: Any) -> Dict[str, Dict[str, Any]]:
+    """Map function name -> schema; the first schema for a name wins."""
+    by_name: Dict[str, Dict[str, Any]] = {}
+    if isinstance(tool_schemas, list):
+        for schema in tool_schemas:
+            fn = schema.get("function") if isinstance(schema, dict) else None
+            name = fn.get("name") if isinstance(fn, dict) else None
+            if isinstance(name, str):
+                by_name.setdefault(name, schema)
+    return by_name
+
+
+def _extract_message(result: Any) -> Optional[str]:
+    """Return the stripped "message" of a result dict, or None if empty."""
+    if isinstance(result, dict):
+        msg = result.get("message")
+        if isinstance(msg, str):
+            return msg.strip() or None
+    return None
+
+
+def _reply_from_tool_result(
+    tool_result: Any,
+    uid_key: str,
+    message: str,
+    request_id: str | None,
+) -> str:
+    """Return the tool's message as the reply, recording the turn in memory."""
+    if final_text := _extract_message(tool_result):
+        _spawn_memory_update(
+            user_id_str=uid_key,
+            message=message,
+            final_text=final_text,
+            request_id=request_id,
+        )
+        return final_text
+    return "Done."
+
+
+@lru_cache(maxsize=512)
+def _extract_note_text(raw: str) -> Optional[str]:
+    text = (raw or "").strip()
+    if not text:
+        return None
+    if ":" in text:
+        after = text.split(":", 1)[1].strip()
+        if after:
+            return after
+    lowered = text.lower()
+    for token in ("note:", "comment:"):
+        idx = lowered.find(token)
+        if idx != -1:
+            after = text[idx + len(token) :].strip()
+            if after:
+                return after
+    return None
 
 
 def _extract_tool_url(tool_result: Any) -> Optional[str]:
@@ -285,9 +795,9 @@ def _extract_tool_url(tool_result: Any) -> Optional[str]:
 
     msg = tool_result.get("message")
     if isinstance(msg, str):
-        for part in msg.split():
-            if part.startswith("https://") or part.startswith("http://"):
-                return part.strip()
+        match = _URL_RE.search(msg)
+        if match is not None:
+            return match.group(0)
 
     return None
 
@@ -299,58 +809,43 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
     and returns the final natural-language reply.
     """
 
-    log_info("Agent started", user_id=str(user_id), request_id=request_id)
+    uid_key = str(user_id)
+    msg_norm = (message or "").strip().lower()
 
-    pending_confirm = _get_pending_tool_confirm(user_id)
+    log_info("Agent started", user_id=uid_key, request_id=request_id)
+
+    pending_confirm = _get_pending_tool_confirm(uid_key)
     if pending_confirm:
-        if _is_cancel_text(message):
-            _clear_pending_tool_confirm(user_id)
+        if msg_norm in _CANCEL_TEXTS:
+            _clear_pending_tool_confirm(uid_key)
             return "Cancelled."
-        if _is_confirm_text(message):
+        if msg_norm in _CONFIRM_TEXTS:
             tool_name = pending_confirm.get("tool_name") or ""
             tool_args = pending_confirm.get("tool_args")
             if not isinstance(tool_name, str) or not tool_name.strip() or not isinstance(tool_args, dict):
-                _clear_pending_tool_confirm(user_id)
+                _clear_pending_tool_confirm(uid_key)
                 return "No pending confirmation found. Please start again."
             tool_args = dict(tool_args)
             tool_args["confirm"] = True
-            try:
-                tool_result = await run_tool(tool_name.strip(), tool_args, user_id)
-            except Exception as exc:  # noqa: BLE001
-                _clear_pending_tool_confirm(user_id)
-                log_error(
-                    "pending_tool_confirmation_execution_failed",
-                    user_id=str(user_id),
-                    request_id=request_id,
-                    tool=tool_name,
-                    error=str(exc),
-                )
+            tool_result = await _resume_tool(
+                user_id,
+                uid_key,
+                tool_name.strip(),
+                tool_args,
+                request_id,
+                _clear_pending_tool_confirm,
+                "pending_tool_confirmation_execution_failed",
+            )
+            if tool_result is _RESUME_FAILED:
                 return "Sorry, I ran into an error while executing that confirmed action."
+            return _reply_from_tool_result(tool_result, uid_key, message, request_id)
 
-            _clear_pending_tool_confirm(user_id)
-            if isinstance(tool_result, dict):
-                msg = tool_result.get("message")
-                if isinstance(msg, str) and msg.strip():
-                    asyncio.create_task(
-                        _update_memory_background(
-                            user_id=user_id,
-                            message=message,
-                            final_text=msg.strip(),
-                            request_id=request_id,
-                        )
-                    )
-                    return msg.strip()
-            return "Done."
-
-        msg = pending_confirm.get("message")
-        if isinstance(msg, str) and msg.strip():
-            return msg.strip()
-        return "Please confirm by replying YES or PROCEED, or say CANCEL."
+        return _extract_message(pending_confirm) or "Please confirm by replying YES or PROCEED, or say CANCEL."
 
-    pending_clarify = _get_pending_confidence_clarify(user_id)
+    pending_clarify = _get_pending_confidence_clarify(uid_key)
     if pending_clarify:
-        if _is_cancel_text(message):
-            _clear_pending_confidence_clarify(user_id)
+        if msg_norm in _CANCEL_TEXTS:
+            _clear_pending_confidence_clarify(uid_key)
             return "Cancelled."
 
         tool_name = str(pending_clarify.get("tool_name") or "").strip()
@@ -359,11 +854,11 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
         one_shot = bool(pending_clarify.get("one_shot") is True)
 
         if not tool_name or not isinstance(tool_args, dict) or not awaiting:
-            _clear_pending_confidence_clarify(user_id)
+            _clear_pending_confidence_clarify(uid_key)
             return "No pending request found. Please start again."
 
         if awaiting.strip().lower() == "details":
-            _clear_pending_confidence_clarify(user_id)
+            _clear_pending_confidence_clarify(uid_key)
             return "Please repeat the request with the missing detail (for Trello: include the list name and, if needed, the board name)."
 
         args = dict(tool_args)
@@ -371,10 +866,10 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
         if user_value:
             args[awaiting] = user_value
 
-        assessment = compute_tool_confidence(tool_name=tool_name, tool_args=args, tool_schema=None)
+        assessment = cached_tool_confidence(tool_name=tool_name, tool_args=args, tool_schema=None)
         if not one_shot and assessment.score < 70:
             _set_pending_confidence_clarify(
-                user_id,
+                uid_key,
                 {
                     "tool_name": tool_name,
                     "tool_args": args,
@@ -384,67 +879,37 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
             )
             if isinstance(assessment.question, str) and assessment.question.strip():
                 return assessment.question.strip()
-            _clear_pending_confidence_clarify(user_id)
+            _clear_pending_confidence_clarify(uid_key)
             return "Please provide one more specific detail so I can proceed."
 
         confidence_score = assessment.score
-        try:
-            tool_result = await run_tool(tool_name, args, user_id)
-        except Exception as exc:  # noqa: BLE001
-            _clear_pending_confidence_clarify(user_id)
-            log_error(
-                "confidence_clarify_execution_failed",
-                user_id=str(user_id),
-                request_id=request_id,
-                tool=tool_name,
-                error=str(exc),
-            )
-            return "Sorry, I ran into an error while executing that request."
-
-        _clear_pending_confidence_clarify(user_id)
-
-        cancel_state_msg = maybe_store_calendar_cancel_state_from_tool_result(
-            user_id=user_id,
-            tool_name=tool_name,
-            tool_result=tool_result,
+        tool_result = await _resume_tool(
+            user_id,
+            uid_key,
+            tool_name,
+            args,
+            request_id,
+            _clear_pending_confidence_clarify,
+            "confidence_clarify_execution_failed",
         )
-        if isinstance(cancel_state_msg, str) and cancel_state_msg.strip():
-            return cancel_state_msg.strip()
-
-        note_state_msg = maybe_store_calendar_note_state_from_tool_result(
-            user_id=user_id,
-            tool_name=tool_name,
-            tool_result=tool_result,
-        )
-        if isinstance(note_state_msg, str) and note_state_msg.strip():
-            return note_state_msg.strip()
+        if tool_result is _RESUME_FAILED:
+            return "Sorry, I ran into an error while executing that request."
 
-        send_state_msg = maybe_store_gmail_send_state_from_tool_result(
-            user_id=user_id,
-            tool_name=tool_name,
-            tool_result=tool_result,
-        )
-        if isinstance(send_state_msg, str) and send_state_msg.strip():
-            return send_state_msg.strip()
+        for store_state in _TOOL_RESULT_STATE_STORERS:
+            state_msg = store_state(
+                user_id=user_id,
+                tool_name=tool_name,
+                tool_result=tool_result,
+            )
+            if isinstance(state_msg, str) and state_msg.strip():
+                return state_msg.strip()
 
-        if isinstance(tool_result, dict):
-            msg = tool_result.get("message")
-            if isinstance(msg, str) and msg.strip():
-                asyncio.create_task(
-                    _update_memory_background(
-                        user_id=user_id,
-                        message=message,
-                        final_text=msg.strip(),
-                        request_id=request_id,
-                    )
-                )
-                return msg.strip()
-        return "Done."
+        return _reply_from_tool_result(tool_result, uid_key, message, request_id)
 
-    pending_dispatch = _get_pending_trello_dispatch(user_id)
+    pending_dispatch = _get_pending_trello_dispatch(uid_key)
     if pending_dispatch:
-        if _is_cancel_text(message):
-            _clear_pending_trello_dispatch(user_id)
+        if msg_norm in _CANCEL_TEXTS:
+            _clear_pending_trello_dispatch(uid_key)
             return "Cancelled."
 
         pending_tool_name = pending_dispatch.get("tool_name")
@@ -454,286 +919,170 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
         tool_args = pending_dispatch.get("tool_args")
         awaiting = pending_dispatch.get("awaiting")
         if not isinstance(tool_args, dict) or not isinstance(awaiting, str) or not awaiting.strip():
-            _clear_pending_trello_dispatch(user_id)
+            _clear_pending_trello_dispatch(uid_key)
             return "No pending Trello request found. Please start again."
 
         args = dict(tool_args)
         user_value = str(message or "").strip()
 
-        if awaiting.strip() == "board_name":
-            args["board_name"] = user_value
-        elif awaiting.strip() == "card_name":
-            args["card_name"] = user_value
-        elif awaiting.strip() == "title":
-            args["title"] = user_value
-        elif awaiting.strip() == "list_name":
-            args["list_name"] = user_value
-        elif awaiting.strip() == "to_list_name":
-            args["to_list_name"] = user_value
-        else:
-            _clear_pending_trello_dispatch(user_id)
+        awaiting = awaiting.strip()
+        if awaiting not in _TRELLO_AWAITING_FIELDS:
+            _clear_pending_trello_dispatch(uid_key)
             return "No pending Trello request found. Please start again."
-
-        try:
-            tool_result = await run_tool(pending_tool_name, args, user_id)
-        except Exception as exc:  # noqa: BLE001
-            _clear_pending_trello_dispatch(user_id)
-            log_error(
-                "pending_trello_dispatch_execution_failed",
-                user_id=str(user_id),
-                request_id=request_id,
-                tool=str(pending_tool_name),
-                error=str(exc),
-            )
+        args[awaiting] = user_value
+
+        tool_result = await _resume_tool(
+            user_id,
+            uid_key,
+            pending_tool_name,
+            args,
+            request_id,
+            _clear_pending_trello_dispatch,
+            "pending_trello_dispatch_execution_failed",
+        )
+        if tool_result is _RESUME_FAILED:
             return "Sorry, I ran into an error while continuing that Trello request."
 
-        _clear_pending_trello_dispatch(user_id)
-
-        if isinstance(tool_result, dict) and tool_result.get("status") == "dispatch_required":
-            msg = tool_result.get("message")
+        status = tool_result.get("status") if isinstance(tool_result, dict) else None
+        if status == "dispatch_required":
+            msg = _extract_message(tool_result)
             data = tool_result.get("data")
             if isinstance(data, dict) and isinstance(data.get("tool_args"), dict) and isinstance(data.get("awaiting"), str):
                 _set_pending_trello_dispatch(
-                    user_id,
+                    uid_key,
                     {
                         "tool_name": pending_tool_name,
                         "tool_args": data.get("tool_args"),
                         "awaiting": data.get("awaiting"),
-                        "message": str(msg or "").strip(),
+                        "message": msg or "",
                     },
                 )
-            if isinstance(msg, str) and msg.strip():
-                return msg.strip()
-            return "I need one more detail to complete that Trello request."
+            return msg or "I need one more detail to complete that Trello request."
 
-        if isinstance(tool_result, dict) and tool_result.get("status") == "comment_required":
-            msg = tool_result.get("message")
+        if status == "comment_required":
+            msg = _extract_message(tool_result)
             data = tool_result.get("data")
             if isinstance(data, dict):
                 _set_pending_trello_comment(
-                    user_id,
+                    uid_key,
                     {
                         "tool_args": data,
-                        "message": str(msg or "").strip(),
+                        "message": msg or "",
                     },
                 )
-            if isinstance(msg, str) and msg.strip():
-                return msg.strip()
-            return "What note should I add to that Trello task?"
+            return msg or "What note should I add to that Trello task?"
 
-        if isinstance(tool_result, dict):
-            msg = tool_result.get("message")
-            if isinstance(msg, str) and msg.strip():
-                asyncio.create_task(
-                    _update_memory_background(
-                        user_id=user_id,
-                        message=message,
-                        final_text=msg.strip(),
-                        request_id=request_id,
-                    )
-                )
-                return msg.strip()
-        return "Done."
+        return _reply_from_tool_result(tool_result, uid_key, message, request_id)
 
-    pending_comment = _get_pending_trello_comment(user_id)
+    pending_comment = _get_pending_trello_comment(uid_key)
     if pending_comment:
-        if _is_cancel_text(message):
-            _clear_pending_trello_comment(user_id)
+        if msg_norm in _CANCEL_TEXTS:
+            _clear_pending_trello_comment(uid_key)
             return "Cancelled."
         tool_args = pending_comment.get("tool_args")
         if not isinstance(tool_args, dict):
-            _clear_pending_trello_comment(user_id)
+            _clear_pending_trello_comment(uid_key)
             return "No pending comment found. Please start again."
         args = dict(tool_args)
         args["comment_text"] = str(message or "").strip()
-        try:
-            tool_result = await run_tool("trello_add_comment_task", args, user_id)
-        except Exception as exc:  # noqa: BLE001
-            _clear_pending_trello_comment(user_id)
-            log_error(
-                "pending_trello_comment_execution_failed",
-                user_id=str(user_id),
-                request_id=request_id,
-                tool="trello_add_comment_task",
-                error=str(exc),
-            )
+        tool_result = await _resume_tool(
+            user_id,
+            uid_key,
+            "trello_add_comment_task",
+            args,
+            request_id,
+            _clear_pending_trello_comment,
+            "pending_trello_comment_execution_failed",
+        )
+        if tool_result is _RESUME_FAILED:
             return "Sorry, I ran into an error while adding that Trello note."
-
-        _clear_pending_trello_comment(user_id)
-        if isinstance(tool_result, dict):
-            msg = tool_result.get("message")
-            if isinstance(msg, str) and msg.strip():
-                asyncio.create_task(
-                    _update_memory_background(
-                        user_id=user_id,
-                        message=message,
-                        final_text=msg.strip(),
-                        request_id=request_id,
-                    )
-                )
-                return msg.strip()
-        return "Done."
-
-    # Deterministic guard for destructive Gmail delete flows.
-    # This enforces a strict two-phase model (DRY_RUN -> explicit confirmation -> EXECUTE)
-    # and avoids LLM loops/crashes for destructive requests.
-    try:
-        delete_flow_reply = await handle_gmail_delete_turn(user_id, message)
-    except Exception as exc:  # noqa: BLE001
-        log_error(
+        return _reply_from_tool_result(tool_result, uid_key, message, request_id)
+
+    # Deterministic guard flows, in priority order. Each entry is
+    # (log event, handler, args, reply on failure); a None failure reply means
+    # the error is logged and the next guard gets the turn.
+    # - Gmail delete: strict two-phase model (DRY_RUN -> explicit confirmation
+    #   -> EXECUTE) that avoids LLM loops/crashes for destructive requests.
+    # - Gmail mark-as-read: same two-phase model, so follow-up confirmations
+    #   don't make the LLM re-call tools with missing arguments.
+    # - Gmail spam clean: only operates on messages (users.messages.list +
+    #   users.messages.batchDelete).
+    # - Calendar cancel: persists confirmation state across turns so the LLM
+    #   doesn't loop asking for the same parameters.
+    guard_flows = (
+        (
             "gmail_delete_flow_failed",
-            user_id=str(user_id),
-            request_id=request_id,
-            error=str(exc),
-        )
-        return "Error during Gmail delete handling. Nothing was changed."
-
-    if isinstance(delete_flow_reply, str) and delete_flow_reply.strip():
-        asyncio.create_task(_update_memory_background(
-            user_id=user_id,
-            message=message,
-            final_text=delete_flow_reply.strip(),
-            request_id=request_id,
-        ))
-        return delete_flow_reply.strip()
-
-    # Deterministic guard for Gmail mark-as-read bulk flows.
-    # This enforces a strict two-phase model (DRY_RUN -> explicit confirmation -> EXECUTE)
-    # to avoid LLM re-calling tools with missing arguments on follow-up confirmations.
-    try:
-        mark_read_reply = await handle_gmail_mark_read_turn(user_id, message)
-    except Exception as exc:  # noqa: BLE001
-        log_error(
+            handle_gmail_delete_turn,
+            (user_id, message),
+            "Error during Gmail delete handling. Nothing was changed.",
+        ),
+        (
             "gmail_mark_read_flow_failed",
-            user_id=str(user_id),
-            request_id=request_id,
-            error=str(exc),
-        )
-        return "Error during Gmail mark-as-read handling. Nothing was changed."
-
-    if isinstance(mark_read_reply, str) and mark_read_reply.strip():
-        asyncio.create_task(
-            _update_memory_background(
-                user_id=user_id,
-                message=message,
-                final_text=mark_read_reply.strip(),
-                request_id=request_id,
-            )
-        )
-        return mark_read_reply.strip()
-
-    # Deterministic guard for Gmail spam cleaning.
-    # Must only operate on messages (users.messages.list + users.messages.batchDelete).
-    try:
-        spam_clean_reply = await handle_gmail_spam_clean_turn(user_id, message)
-    except Exception as exc:  # noqa: BLE001
-        log_error(
+            handle_gmail_mark_read_turn,
+            (user_id, message),
+            "Error during Gmail mark-as-read handling. Nothing was changed.",
+        ),
+        (
             "gmail_spam_clean_flow_failed",
-            user_id=str(user_id),
-            request_id=request_id,
-            error=str(exc),
-        )
-        return "Error during Gmail spam cleaning. Nothing was changed."
-
-    if isinstance(spam_clean_reply, dict):
-        if spam_clean_reply.get("status") == "completed":
-            if spam_clean_reply.get("movedCount") is not None:
-                moved = int(spam_clean_reply.get("movedCount") or 0)
-                final_text = f"Moved {moved} spam emails to Trash."
-            else:
-                deleted = int(spam_clean_reply.get("deletedCount") or 0)
-                final_text = f"Completed. Permanently deleted {deleted} message(s)."
-            asyncio.create_task(
-                _update_memory_background(
-                    user_id=user_id,
-                    message=message,
-                    final_text=final_text,
-                    request_id=request_id,
-                )
-            )
-            return final_text
-
-        return "Error during Gmail spam cleaning. Nothing was changed."
+            handle_gmail_spam_clean_turn,
+            (user_id, message),
+            "Error during Gmail spam cleaning. Nothing was changed.",
+        ),
+        ("gmail_send_flow_failed", handle_gmail_send_turn, (user_id, message, run_tool), None),
+        ("calendar_note_flow_failed", handle_calendar_note_turn, (user_id, message), None),
+        ("calendar_cancel_flow_failed", handle_calendar_cancel_turn, (user_id, message), None),
+    )
 
-    if isinstance(spam_clean_reply, str) and spam_clean_reply.strip():
-        asyncio.create_task(
-            _update_memory_background(
-                user_id=user_id,
-                message=message,
-                final_text=spam_clean_reply.strip(),
-                request_id=request_id,
-            )
+    outcomes = None
+    if _PARALLEL_GUARD_FLOWS:
+        outcomes = await asyncio.gather(
+            *(_run_guard_flow(handler, *args) for _, handler, args, _ in guard_flows)
         )
-        return spam_clean_reply.strip()
 
-    try:
-        send_reply = await handle_gmail_send_turn(user_id, message, run_tool)
-    except Exception as exc:  # noqa: BLE001
-        log_error(
-            "gmail_send_flow_failed",
-            user_id=str(user_id),
-            request_id=request_id,
-            error=str(exc),
-        )
-        send_reply = None
+    for index, (event, handler, args, error_reply) in enumerate(guard_flows):
+        if outcomes is not None:
+            guard_reply, guard_exc = outcomes[index]
+        else:
+            guard_reply, guard_exc = await _run_guard_flow(handler, *args)
 
-    if isinstance(send_reply, str) and send_reply.strip():
-        asyncio.create_task(
-            _update_memory_background(
-                user_id=user_id,
-                message=message,
-                final_text=send_reply.strip(),
+        if guard_exc is not None:
+            log_error(
+                event,
+                user_id=uid_key,
                 request_id=request_id,
+                error=str(guard_exc),
             )
-        )
-        return send_reply.strip()
-
-    try:
-        note_reply = await handle_calendar_note_turn(user_id, message)
-    except Exception as exc:  # noqa: BLE001
-        log_error(
-            "calendar_note_flow_failed",
-            user_id=str(user_id),
-            request_id=request_id,
-            error=str(exc),
-        )
-        note_reply = None
+            if error_reply is not None:
+                return error_reply
+            continue
 
-    if isinstance(note_reply, str) and note_reply.strip():
-        asyncio.create_task(
-            _update_memory_background(
-                user_id=user_id,
-                message=message,
-                final_text=note_reply.strip(),
-                request_id=request_id,
+        if isinstance(guard_reply, dict):
+            # Only the spam-clean flow returns a structured result.
+            if guard_reply.get("status") != "completed":
+                return "Error during Gmail spam cleaning. Nothing was changed."
+            moved = guard_reply.get("movedCount")
+            guard_reply = (
+                f"Moved {int(moved or 0)} spam emails to Trash."
+                if moved is not None
+                else f"Completed. Permanently deleted {int(guard_reply.get('deletedCount') or 0)} message(s)."
             )
-        )
-        return note_reply.strip()
-
-    # Deterministic guard for calendar cancellations.
-    # This persists confirmation state across turns so the LLM doesn't loop asking
-    # for the same parameters.
-    try:
-        cancel_reply = await handle_calendar_cancel_turn(user_id, message)
-    except Exception as exc:  # noqa: BLE001
-        log_error(
-            "calendar_cancel_flow_failed",
-            user_id=str(user_id),
-            request_id=request_id,
-            error=str(exc),
-        )
-        cancel_reply = None
 
-    if isinstance(cancel_reply, str) and cancel_reply.strip():
-        asyncio.create_task(
-            _update_memory_background(
-                user_id=user_id,
+        if isinstance(guard_reply, str) and guard_reply.strip():
+            _spawn_memory_update(
+                user_id_str=uid_key,
                 message=message,
-                final_text=cancel_reply.strip(),
+                final_text=guard_reply.strip(),
                 request_id=request_id,
             )
-        )
-        return cancel_reply.strip()
+            return guard_reply.strip()
+
+    response_key = None
+    if _RESPONSE_CACHE_TTL > 0:
+        response_key = _response_cache_key(uid_key, message or "")
+        cached_reply = _cached_response(response_key)
+        if cached_reply is not None:
+            log_info("Agent reply served from cache", user_id=uid_key, request_id=request_id)
+            return cached_reply
 
     try:
         ctx = await build_context(user_id, message)
@@ -741,7 +1090,7 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
         logger.error("Failed to build context: %r", exc)
         log_error(
             "Failed to build context",
-            user_id=str(user_id),
+            user_id=uid_key,
             request_id=request_id,
             error=str(exc),
         )
@@ -749,53 +1098,31 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
 
     messages: List[Dict[str, Any]] = ctx["messages"]
     tool_schemas = ctx["tool_schemas"]
+    tool_schemas_by_name = _index_tool_schemas(tool_schemas)
 
-    log_info("Context built", user_id=str(user_id), request_id=request_id)
+    log_info("Context built", user_id=uid_key, request_id=request_id)
 
     max_steps = 10
 
     last_time_parse_start: Optional[str] = None
 
-    msg_lower = (message or "").lower()
-    looks_like_trello_comment_intent = any(
-        phrase in msg_lower
-        for phrase in [
-            "add note",
-            "add a note",
-            "add comment",
-            "add a comment",
-            "comment on",
-            "leave a comment",
-        ]
-    )
+    msg_lower = msg_norm
+    looks_like_trello_comment_intent = _TRELLO_COMMENT_INTENT_RE.search(msg_lower) is not None
 
-    def _extract_note_text(raw: str) -> Optional[str]:
-        text = (raw or "").strip()
-        if not text:
-            return None
-        if ":" in text:
-            after = text.split(":", 1)[1].strip()
-            if after:
-                return after
-        lowered = text.lower()
-        for token in ["note:", "comment:"]:
-            idx = lowered.find(token)
-            if idx != -1:
-                after = text[idx + len(token) :].strip()
-                if after:
-                    return after
-        return None
+    # Cleared once a call is parked for the user's reply, so the model can only
+    # answer in text and cannot re-issue the parked call itself.
+    step_tools = tool_schemas
 
     for _step in range(max_steps):
-        log_info("Calling LLM", user_id=str(user_id), request_id=request_id)
-        llm_result = await call_llm(messages, tools=tool_schemas)
+        log_info("Calling LLM", user_id=uid_key, request_id=request_id)
+        llm_result = await call_llm(messages, tools=step_tools)
 
         result_type = llm_result.get("type")
         if result_type == "error":
             logger.error("LLM error: %s", llm_result.get("error"))
             log_error(
                 "LLM error",
-                user_id=str(user_id),
+                user_id=uid_key,
                 request_id=request_id,
                 error=str(llm_result.get("error")),
             )
@@ -805,17 +1132,19 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
             final_text = llm_result.get("content", "")
             if not final_text:
                 final_text = "I don't have a good answer for that yet."
+            elif response_key is not None and _step == 0:
+                _store_response(response_key, final_text)
 
             # Persist this turn into Supabase-backed memory and update the
             # long-term summary. Run in background for speed - don't block response.
-            asyncio.create_task(_update_memory_background(
-                user_id=user_id,
+            _spawn_memory_update(
+                user_id_str=uid_key,
                 message=message,
                 final_text=final_text,
-                request_id=request_id
-            ))
+                request_id=request_id,
+            )
 
-            log_info("Agent finished", user_id=str(user_id), request_id=request_id)
+            log_info("Agent finished", user_id=uid_key, request_id=request_id)
 
             return final_text
 
@@ -826,200 +1155,84 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
                 logger.warning("Tool result type without tool_calls payload")
                 return "Sorry, I could not understand the tool request."
 
-            # Handle only the first tool call for now.
-            call = tool_calls[0]
-            tool_id = call.get("id", "tool-call-0")
-            tool_name = call.get("name", "")
-            tool_args = call.get("arguments") or {}
-
-            original_tool_name = tool_name
-            original_tool_args = tool_args
-
-            # Special-case: user intent looks like a comment, but the model chose update.
-            # Force the Trello comment endpoint.
-            if looks_like_trello_comment_intent and original_tool_name == "trello_update_card" and isinstance(original_tool_args, dict):
-                note_text = _extract_note_text(message)
-                rerouted_args: Dict[str, Any] = {}
-                for k in ["card_id", "card_name", "board_id", "board_name"]:
-                    if k in original_tool_args and original_tool_args.get(k) is not None:
-                        rerouted_args[k] = original_tool_args.get(k)
-                if note_text:
-                    rerouted_args["comment_text"] = note_text
-                rerouted_args["action"] = "comment"
-                tool_name = "trello_dispatch"
-                tool_args = rerouted_args
-
-            # General Trello robustness: route low-level Trello tools into trello_dispatch.
-            elif original_tool_name in {
-                "trello_update_card",
-                "trello_move_card",
-                "trello_delete_task",
-                "trello_archive_card",
-                "trello_delete_card",
-            } and isinstance(original_tool_args, dict):
-                rerouted_args = {}
-                if original_tool_name == "trello_update_card":
-                    rerouted_args["action"] = "update"
-                    rerouted_args["card_id"] = original_tool_args.get("card_id") or ""
-                    rerouted_args["fields"] = original_tool_args.get("fields")
-                elif original_tool_name == "trello_move_card":
-                    rerouted_args["action"] = "move"
-                    rerouted_args["card_id"] = original_tool_args.get("card_id") or ""
-                    rerouted_args["to_list_id"] = original_tool_args.get("list_id") or ""
-                    if original_tool_args.get("board_id"):
-                        rerouted_args["board_id"] = original_tool_args.get("board_id")
-                elif original_tool_name == "trello_archive_card":
-                    rerouted_args["action"] = "archive"
-                    for k in ["card_id", "card_name", "board_id", "board_name", "archive", "confirm"]:
-                        if k in original_tool_args and original_tool_args.get(k) is not None:
-                            rerouted_args[k] = original_tool_args.get(k)
-                elif original_tool_name == "trello_delete_task":
-                    rerouted_args["action"] = "delete"
-                    for k in ["card_id", "card_name", "board_id", "board_name", "confirm"]:
-                        if k in original_tool_args and original_tool_args.get(k) is not None:
-                            rerouted_args[k] = original_tool_args.get(k)
-                elif original_tool_name == "trello_delete_card":
-                    rerouted_args["action"] = "delete"
-                    rerouted_args["card_id"] = original_tool_args.get("card_id") or ""
-
-                tool_name = "trello_dispatch"
-                tool_args = rerouted_args
-
-            tool_schema = None
-            if isinstance(tool_schemas, list):
-                for s in tool_schemas:
-                    try:
-                        fn = s.get("function") if isinstance(s, dict) else None
-                        if isinstance(fn, dict) and fn.get("name") == tool_name:
-                            tool_schema = s
-                            break
-                    except Exception:
-                        continue
-
-            confidence_score = 100
-            if tool_name not in {"get_current_utc_time", "echo", "parse_human_time_expression"} and isinstance(tool_args, dict):
-                assessment = compute_tool_confidence(tool_name=tool_name, tool_args=tool_args, tool_schema=tool_schema)
+            prepared = [
+                _prepare_tool_call(call, index, message, looks_like_trello_comment_intent)
+                for index, call in enumerate(tool_calls)
+            ]
+
+            for _, tool_name, tool_args, _ in prepared:
+                if tool_name in _CONFIDENCE_EXEMPT_TOOLS or not isinstance(tool_args, dict):
+                    continue
+                assessment = cached_tool_confidence(
+                    tool_name=tool_name,
+                    tool_args=tool_args,
+                    tool_schema=tool_schemas_by_name.get(tool_name),
+                )
                 confidence_score = assessment.score
-                if (not isinstance(assessment.awaiting, str) or not assessment.awaiting.strip()) or (not isinstance(assessment.question, str) or not assessment.question.strip()):
+                awaiting = assessment.awaiting if isinstance(assessment.awaiting, str) else ""
+                question = assessment.question.strip() if isinstance(assessment.question, str) else ""
+                # Without something concrete to ask, proceed as if confident.
+                if not awaiting.strip() or not question:
                     confidence_score = 90
 
-                if confidence_score < 70 and tool_name != "trello_dispatch":
-                    awaiting = assessment.awaiting or ""
-                    question = (assessment.question or "").strip()
-                    if not awaiting or not question:
-                        confidence_score = 90
-                        awaiting = ""
-                        question = ""
-                    if confidence_score >= 90:
-                        awaiting = ""
-                        question = ""
-                    else:
-                        _set_pending_confidence_clarify(
-                            user_id,
-                            {
-                                "tool_name": tool_name,
-                                "tool_args": dict(tool_args),
-                                "awaiting": awaiting,
-                                "one_shot": False,
-                            },
-                        )
-                        return question
-
-                if 70 <= confidence_score <= 89 and tool_name != "trello_dispatch":
-                    awaiting = assessment.awaiting or ""
-                    question = (assessment.question or "").strip()
-                    if not awaiting or not question:
-                        confidence_score = 90
-                        awaiting = ""
-                        question = ""
-                    if confidence_score >= 90:
-                        awaiting = ""
-                        question = ""
-                    else:
-                        _set_pending_confidence_clarify(
-                            user_id,
-                            {
-                                "tool_name": tool_name,
-                                "tool_args": dict(tool_args),
-                                "awaiting": awaiting,
-                                "one_shot": True,
-                            },
-                        )
-                        return question
-
-            log_info(
-                "LLM requested tool",
-                user_id=str(user_id),
-                request_id=request_id,
-                tool_name=tool_name,
-            )
-
-            try:
-                tool_result = await run_tool(tool_name, tool_args, user_id=user_id)
-            except Exception as exc:  # noqa: BLE001
-                logger.error("Error while running tool %s: %r", tool_name, exc)
-                log_error(
-                    "Tool execution failed",
-                    user_id=str(user_id),
-                    request_id=request_id,
-                    tool=tool_name,
-                    error=str(exc),
-                )
-                return "Sorry, I ran into an error while executing a tool for you."
-
-            if isinstance(tool_result, dict) and tool_result.get("status") == "comment_required":
-                msg = tool_result.get("message")
-                data = tool_result.get("data")
-                if isinstance(data, dict):
-                    _set_pending_trello_comment(
-                        user_id,
-                        {
-                            "tool_args": data,
-                            "message": str(msg or "").strip(),
-                        },
-                    )
-                if isinstance(msg, str) and msg.strip():
-                    return msg.strip()
-                return "What note should I add to that Trello task?"
-
-            if isinstance(tool_result, dict) and tool_result.get("status") == "confirmation_required":
-                msg = tool_result.get("message")
-                data = tool_result.get("data")
-                if isinstance(data, dict):
-                    _set_pending_tool_confirm(
-                        user_id,
+                # Below 70 keeps asking until resolved; 70-89 asks once.
+                if confidence_score < 90:
+                    _set_pending_confidence_clarify(
+                        uid_key,
                         {
                             "tool_name": tool_name,
-                            "tool_args": data,
-                            "message": str(msg or "").strip(),
+                            "tool_args": tool_args,
+                            "awaiting": awaiting,
+                            "one_shot": confidence_score >= 70,
                         },
                     )
-                if isinstance(msg, str) and msg.strip():
-                    return msg.strip()
-                return "Please confirm by replying YES or PROCEED, or say CANCEL."
-
-            if isinstance(tool_result, dict) and tool_result.get("success") is True:
-                url = _extract_tool_url(tool_result)
-                if url and tool_name in {
-                    "trello_get_card_link",
-                    "trello_find_card_by_name",
-                    "trello_create_card",
-                    "trello_create_task",
-                }:
-                    msg = tool_result.get("message")
-                    if isinstance(msg, str) and ("https://" in msg or "http://" in msg):
-                        return msg.strip()
-
-                    card_name = None
-                    data = tool_result.get("data")
-                    if isinstance(data, dict) and isinstance(data.get("name"), str):
-                        card_name = data.get("name")
-
-                    if isinstance(card_name, str) and card_name.strip():
-                        return f"Here is the link to '{card_name.strip()}': {url}"
-                    return f"Here is the link: {url}"
-
-            # Append the tool call and its result to the conversation per
+                    return question
+
+            for _, tool_name, _, _ in prepared:
+                log_info(
+                    "LLM requested tool",
+                    user_id=uid_key,
+                    request_id=request_id,
+                    tool_name=tool_name,
+                )
+
+            # Calls from one LLM turn are independent, so they run together;
+            # results are handled in the order the model listed them.
+            tool_results = await asyncio.gather(
+                *(run_tool(tool_name, tool_args, user_id=user_id) for _, tool_name, tool_args, _ in prepared),
+                return_exceptions=True,
+            )
+
+            # A failed call becomes an error result for the model to explain;
+            # the other calls already ran, so their results are still reported.
+            tool_results = [
+                _tool_error_result(uid_key, request_id, tool_name, tool_result)
+                if isinstance(tool_result, BaseException)
+                else tool_result
+                for (_, tool_name, _, _), tool_result in zip(prepared, tool_results)
+            ]
+
+            if len(prepared) == 1:
+                reply = _tool_result_direct_reply(uid_key, prepared[0][1], tool_results[0])
+                if reply is not None:
+                    return reply
+            else:
+                # With several calls, a direct reply would hide the others'
+                # results, so everything goes back to the model. Only one call
+                # can be parked per user; later ones asking for a comment or a
+                # confirmation are reported as deferred instead.
+                parked = False
+                for index, ((_, tool_name, _, _), tool_result) in enumerate(zip(prepared, tool_results)):
+                    if not _needs_user_input(tool_result):
+                        continue
+                    if parked:
+                        tool_results[index] = _DEFERRED_TOOL_RESULT
+                    else:
+                        _tool_result_direct_reply(uid_key, tool_name, tool_result)
+                        parked = True
+                        step_tools = None
+
+            # Append the tool calls and their results to the conversation per
             # OpenAI's tool-calling message format.
             messages.append(
                 {
@@ -1030,28 +1243,21 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
                             "type": "function",
                             "function": {
                                 "name": tool_name,
-                                "arguments": json.dumps(tool_args),
+                                "arguments": raw_arguments,
                             },
                         }
+                        for tool_id, tool_name, _, raw_arguments in prepared
                     ],
                 }
             )
-
-            # Truncate large tool outputs before sending back to the LLM to
-            # avoid context length issues, while still preserving the full
-            # result in logs and side effects.
-            raw_tool_content = json.dumps(tool_result)
-            MAX_TOOL_CONTENT_CHARS = 8000
-            if len(raw_tool_content) > MAX_TOOL_CONTENT_CHARS:
-                raw_tool_content = raw_tool_content[:MAX_TOOL_CONTENT_CHARS] + "...[truncated]"
-
-            messages.append(
+            messages.extend(
                 {
                     "role": "tool",
                     "tool_call_id": tool_id,
                     "name": tool_name,
-                    "content": raw_tool_content,
+                    "content": _bounded_dumps(tool_result),
                 }
+                for (tool_id, tool_name, _, _), tool_result in zip(prepared, tool_results)
             )
 
             continue
@@ -1059,7 +1265,7 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
         logger.warning("Unexpected LLM result type: %r", result_type)
         log_error(
             "Unexpected LLM result type",
-            user_id=str(user_id),
+            user_id=uid_key,
             request_id=request_id,
             result_type=str(result_type),
         )
@@ -1072,22 +1278,84 @@ async def agent(user_id: int, message: str, request_id: str | None = None) -> st
     )
 
 
+# Background memory updates are tracked so pending tasks are not garbage
+# collected mid-flight, and capped so a burst of turns cannot flood the memory
+# backend with concurrent writes.
+_BG_TASKS: set[asyncio.Task] = set()
+_BG_MAX_CONCURRENT = 32
+_BG_SEM = asyncio.Semaphore(_BG_MAX_CONCURRENT)
+# Each update issues its appends concurrently, so the write phase gets its own
+# smaller cap to keep in-flight inserts within the Supabase pool.
+_MEMORY_WRITE_MAX_CONCURRENT = 16
+_MEMORY_WRITE_SEM = asyncio.Semaphore(_MEMORY_WRITE_MAX_CONCURRENT)
+
+# The long-term summary (a 30-message read plus an LLM call and an upsert) is
+# rebuilt only every Nth turn per user; it rarely changes between turns.
+_SUMMARY_EVERY_N = max(1, int(os.getenv("JARVIS_MEMORY_SUMMARY_EVERY_N", "5")))
+_SUMMARY_TURN_COUNTS: Dict[str, int] = {}
+
+
+async def _bounded_memory_update(**kwargs: Any) -> None:
+    async with _BG_SEM:
+        await _update_memory_background(**kwargs)
+
+
+def _spawn_memory_update(
+    user_id_str: str,
+    message: str,
+    final_text: str,
+    request_id: str | None = None,
+) -> None:
+    """Schedule a background memory update and keep a reference to it."""
+    task = asyncio.create_task(
+        _bounded_memory_update(
+            user_id_str=user_id_str,
+            message=message,
+            final_text=final_text,
+            request_id=request_id,
+        )
+    )
+    _BG_TASKS.add(task)
+    task.add_done_callback(_BG_TASKS.discard)
+
+
+async def drain_background_tasks(timeout: float = 10.0) -> None:
+    """Wait up to timeout seconds for in-flight memory updates on shutdown.
+
+    Lets queued writes finish instead of being destroyed while still pending
+    when the event loop closes.
+    """
+    if _BG_TASKS:
+        await asyncio.wait(set(_BG_TASKS), timeout=timeout)
+
+
 async def _update_memory_background(
-    user_id: int,
+    user_id_str: str,
     message: str,
     final_text: str,
     request_id: str | None = None
 ) -> None:
     """Update memory in background without blocking the response.
-    
-    Uses sequential writes with retry logic to avoid overwhelming connection pool.
+
+    The two message appends are independent and run concurrently, landing in
+    the same batched insert; the summary step reads them back, so it runs
+    only once both have finished, and only every _SUMMARY_EVERY_N turns.
     """
     try:
-        user_id_str = str(user_id)
+        async with _MEMORY_WRITE_SEM:
+            results = await asyncio.gather(
+                append_message(user_id_str, "user", message),
+                append_message(user_id_str, "assistant", final_text),
+                return_exceptions=True,
+            )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
 
-        # Sequential writes with built-in retry logic (more reliable than parallel)
-        await append_message(user_id_str, "user", message)
-        await append_message(user_id_str, "assistant", final_text)
+        turns = _SUMMARY_TURN_COUNTS.get(user_id_str, 0) + 1
+        _SUMMARY_TURN_COUNTS[user_id_str] = turns
+        if turns % _SUMMARY_EVERY_N:
+            return
 
         # Update long-term memory summary
         recent_for_summary = await get_recent_messages(user_id_str, limit=30)
@@ -1096,7 +1364,7 @@ async def _update_memory_background(
         logger.error("Error updating memory in background: %r", exc)
         log_error(
             "Error updating memory in background",
-            user_id=str(user_id),
+            user_id=user_id_str,
             request_id=request_id,
             error=str(exc),
         )
@@ -1117,10 +1385,12 @@ async def process_normalized_message(normalized: Dict[str, Any]) -> None:
 
     # Local imports to avoid circular import at module load time.
     from src.services.telegram import download_telegram_file
-    from src.services.whisper import transcribe_audio
+    from src.services.whisper import transcribe_audio_bytes
 
+    # Both steps block (HTTP download, Whisper call), so they run in worker
+    # threads and the audio is handed over in memory.
     try:
-        audio_bytes = download_telegram_file(str(file_id))
+        audio_bytes = await asyncio.to_thread(download_telegram_file, str(file_id))
     except Exception as exc:  # noqa: BLE001
         logger.error(f"[JARVIS-WHISPER] Error downloading file: {exc!r}")
         return
@@ -1129,9 +1399,10 @@ async def process_normalized_message(normalized: Dict[str, Any]) -> None:
         logger.error("[JARVIS-WHISPER] No audio bytes received from Telegram")
         return
 
-    text = transcribe_audio(audio_bytes)
+    result = await transcribe_audio_bytes(audio_bytes)
+    text = result.get("text")
     if not text:
-        logger.error("[JARVIS-WHISPER] Empty transcription text")
+        logger.error(f"[JARVIS-WHISPER] Empty transcription text: {result.get('error')}")
         return
 
     # Mutate the normalized message to look like a text message.
@@ -12,6 +12,7 @@ This is the ONLY place where bulk operation state is checked and routed.
 
 from __future__ import annotations
 
+from collections import deque
 from typing import Any, Dict, Optional
 
 from src.adapters.bulk_tool_adapter import BulkToolAdapter
@@ -103,41 +104,48 @@ async def check_bulk_gate(
             # - <= 1 list-page call
             # - <= 1 batchModify call
             if state.domain == "gmail":
-                prepared_context_dict = (state.metadata or {}).get("prepared_context")
+                state_metadata = state.metadata or {}
+                prepared_context_dict = state_metadata.get("prepared_context")
                 if not isinstance(prepared_context_dict, dict):
                     raise ValueError("Missing prepared_context for gmail bulk operation")
 
-                # Reconstruct PreparedBulkContext (JSON-safe)
+                # Load persisted pagination state. States written before the
+                # cursor was split out keep these keys at the top level.
+                cursor = state_metadata.get("cursor") or state_metadata
+                page_token = cursor.get("page_token")
+                # The buffer is drained FIFO, so a deque pops a batch off the
+                # front without copying the residual IDs.
+                message_buffer = deque(cursor.get("message_buffer") or [])
+
+                # Reconstruct PreparedBulkContext (JSON-safe). The stored
+                # context is never written back, so the adapter gets its own
+                # metadata dict to page through.
                 ctx = PreparedBulkContext(
                     tool_name=prepared_context_dict["tool_name"],
                     action=prepared_context_dict["action"],
                     query_params=prepared_context_dict["query_params"],
                     action_params=prepared_context_dict["action_params"],
-                    metadata=prepared_context_dict.get("metadata") or {},
+                    metadata={"page_token": page_token},
                 )
 
-                # Load persisted pagination state
-                message_buffer = list((state.metadata or {}).get("message_buffer") or [])
-                page_token = (state.metadata or {}).get("page_token")
-                ctx.metadata["page_token"] = page_token
-
                 # If we don't have enough buffered IDs for this batch, fetch exactly ONE page.
+                fetched_this_turn = False
                 if len(message_buffer) < state.batch_size and page_token is not None:
                     page_items = await adapter.get_next_batch(
                         context=ctx,
                         batch_size=state.batch_size,
                         offset=0,
                     )
-                    message_buffer.extend([i.id for i in page_items])
+                    message_buffer.extend(i.id for i in page_items)
                     page_token = (ctx.metadata or {}).get("page_token")
+                    fetched_this_turn = True
 
                 # Pop <= batch_size IDs from buffer
-                batch_ids = message_buffer[: state.batch_size]
-                message_buffer = message_buffer[len(batch_ids) :]
+                popleft = message_buffer.popleft
+                batch_ids = [popleft() for _ in range(min(state.batch_size, len(message_buffer)))]
 
                 # If no IDs are available, we are done (estimate may have been high).
                 if not batch_ids:
-                    state.remaining_items = []
                     bulk_result = {
                         "success": True,
                         "processed_this_batch": 0,
@@ -145,7 +153,7 @@ async def check_bulk_gate(
                         "remaining": 0,
                         "total": state.total,
                         "needs_confirmation": False,
-                        "state": state.to_dict(),
+                        "state": None,
                         "errors": None,
                     }
                     return {
@@ -155,11 +163,39 @@ async def check_bulk_gate(
                         "clear_state": True,
                     }
 
-                # Execute exactly ONE batchModify call via adapter
-                results = await adapter.execute_batch(
-                    items=[BulkItem(id=mid, display_name=mid, raw_data=None) for mid in batch_ids],
+                # Execute exactly ONE batchModify call via adapter. If there will
+                # be a next turn, it would need a page, and none was fetched this
+                # turn, prefetch it concurrently so its latency hides behind the
+                # batchModify call. The last batch prefetches nothing.
+                # The adapter iterates items once, so a generator avoids holding
+                # a second list of BulkItem objects alongside batch_ids.
+                execute = adapter.execute_batch(
+                    items=(BulkItem.id_only(mid) for mid in batch_ids),
                     context=ctx,
                 )
+                if (
+                    not fetched_this_turn
+                    and len(message_buffer) < state.batch_size
+                    and page_token is not None
+                    and state.remaining > len(batch_ids)
+                ):
+                    prefetch = adapter.prefetch_next_batch(ctx, state.batch_size)
+                    try:
+                        results = await execute
+                    except BaseException:
+                        prefetch.cancel()
+                        raise
+                    try:
+                        page_items = await prefetch
+                    except Exception:  # noqa: BLE001
+                        # The batch already ran; leave page_token as-is so the
+                        # next turn fetches this page again.
+                        page_items = []
+                    else:
+                        page_token = (ctx.metadata or {}).get("page_token")
+                    message_buffer.extend(i.id for i in page_items)
+                else:
+                    results = await execute
 
                 # Convert adapter results to error list
                 errors = []
@@ -167,37 +203,35 @@ async def check_bulk_gate(
                     if not result.success:
                         errors.append({"item": result.item_id, "error": result.error})
 
-                # Update progress and remaining placeholders
+                # Update progress; Gmail state keeps a count, not the IDs.
                 state.processed += len(batch_ids)
-                state.remaining_items = state.remaining_items[len(batch_ids) :]
 
-                # Persist pagination state
-                if state.metadata is None:
-                    state.metadata = {}
-                state.metadata["message_buffer"] = message_buffer
-                state.metadata["page_token"] = page_token
-                prepared_context_dict["metadata"] = ctx.metadata
-                state.metadata["prepared_context"] = prepared_context_dict
+                # Persist pagination state; only the cursor changes per turn.
+                state.metadata["cursor"] = {
+                    "page_token": page_token,
+                    "message_buffer": list(message_buffer),
+                }
 
+                # The presenter never reads the state, so it is serialized
+                # only when it will be stored for the next turn.
+                needs_confirmation = state.remaining > 0
+                state_dict = state.to_dict() if needs_confirmation else None
                 bulk_result = {
                     "success": True,
                     "processed_this_batch": len(batch_ids),
                     "processed_total": state.processed,
-                    "remaining": len(state.remaining_items),
+                    "remaining": state.remaining,
                     "total": state.total,
-                    "needs_confirmation": len(state.remaining_items) > 0,
-                    "state": state.to_dict(),
+                    "needs_confirmation": needs_confirmation,
+                    "state": state_dict,
                     "errors": errors if errors else None,
                 }
 
-                response = present_bulk_status(bulk_result)
-                clear_state = not bulk_result["needs_confirmation"]
-
                 return {
                     "handled": True,
-                    "response": response,
-                    "new_state": bulk_result["state"] if not clear_state else None,
-                    "clear_state": clear_state,
+                    "response": present_bulk_status(bulk_result),
+                    "new_state": state_dict,
+                    "clear_state": not needs_confirmation,
                 }
 
             # Non-gmail domains (not yet rolled out): fall back to previous behavior.
@@ -227,31 +261,32 @@ async def check_bulk_gate(
 
             # Update state
             state.processed += len(batch)
-            state.remaining_items = state.remaining_items[len(batch) :]
+            state.take(len(batch))
 
             # Build result dict
+            # Serialize the state only if it survives this turn.
+            needs_confirmation = state.remaining > 0
+            state_dict = state.to_dict() if needs_confirmation else None
             bulk_result = {
                 "success": True,
                 "processed_this_batch": len(batch),
                 "processed_total": state.processed,
-                "remaining": len(state.remaining_items),
+                "remaining": state.remaining,
                 "total": state.total,
-                "needs_confirmation": len(state.remaining_items) > 0,
-                "state": state.to_dict(),
+                "needs_confirmation": needs_confirmation,
+                "state": state_dict,
                 "errors": errors if errors else None,
             }
 
             # Present status
             response = present_bulk_status(bulk_result)
 
-            # Determine if we should clear state (operation complete)
-            clear_state = not bulk_result["needs_confirmation"]
-
+            # Clear state once the operation is complete
             return {
                 "handled": True,
                 "response": response,
-                "new_state": bulk_result["state"] if not clear_state else None,
-                "clear_state": clear_state,
+                "new_state": state_dict,
+                "clear_state": not needs_confirmation,
             }
 
         except Exception as exc:
@@ -347,7 +382,7 @@ async def initiate_bulk_operation(
         if adapter.tool_name == "gmail":
             # Gmail START (no processing):
             # - Fetch exactly ONE search/list page (IDs only)
-            # - Store page_token + message_buffer in JSON-safe bulk state
+            # - Store page_token + message_buffer as the JSON-safe bulk cursor
             # - Derive total_estimated_count from the same page (no extra list call)
             first_page = await adapter.get_next_batch(
                 context=context,
@@ -379,25 +414,25 @@ async def initiate_bulk_operation(
                     "error": "No items found matching your criteria.",
                 }
 
-            # Initialize bulk operation state with placeholders only.
-            # This avoids eager fetching IDs while keeping controller totals accurate.
-            placeholder_items = [0] * total_count
-
+            # Initialize a count-only bulk operation. IDs are fetched page by
+            # page on continue turns, so the state stores just the total.
             result = await start_bulk_operation(
                 domain=adapter.tool_name,
                 action=context.action,
-                items=placeholder_items,
+                total=int(total_count),
                 batch_size=batch_size,
                 metadata={
+                    # Written once; continue turns only replace the cursor.
                     "prepared_context": {
                         "tool_name": context.tool_name,
                         "action": context.action,
                         "query_params": context.query_params,
                         "action_params": context.action_params,
-                        "metadata": context.metadata or {},
                     },
-                    "page_token": page_token,
-                    "message_buffer": message_buffer,
+                    "cursor": {
+                        "page_token": page_token,
+                        "message_buffer": message_buffer,
+                    },
                     "total_estimated_count": int(total_count),
                 },
             )
@@ -416,15 +451,6 @@ async def initiate_bulk_operation(
             "error": f"Bulk operations are not enabled for tool: {adapter.tool_name}",
         }
 
-        # Step 7: Present status
-        response = present_bulk_status(result)
-
-        return {
-            "success": True,
-            "response": response,
-            "state": result["state"],
-        }
-
     except ValueError as exc:
         return {
             "success": False,
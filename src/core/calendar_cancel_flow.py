@@ -1,52 +1,189 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
 import logging
+import os
 import re
+import sys
+import time
 from pathlib import Path
 from threading import Lock
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional
+
+import orjson
 
 from src.core.tools import run_tool
+from src.services.calendar_advanced import calendar_cancel_meeting_batch
 
 
 logger = logging.getLogger("jarvis.calendar_cancel_flow")
 
 
 _PENDING: Dict[str, Dict[str, Any]] = {}
+# _LOCK guards the in-memory dict and the unwritten log lines only; disk
+# writes take _IO_LOCK, so readers never wait on a file write.
 _LOCK = Lock()
+_IO_LOCK = Lock()
 _FILE = Path("data") / "pending_calendar_cancel.json"
 
+# Each _set/_clear appends one line to the log instead of rewriting the whole
+# snapshot; the log is folded back into the snapshot every _COMPACT_EVERY
+# writes and at exit. Replaying a line is idempotent, so a crash between
+# writing the snapshot and removing the log is harmless.
+_WAL = Path("data") / "pending_calendar_cancel.log"
+_COMPACT_EVERY = 128
+_wal_writes = 0
+
+# Inside the event loop, log entries are buffered and written by one flush
+# task up to _FLUSH_DELAY seconds later, in a worker thread, so a turn never
+# does disk I/O on the loop and bursts of mutations share one append. The
+# buffer keeps only the latest unwritten entry per user, so the several _set
+# calls of one turn are encoded and written once.
+_FLUSH_DELAY = 0.05
+_wal_buffer: Dict[str, Dict[str, Any]] = {}
+_flush_task: Optional["asyncio.Task[None]"] = None
+
+# Pending states untouched for this many seconds are treated as abandoned and
+# dropped on the next read; 0 keeps them until cleared. Ages are tracked in
+# memory only, so states loaded from disk start a fresh window.
+_PENDING_TTL = float(os.getenv("JARVIS_CALENDAR_CANCEL_TTL", "1800"))
+_PENDING_TS: Dict[str, float] = {}
+
+
+def _intern_event_ids(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Intern a freshly decoded state's event ids in place.
+
+    Ids repeat across event_id, options and selected_event_ids; decoding
+    gives each occurrence its own string, interning makes them share one.
+    """
+    event_id = state.get("event_id")
+    if isinstance(event_id, str):
+        state["event_id"] = sys.intern(event_id)
+    for option in state.get("options") or ():
+        if isinstance(option, dict) and isinstance(option.get("id"), str):
+            option["id"] = sys.intern(option["id"])
+    selected = state.get("selected_event_ids")
+    if isinstance(selected, list):
+        state["selected_event_ids"] = [sys.intern(e) if isinstance(e, str) else e for e in selected]
+    return state
+
+
+def _apply(entry: Any) -> None:
+    if not isinstance(entry, dict) or not isinstance(entry.get("uid"), str):
+        return
+    if entry.get("op") == "set" and isinstance(entry.get("state"), dict):
+        _PENDING[entry["uid"]] = _intern_event_ids(entry["state"])
+    elif entry.get("op") == "clear":
+        _PENDING.pop(entry["uid"], None)
+
 
 def _load() -> None:
+    global _wal_writes
     try:
         _FILE.parent.mkdir(parents=True, exist_ok=True)
-        if not _FILE.exists():
-            return
-        raw = _FILE.read_text(encoding="utf-8")
-        if not raw.strip():
-            return
-        data = json.loads(raw)
-        if not isinstance(data, dict):
-            return
+        data: Any = {}
+        if _FILE.exists():
+            raw = _FILE.read_bytes()
+            if raw.strip():
+                data = orjson.loads(raw)
         with _LOCK:
             _PENDING.clear()
-            for k, v in data.items():
-                if isinstance(k, str) and isinstance(v, dict):
-                    _PENDING[k] = v
+            _wal_writes = 0
+            if isinstance(data, dict):
+                for k, v in data.items():
+                    if isinstance(k, str) and isinstance(v, dict):
+                        _PENDING[k] = _intern_event_ids(v)
+            if _WAL.exists():
+                for line in _WAL.read_bytes().splitlines():
+                    try:
+                        _apply(orjson.loads(line))
+                    except ValueError:
+                        # A torn final line from an interrupted append.
+                        continue
+                    _wal_writes += 1
     except Exception:
         return
 
 
-def _save() -> None:
+def _compact_locked() -> None:
+    """Fold the log into the snapshot. Caller holds _IO_LOCK."""
+    global _wal_writes
+    with _LOCK:
+        # Buffered lines are already reflected in _PENDING.
+        _wal_buffer.clear()
+        snapshot = orjson.dumps(_PENDING)
+    tmp = _FILE.with_suffix(".tmp")
+    tmp.write_bytes(snapshot)
+    os.replace(tmp, _FILE)
+    _WAL.unlink(missing_ok=True)
+    _wal_writes = 0
+
+
+def _flush() -> None:
+    """Append buffered log lines to disk, compacting when the log is long."""
+    global _wal_writes
     try:
-        _FILE.parent.mkdir(parents=True, exist_ok=True)
-        with _LOCK:
-            _FILE.write_text(json.dumps(_PENDING, ensure_ascii=False), encoding="utf-8")
+        with _IO_LOCK:
+            with _LOCK:
+                if not _wal_buffer:
+                    return
+                entries = list(_wal_buffer.values())
+                _wal_buffer.clear()
+            lines = b"".join(orjson.dumps(entry) + b"\n" for entry in entries)
+            count = len(entries)
+            _WAL.parent.mkdir(parents=True, exist_ok=True)
+            with _WAL.open("ab") as f:
+                f.write(lines)
+            _wal_writes += count
+            if _wal_writes >= _COMPACT_EVERY:
+                _compact_locked()
     except Exception:
         return
 
 
+async def _flush_later() -> None:
+    global _flush_task
+    while True:
+        await asyncio.sleep(_FLUSH_DELAY)
+        await asyncio.to_thread(_flush)
+        # Lines appended while the write ran get another pass; clearing the
+        # handle in the same step as the check means _append never sees a
+        # finishing task and skips scheduling.
+        if not _wal_buffer:
+            _flush_task = None
+            return
+
+
+def _append(entry: Dict[str, Any]) -> None:
+    global _flush_task
+    with _LOCK:
+        # Re-insert so the entry also moves to the end of the write order.
+        _wal_buffer.pop(entry["uid"], None)
+        _wal_buffer[entry["uid"]] = entry
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _flush()
+        return
+    if _flush_task is None or _flush_task.done():
+        _flush_task = loop.create_task(_flush_later())
+
+
+def _compact() -> None:
+    if not _loaded or not (_wal_writes or _wal_buffer):
+        return
+    try:
+        with _IO_LOCK:
+            _compact_locked()
+    except Exception:
+        return
+
+
+atexit.register(_compact)
+
+
 _loaded = False
 
 
@@ -58,46 +195,77 @@ def _ensure_loaded() -> None:
     _loaded = True
 
 
-def _get(user_id: int) -> Optional[Dict[str, Any]]:
+def _get(user_id: int) -> Optional[Mapping[str, Any]]:
+    """Return a read-only view of the user's pending state.
+
+    Stored states are replaced wholesale by _set, never mutated in place, so
+    the view is safe to read; use _get_mutable to build an updated state.
+    """
     _ensure_loaded()
+    uid = str(user_id)
+    now = time.monotonic()
     with _LOCK:
-        state = _PENDING.get(str(user_id))
+        state = _PENDING.get(uid)
         if not isinstance(state, dict):
             return None
-        return dict(state)
+        stored_at = _PENDING_TS.setdefault(uid, now)
+        if _PENDING_TTL <= 0 or now - stored_at <= _PENDING_TTL:
+            return MappingProxyType(state)
+    _clear(user_id)
+    return None
+
+
+def _get_mutable(user_id: int) -> Optional[Dict[str, Any]]:
+    state = _get(user_id)
+    return dict(state) if state is not None else None
 
 
 def _set(user_id: int, state: Dict[str, Any]) -> None:
     _ensure_loaded()
+    uid = str(user_id)
     with _LOCK:
-        _PENDING[str(user_id)] = state
-    _save()
+        _PENDING_TS[uid] = time.monotonic()
+        current = _PENDING.get(uid)
+        # An equal copy changes nothing. The same object may have been edited
+        # in place since it was stored, so it is always logged.
+        if current is not state and current == state:
+            return
+        _PENDING[uid] = state
+    _append({"op": "set", "uid": uid, "state": state})
 
 
 def _clear(user_id: int) -> None:
     _ensure_loaded()
+    uid = str(user_id)
     with _LOCK:
-        _PENDING.pop(str(user_id), None)
-    _save()
+        _PENDING_TS.pop(uid, None)
+        if _PENDING.pop(uid, None) is None:
+            return
+    _append({"op": "clear", "uid": uid})
 
 
-def _is_confirm(text: str) -> bool:
-    t = (text or "").strip().lower()
+_CONFIRM_RE = re.compile(r"\b(yes|confirm|proceed)\b")
+_CANCEL_WORDS = frozenset({"cancel", "stop", "no"})
+
+
+def _normalize(text: Optional[str]) -> str:
+    return (text or "").strip().lower()
+
+
+# Both predicates take text already passed through _normalize, so a turn
+# normalizes the message once however many checks it runs.
+def _is_confirm(t: str) -> bool:
     if not t:
         return False
-    if re.search(r"\b(yes|confirm|proceed)\b", t):
-        return True
-    if "cancel them" in t:
-        return True
-    return False
+    return _CONFIRM_RE.search(t) is not None or "cancel them" in t
 
 
-def _is_cancel(text: str) -> bool:
-    t = (text or "").strip().lower()
-    return t in {"cancel", "stop", "no"}
+def _is_cancel(t: str) -> bool:
+    return t in _CANCEL_WORDS
 
 
-async def _execute_selected_cancellations(user_id: int, state: Dict[str, Any], selected_ids: List[str]) -> str:
+async def _execute_selected_cancellations(user_id: int, state: Mapping[str, Any], selected_ids: List[str]) -> str:
+    state = dict(state)
     selected_ids = [str(eid) for eid in (selected_ids or []) if str(eid).strip()]
     if not selected_ids:
         # Abort: we should never execute with an empty selection.
@@ -110,22 +278,43 @@ async def _execute_selected_cancellations(user_id: int, state: Dict[str, Any], s
     state["locked"] = True
     _set(user_id, state)
 
-    cancelled = 0
-    for eid in selected_ids:
-        tool_args: Dict[str, Any] = {
-            "event_id": eid,
-            "confirm": True,
-            "cancel_scope": state.get("cancel_scope"),
-            "delete": bool(state.get("delete") or False),
-        }
+    cancel_scope = state.get("cancel_scope")
+    delete = bool(state.get("delete") or False)
+
+    # Several events go through the batch helper, which shares one auth
+    # lookup and one pooled connection and caps in-flight requests. It is
+    # called directly rather than as a tool, so the LLM can never reach it
+    # and skip this confirmation flow.
+    if len(selected_ids) > 1:
         try:
-            result = await run_tool("calendar_cancel_meeting", tool_args, user_id)
-        except Exception:
-            continue
+            batch_result = await calendar_cancel_meeting_batch(
+                event_ids=selected_ids,
+                confirm=True,
+                cancel_scope=cancel_scope,
+                delete=delete,
+            )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Calendar batch cancel failed: user_id=%s err=%r", user_id, exc)
+            batch_result = None
+        cancelled = batch_result.get("cancelled_count", 0) if isinstance(batch_result, dict) else 0
+        return _cancelled_reply(user_id, cancelled)
+
+    tool_args: Dict[str, Any] = {
+        "event_id": selected_ids[0],
+        "confirm": True,
+        "cancel_scope": cancel_scope,
+        "delete": delete,
+    }
+    try:
+        result = await run_tool("calendar_cancel_meeting", tool_args, user_id)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Calendar cancel failed: user_id=%s err=%r", user_id, exc)
+        result = None
+    cancelled = 1 if isinstance(result, dict) and result.get("cancelled") is True else 0
+    return _cancelled_reply(user_id, cancelled)
 
-        if isinstance(result, dict) and result.get("cancelled") is True:
-            cancelled += 1
 
+def _cancelled_reply(user_id: int, cancelled: int) -> str:
     _clear(user_id)
     if cancelled <= 0:
         return "I couldn't cancel any of the selected events. Please try again (they may have already been cancelled or I may not have access)."
@@ -133,6 +322,8 @@ async def _execute_selected_cancellations(user_id: int, state: Dict[str, Any], s
 
 
 _NUM_RE = re.compile(r"\d+")
+# Whole words only, so "cancel allergy check" is not read as "cancel all".
+_ALL_PHRASES_RE = re.compile(r"\b(?:cancel (?:all|them all)|all (?:events|of them))\b")
 
 
 def _parse_selection(text: str, option_count: int) -> Optional[List[int]]:
@@ -143,16 +334,15 @@ def _parse_selection(text: str, option_count: int) -> Optional[List[int]]:
     if not t:
         return None
 
-    if any(phrase in t for phrase in ["cancel all", "all events", "all of them", "cancel them all"]):
+    if _ALL_PHRASES_RE.search(t):
         return list(range(1, option_count + 1))
 
-    nums = [int(m.group(0)) for m in _NUM_RE.finditer(t)]
-    if not nums:
-        return None
-
+    seen = set()
     picked: List[int] = []
-    for n in nums:
-        if 1 <= n <= option_count and n not in picked:
+    for m in _NUM_RE.finditer(t):
+        n = int(m.group(0))
+        if 1 <= n <= option_count and n not in seen:
+            seen.add(n)
             picked.append(n)
 
     return picked or None
@@ -176,7 +366,8 @@ async def handle_calendar_cancel_turn(user_id: int, message: str) -> Optional[st
         if state.get("executing") is True:
             return None
 
-        if _is_cancel(message):
+        text = _normalize(message)
+        if _is_cancel(text):
             _clear(user_id)
             return "Okay, I won't cancel anything."
 
@@ -194,7 +385,7 @@ async def handle_calendar_cancel_turn(user_id: int, message: str) -> Optional[st
                 return await _execute_selected_cancellations(user_id, state, locked_ids)
 
             if options and not selected_ids:
-                picked = _parse_selection(message, option_count=len(options))
+                picked = _parse_selection(text, option_count=len(options))
                 if picked:
                     selected: List[str] = []
                     for idx in picked:
@@ -209,6 +400,7 @@ async def handle_calendar_cancel_turn(user_id: int, message: str) -> Optional[st
                     if not selected:
                         return None
 
+                    state = _get_mutable(user_id) or {}
                     state["selected_event_ids"] = selected
                     state["locked"] = True
                     # Persist immediately after selection so we can't lose IDs between turns.
@@ -223,11 +415,11 @@ async def handle_calendar_cancel_turn(user_id: int, message: str) -> Optional[st
 
                     # If the user selected AND confirmed in the same message,
                     # execute immediately (single confirmation step).
-                    if _is_confirm(message):
+                    if _is_confirm(text):
                         return await _execute_selected_cancellations(user_id, state, selected)
 
-                    state["confirmation_asked"] = True
-                    state["confirmed"] = False
+                    # Build a new dict rather than editing the one just stored.
+                    state = {**state, "confirmation_asked": True, "confirmed": False}
                     _set(user_id, state)
                     n = len(selected)
                     return f"Confirm cancellation of {n} event(s)?"
@@ -236,11 +428,11 @@ async def handle_calendar_cancel_turn(user_id: int, message: str) -> Optional[st
             if state.get("event_id") and not selected_ids:
                 selected_ids = [str(state.get("event_id"))]
 
-            if selected_ids and state.get("confirmation_asked") and _is_confirm(message):
+            if selected_ids and state.get("confirmation_asked") and _is_confirm(text):
                 return await _execute_selected_cancellations(user_id, state, selected_ids)
 
             # If the user confirms but we don't have a selection, do not execute.
-            if state.get("confirmation_asked") and _is_confirm(message) and not selected_ids:
+            if state.get("confirmation_asked") and _is_confirm(text) and not selected_ids:
                 return "Please reply with the number(s) of the event(s) you want to cancel (e.g. 1, 2 and 3), or say 'cancel all'."
 
         # If user replies something else while a cancel is pending, let LLM handle it.
@@ -273,6 +465,7 @@ def maybe_store_calendar_cancel_state_from_tool_result(user_id: int, tool_name:
         if isinstance(data, dict):
             event_id = data.get("event_id")
             if event_id:
+                event_id = sys.intern(str(event_id))
                 _set(
                     user_id,
                     {
@@ -284,7 +477,7 @@ def maybe_store_calendar_cancel_state_from_tool_result(user_id: int, tool_name:
                         "executing": False,
                         "locked": True,
                         "options": [],
-                        "selected_event_ids": [str(event_id)],
+                        "selected_event_ids": [event_id],
                         "cancel_scope": data.get("cancel_scope"),
                         "delete": bool(data.get("delete") or False),
                     },
@@ -300,6 +493,7 @@ def maybe_store_calendar_cancel_state_from_tool_result(user_id: int, tool_name:
         if isinstance(data, dict):
             event_id = data.get("event_id")
             if event_id:
+                event_id = sys.intern(str(event_id))
                 _set(
                     user_id,
                     {
@@ -311,7 +505,7 @@ def maybe_store_calendar_cancel_state_from_tool_result(user_id: int, tool_name:
                         "executing": False,
                         "locked": False,
                         "options": [],
-                        "selected_event_ids": [str(event_id)],
+                        "selected_event_ids": [event_id],
                         "cancel_scope": None,
                         "delete": False,
                     },
@@ -328,7 +522,7 @@ def maybe_store_calendar_cancel_state_from_tool_result(user_id: int, tool_name:
             for o in options:
                 if isinstance(o, dict) and o.get("id"):
                     safe_opts.append({
-                        "id": str(o.get("id")),
+                        "id": sys.intern(str(o.get("id"))),
                         "title": o.get("title") or o.get("summary") or "",
                         "start": o.get("start"),
                         "end": o.get("end"),
@@ -3,7 +3,10 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
 
 
 _EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
@@ -99,6 +102,33 @@ def compute_tool_confidence(
     tool_args: Dict[str, Any],
     tool_schema: Optional[Dict[str, Any]] = None,
 ) -> ConfidenceAssessment:
+    return _assess(tool_name, tool_args, _schema_required_fields(tool_schema))
+
+
+def cached_tool_confidence(
+    *,
+    tool_name: str,
+    tool_args: Dict[str, Any],
+    tool_schema: Optional[Dict[str, Any]] = None,
+) -> ConfidenceAssessment:
+    """compute_tool_confidence memoized on (tool name, canonical args, required fields).
+
+    The returned assessment is shared between callers and must not be mutated.
+    Args that orjson cannot serialize are assessed directly.
+    """
+    try:
+        args_key = orjson.dumps(tool_args, option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        return compute_tool_confidence(tool_name=tool_name, tool_args=tool_args, tool_schema=tool_schema)
+    return _cached_assess(str(tool_name or ""), args_key, tuple(_schema_required_fields(tool_schema)))
+
+
+@lru_cache(maxsize=2048)
+def _cached_assess(tool_name: str, args_key: bytes, required: Tuple[str, ...]) -> ConfidenceAssessment:
+    return _assess(tool_name, orjson.loads(args_key), required)
+
+
+def _assess(tool_name: str, tool_args: Any, required: Sequence[str]) -> ConfidenceAssessment:
     name = str(tool_name or "").strip()
     args = tool_args if isinstance(tool_args, dict) else {}
 
@@ -111,7 +141,6 @@ def compute_tool_confidence(
     uniqueness = 0.85
     feasibility = 0.90
 
-    required = _schema_required_fields(tool_schema)
     for f in required:
         v = args.get(f)
         if v is None or (isinstance(v, str) and not v.strip()):
@@ -57,7 +57,10 @@ async def call_llm(
     Returns a structured dict with one of the following shapes:
 
     - {"type": "message", "content": str}
-    - {"type": "tool", "tool_calls": [{"id", "name", "arguments"}, ...]}
+    - {"type": "tool", "tool_calls": [{"id", "name", "arguments", "raw_arguments"}, ...]}
+
+    ``raw_arguments`` is the JSON string exactly as the model sent it, or None
+    when it was not a valid JSON string.
     - {"type": "error", "error": str}
     """
 
@@ -99,12 +102,13 @@ async def call_llm(
             raw_args = fn.arguments or "{}"
             args = _safe_json_loads(raw_args) if isinstance(raw_args, str) else raw_args
             if args is None:
-                args = {}
+                args = raw_args = {}
             parsed_calls.append(
                 {
                     "id": call.id,
                     "name": fn.name,
                     "arguments": args,
+                    "raw_arguments": raw_args if isinstance(raw_args, str) else None,
                 }
             )
 
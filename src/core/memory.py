@@ -84,32 +84,167 @@ def _get_supabase_client() -> Optional[Client]:
 # ---------------------------------------------------------------------------
 
 
-async def append_message(user_id: str, role: str, content: str, metadata: Dict[str, Any] | None = None) -> None:
-    """Store a single message in conversation_messages with retry logic."""
-
-    client = _get_supabase_client()
-    if client is None:
-        return
-
-    payload: Dict[str, Any] = {"user_id": user_id, "role": role, "content": content}
-    if metadata is not None:
-        payload["metadata"] = metadata
+class MemoryBatcher:
+    """Single write-behind queue for Supabase inserts.
+
+    Rows from every user go through one queue. Rows enqueued within a short
+    window (or up to ``max_batch`` of them) are grouped by table and written
+    with one multi-row INSERT per table, so a turn's user and assistant
+    messages, and bursts across users, share a round trip. Rows keep their
+    enqueue order within a table. The writer task is started by the app
+    lifespan (or lazily on first use) and is re-created if the running event
+    loop changes.
+    """
 
-    loop = asyncio.get_running_loop()
+    def __init__(self, max_batch: int = 128, flush_seconds: float = 0.03) -> None:
+        self.max_batch = max_batch
+        self.flush_seconds = flush_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> asyncio.Queue:
+        """Ensure the writer task is running on the current loop."""
+
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def enqueue(self, row: Dict[str, Any], table: str = "conversation_messages") -> asyncio.Future:
+        """Queue a row for the next batch; the returned future resolves once written."""
+
+        queue = self.start()
+        future = asyncio.get_running_loop().create_future()
+        queue.put_nowait((table, row, future))
+        return future
+
+    async def aclose(self) -> None:
+        """Write out every queued row, then stop the writer task."""
+
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        if not self._task.done():
+            # The None marker makes the writer flush without waiting out the window.
+            self._queue.put_nowait(None)
+            await self._queue.join()
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            batch = []
+            received = 1
+            deadline = loop.time() + self.flush_seconds
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = queue.get_nowait()
+                received += 1
+            try:
+                if batch:
+                    await self._flush(batch)
+            finally:
+                for _ in range(received):
+                    queue.task_done()
+
+    async def _flush(self, batch: List[tuple]) -> None:
+        by_table: Dict[str, List[Dict[str, Any]]] = {}
+        for table, row, _ in batch:
+            by_table.setdefault(table, []).append(row)
 
+        try:
+            client = _get_supabase_client()
+            if client is not None:
+                await asyncio.gather(*(_insert_rows(client, table, rows) for table, rows in by_table.items()))
+        finally:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+
+async def _insert_rows(client: Client, table: str, rows: List[Dict[str, Any]]) -> None:
+    # A bulk insert sends one column set for all rows and writes NULL where a
+    # row lacks a column, overriding its default. Rows are therefore inserted
+    # in consecutive runs that share a column set, which also keeps their order.
+    start = 0
+    while start < len(rows):
+        columns = rows[start].keys()
+        end = start + 1
+        while end < len(rows) and rows[end].keys() == columns:
+            end += 1
+        await _insert_run(client, table, rows[start:end])
+        start = end
+
+
+async def _insert_run(client: Client, table: str, rows: List[Dict[str, Any]]) -> None:
     def _insert() -> None:
-        client.table("conversation_messages").insert(payload).execute()
+        client.table(table).insert(rows).execute()
 
     # Retry up to 3 times with exponential backoff
     for attempt in range(3):
         try:
-            await loop.run_in_executor(None, _insert)
+            await asyncio.to_thread(_insert)
             return  # Success
         except Exception as exc:  # noqa: BLE001
             if attempt < 2:  # Don't sleep on last attempt
                 await asyncio.sleep(0.1 * (2 ** attempt))  # 0.1s, 0.2s
             else:
-                logger.error("Error inserting conversation message after 3 attempts: %r", exc)
+                logger.error(
+                    "Error inserting %d row(s) into %s after 3 attempts: %r",
+                    len(rows),
+                    table,
+                    exc,
+                )
+
+
+_MESSAGE_BATCHER = MemoryBatcher()
+
+
+async def append_message(user_id: str, role: str, content: str, metadata: Dict[str, Any] | None = None) -> None:
+    """Store a single message in conversation_messages.
+
+    The row is handed to the shared MemoryBatcher and written together with
+    any other messages queued in the same flush window.
+    """
+
+    client = _get_supabase_client()
+    if client is None:
+        return
+
+    payload: Dict[str, Any] = {"user_id": user_id, "role": role, "content": content}
+    if metadata is not None:
+        payload["metadata"] = metadata
+
+    await (await _MESSAGE_BATCHER.enqueue(payload))
+
+
+async def start_memory_writer() -> None:
+    """Start the shared write-behind writer on the running loop."""
+
+    _MESSAGE_BATCHER.start()
+
+
+async def stop_memory_writer() -> None:
+    """Flush queued memory writes and stop the writer."""
+
+    await _MESSAGE_BATCHER.aclose()
 
 
 async def get_recent_messages(user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
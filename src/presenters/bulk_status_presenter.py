@@ -7,7 +7,23 @@ The presenter has NO business logic and NO side effects. It only formats
 data for display to the user.
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+def _error_pairs(errors: Union[list, Dict[str, list]]) -> List[Tuple[Any, Any]]:
+    """Normalize either error shape into (item, error) pairs.
+
+    Accepts the list of {"item", "error"} dicts used by the bulk gate and the
+    columnar {"items": [...], "messages": [...]} shape returned by
+    continue_bulk_operation.
+    """
+
+    if isinstance(errors, dict):
+        return list(zip(errors.get("items") or [], errors.get("messages") or []))
+    return [
+        (err.get("item", "unknown"), err.get("error", "unknown error"))
+        for err in errors
+    ]
 
 
 def present_bulk_status(result: Dict[str, Any]) -> str:
@@ -28,7 +44,7 @@ def present_bulk_status(result: Dict[str, Any]) -> str:
                 - total (int)
                 - needs_confirmation (bool, optional)
                 - cancelled (bool, optional)
-                - errors (list, optional)
+                - errors (list or {"items", "messages"} dict, optional)
                 - message (str, optional for cancellation)
 
     Returns:
@@ -82,7 +98,7 @@ def present_bulk_status(result: Dict[str, Any]) -> str:
     # Build error summary
     error_summary = ""
     if errors:
-        error_count = len(errors)
+        error_count = len(_error_pairs(errors))
         error_summary = f" {error_count} item(s) had errors."
 
     # Case 1: Operation in progress (needs continuation)
@@ -114,11 +130,12 @@ def present_bulk_status(result: Dict[str, Any]) -> str:
     )
 
 
-def present_bulk_errors(errors: Optional[list]) -> str:
+def present_bulk_errors(errors: Optional[Union[list, Dict[str, list]]]) -> str:
     """Format a list of per-item errors into a readable summary.
 
     Args:
-        errors: List of dicts with "item" and "error" keys, or None.
+        errors: List of dicts with "item" and "error" keys, the columnar
+            {"items": [...], "messages": [...]} dict, or None.
 
     Returns:
         A formatted error report, or empty string if no errors.
@@ -135,13 +152,12 @@ def present_bulk_errors(errors: Optional[list]) -> str:
     if not errors:
         return ""
 
+    pairs = _error_pairs(errors)
     lines = ["Errors encountered:"]
-    for err in errors[:10]:  # Limit to first 10 to avoid overwhelming output
-        item = err.get("item", "unknown")
-        error = err.get("error", "unknown error")
+    for item, error in pairs[:10]:  # Limit to first 10 to avoid overwhelming output
         lines.append(f"- {item}: {error}")
 
-    if len(errors) > 10:
-        lines.append(f"... and {len(errors) - 10} more error(s).")
+    if len(pairs) > 10:
+        lines.append(f"... and {len(pairs) - 10} more error(s).")
 
     return "\n".join(lines)
@@ -11,8 +11,9 @@ import os
 import re
 import uuid
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import date, datetime, time as dt_time, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from zoneinfo import ZoneInfo
 
@@ -29,6 +30,21 @@ from src.core.decision_authority import (
 
 logger = logging.getLogger("jarvis.calendar_advanced")
 
+# Upper bound on in-flight event requests for calendar_cancel_meeting_batch.
+_CANCEL_BATCH_CONCURRENCY = 8
+
+
+@asynccontextmanager
+async def _calendar_client(shared: Optional[httpx.AsyncClient] = None) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield the caller's pooled client, or a short-lived one when none is given."""
+
+    if shared is not None:
+        yield shared
+        return
+    async with httpx.AsyncClient(timeout=20.0) as client:
+        yield client
+
+
 SAARA_EMAIL = "saar@alaw.co.il"
 
 _EMAIL_RE = re.compile(r"^[^\s@]+@[^\s@]+\.[^\s@]+$")
@@ -681,6 +697,8 @@ async def calendar_cancel_meeting(
     confirm: bool = False,
     cancel_scope: Optional[str] = None,  # "single" | "series"
     delete: bool = False,
+    _client: Optional[httpx.AsyncClient] = None,
+    _headers: Optional[Dict[str, str]] = None,
     **kwargs,
 ) -> Dict[str, Any]:
     tz_name = timezone_name or kwargs.get("timezone") or DEFAULT_TIMEZONE
@@ -720,7 +738,7 @@ async def calendar_cancel_meeting(
         event_title = event_id
         event_id = ""
 
-    headers = await _calendar_auth_headers()
+    headers = _headers or await _calendar_auth_headers()
     if not headers:
         return {
             "success": True,
@@ -737,7 +755,7 @@ async def calendar_cancel_meeting(
     if event_id:
         url = f"https://www.googleapis.com/calendar/v3/calendars/{cal_id}/events/{event_id}"
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
+            async with _calendar_client(_client) as client:
                 resp = await client.get(url, headers=headers)
             resp.raise_for_status()
         except httpx.HTTPStatusError as exc:
@@ -933,7 +951,7 @@ async def calendar_cancel_meeting(
         url = f"https://www.googleapis.com/calendar/v3/calendars/{cal_id}/events/{target_id}"
         params = {"sendUpdates": "all"}
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
+            async with _calendar_client(_client) as client:
                 resp = await client.delete(url, headers=headers, params=params)
             resp.raise_for_status()
         except httpx.HTTPStatusError as exc:
@@ -972,7 +990,7 @@ async def calendar_cancel_meeting(
         params = {"sendUpdates": "all"}
         payload = {"status": "cancelled"}
         try:
-            async with httpx.AsyncClient(timeout=20.0) as client:
+            async with _calendar_client(_client) as client:
                 resp = await client.patch(url, headers=headers, json=payload, params=params)
             resp.raise_for_status()
         except httpx.HTTPStatusError as exc:
@@ -1015,6 +1033,68 @@ async def calendar_cancel_meeting(
     }
 
 
+async def calendar_cancel_meeting_batch(
+    event_ids: Optional[List[str]] = None,
+    confirm: bool = False,
+    cancel_scope: Optional[str] = None,
+    delete: bool = False,
+    timezone_name: Optional[str] = None,
+    **kwargs,
+) -> Dict[str, Any]:
+    """Cancel several events by id over one connection.
+
+    Auth headers are fetched once and every event's GET and PATCH/DELETE go
+    through a single pooled client, so the batch pays one TLS handshake
+    instead of one per event. Each event keeps the same checks as
+    calendar_cancel_meeting (already cancelled, past event, recurring scope).
+    """
+
+    ids = [str(eid).strip() for eid in (event_ids or kwargs.get("ids") or []) if str(eid).strip()]
+    if not ids:
+        return {"success": True, "cancelled_count": 0, "results": [], "message": "No events were selected."}
+
+    headers = await _calendar_auth_headers()
+    if not headers:
+        return {
+            "success": True,
+            "cancelled_count": 0,
+            "results": [],
+            "message": "I can't access your Google Calendar right now. Please reauthorize and try again.",
+        }
+
+    # Keep concurrency modest to stay under Google Calendar's per-user rate limits.
+    sem = asyncio.Semaphore(_CANCEL_BATCH_CONCURRENCY)
+
+    async with httpx.AsyncClient(timeout=20.0) as client:
+
+        async def _cancel_one(eid: str) -> Dict[str, Any]:
+            async with sem:
+                return await calendar_cancel_meeting(
+                    event_id=eid,
+                    confirm=confirm,
+                    cancel_scope=cancel_scope,
+                    delete=delete,
+                    timezone_name=timezone_name,
+                    _client=client,
+                    _headers=headers,
+                )
+
+        results = await asyncio.gather(*(_cancel_one(eid) for eid in ids), return_exceptions=True)
+
+    out: List[Dict[str, Any]] = []
+    for eid, result in zip(ids, results):
+        if isinstance(result, BaseException):
+            logger.warning("Calendar batch cancel failed: event_id=%s err=%r", eid, result)
+            result = {"success": False, "cancelled": False, "error": "GOOGLE_CALENDAR_REQUEST_FAILED", "detail": repr(result)}
+        out.append({"event_id": eid, **result})
+
+    return {
+        "success": True,
+        "cancelled_count": sum(1 for r in out if r.get("cancelled") is True),
+        "results": out,
+    }
+
+
 async def calendar_update_attendees(
     event_id: str = "",
     attendees: List[str] = None,
@@ -242,6 +242,10 @@ async def gmail_label(
 
     Note: Accepts both label names (e.g., "Work") and label IDs (e.g., "Label_123").
           System labels like INBOX, UNREAD, STARRED are used as-is.
+
+    This makes one HTTP request per message. To label many messages, use
+    gmail_batch_modify_labels (src.services.gmail_bulk) instead of calling
+    this in a loop.
     """
     from src.services.gmail_advanced import gmail_resolve_label_id
 
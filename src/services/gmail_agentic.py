@@ -11,6 +11,7 @@ import asyncio
 from datetime import datetime
 
 from .gmail_bulk import (
+    GMAIL_BATCH_MAX_IDS,
     gmail_list_message_ids_page,
     gmail_get_message_metadata_batch,
     gmail_batch_modify_labels,
@@ -465,14 +466,21 @@ async def gmail_agentic_bulk_action(
     if not message_ids:
         return {"success": True, "message": "No matching emails found."}
 
+    # Gmail caps batch calls at GMAIL_BATCH_MAX_IDS ids; one request per chunk.
+    chunks = [
+        message_ids[i : i + GMAIL_BATCH_MAX_IDS]
+        for i in range(0, len(message_ids), GMAIL_BATCH_MAX_IDS)
+    ]
+
     if action == "bulk_delete":
-        result = await gmail_batch_delete_messages(message_ids=message_ids)
-        if not result.get("success"):
-            return {"success": False, "error": str(result.get("error") or "DELETE_FAILED"), "details": result}
-        deleted = ((result.get("data") or {}).get("deleted"))
-        if isinstance(deleted, int) and deleted > 0:
-            return {"success": True, "message": f"Deleted {deleted} email(s)."}
-        return {"success": True, "message": f"Deleted {len(message_ids)} email(s)."}
+        deleted = 0
+        for chunk in chunks:
+            result = await gmail_batch_delete_messages(message_ids=chunk)
+            if not result.get("success"):
+                return {"success": False, "error": str(result.get("error") or "DELETE_FAILED"), "details": result}
+            chunk_deleted = ((result.get("data") or {}).get("deleted"))
+            deleted += chunk_deleted if isinstance(chunk_deleted, int) else len(chunk)
+        return {"success": True, "message": f"Deleted {deleted} email(s)."}
 
     add_labels_raw: List[Any] = []
     remove_labels_raw: List[Any] = []
@@ -498,14 +506,15 @@ async def gmail_agentic_bulk_action(
     if not add_label_ids and not remove_label_ids:
         return {"success": False, "error": "NO_LABEL_CHANGES_SPECIFIED"}
 
-    mod = await gmail_batch_modify_labels(
-        message_ids=message_ids,
-        add_label_ids=add_label_ids,
-        remove_label_ids=remove_label_ids,
-    )
-    if not mod.get("success"):
-        return {"success": False, "error": str(mod.get("error") or "MODIFY_FAILED"), "details": mod}
-    modified = ((mod.get("data") or {}).get("modified"))
-    if isinstance(modified, int) and modified > 0:
-        return {"success": True, "message": f"Updated {modified} email(s)."}
-    return {"success": True, "message": f"Updated {len(message_ids)} email(s)."}
+    modified = 0
+    for chunk in chunks:
+        mod = await gmail_batch_modify_labels(
+            message_ids=chunk,
+            add_label_ids=add_label_ids,
+            remove_label_ids=remove_label_ids,
+        )
+        if not mod.get("success"):
+            return {"success": False, "error": str(mod.get("error") or "MODIFY_FAILED"), "details": mod}
+        chunk_modified = ((mod.get("data") or {}).get("modified"))
+        modified += chunk_modified if isinstance(chunk_modified, int) else len(chunk)
+    return {"success": True, "message": f"Updated {modified} email(s)."}
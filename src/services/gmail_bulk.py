@@ -19,6 +19,9 @@ import httpx
 
 from src.services.gmail import _gmail_auth_headers, _gmail_user_id
 
+# Gmail batchModify/batchDelete accept at most 1000 message IDs per request.
+GMAIL_BATCH_MAX_IDS = 1000
+
 
 async def gmail_list_message_ids_page(
     *,
@@ -106,6 +109,8 @@ async def gmail_batch_modify_labels(
         - This function performs at most ONE HTTP request.
         - Gmail batchModify does not provide per-message status. If the request
           fails, the caller should mark each message as failed with the same error.
+        - At most GMAIL_BATCH_MAX_IDS ids are accepted per call; callers with
+          more ids must chunk them.
     """
 
     headers = await _gmail_auth_headers()
@@ -4,8 +4,10 @@ This module provides an abstraction for speech-to-text using OpenAI models.
 TODO: Implement audio download, conversion, and transcription calls.
 """
 
+from pathlib import Path
 from typing import Any, Dict
 
+import asyncio
 import logging
 import os
 import tempfile
@@ -23,7 +25,7 @@ class WhisperService:
     async def transcribe(self, audio_bytes: bytes, **kwargs: Any) -> Dict[str, Any]:
         """Transcribe audio into text using the low-level bytes helper."""
 
-        text = _transcribe_audio_bytes(audio_bytes)
+        text = await asyncio.to_thread(_transcribe_audio_bytes, audio_bytes)
         return {"text": text}
 
 
@@ -71,28 +73,38 @@ def _transcribe_audio_bytes(audio_bytes: bytes) -> str:
         return "TRANSCRIPTION_ERROR"
 
 
-async def transcribe_audio(file_path: str) -> Dict[str, Any]:
-    """Transcribe an audio file from disk and return a normalized result.
+async def transcribe_audio_bytes(audio_bytes: bytes) -> Dict[str, Any]:
+    """Transcribe in-memory audio and return a normalized result.
 
-    Returns a dict of the form::
+    The synchronous OpenAI call runs in a worker thread so the event loop
+    keeps serving other requests while Whisper works. Returns a dict of the
+    form::
 
         {"success": bool, "text": str | None, "error": str | None}
     """
 
+    text = await asyncio.to_thread(_transcribe_audio_bytes, audio_bytes)
+    if text in {"TRANSCRIPTION_ERROR", "TRANSCRIPTION_EMPTY"}:
+        return {"success": False, "text": None, "error": text}
+
+    return {"success": True, "text": text, "error": None}
+
+
+async def transcribe_audio(file_path: str) -> Dict[str, Any]:
+    """Transcribe an audio file from disk and return a normalized result.
+
+    Returns the same shape as :func:`transcribe_audio_bytes`.
+    """
+
     logger = logging.getLogger("jarvis.whisper")
 
     try:
-        with open(file_path, "rb") as f:
-            audio_bytes = f.read()
+        audio_bytes = await asyncio.to_thread(Path(file_path).read_bytes)
     except OSError as exc:  # noqa: BLE001
         logger.error("[JARVIS-WHISPER] Failed to read audio file %s: %r", file_path, exc)
         return {"success": False, "text": None, "error": f"FILE_READ_ERROR: {exc!r}"}
 
-    text = _transcribe_audio_bytes(audio_bytes)
-    if text in {"TRANSCRIPTION_ERROR", "TRANSCRIPTION_EMPTY"}:
-        return {"success": False, "text": None, "error": text}
-
-    return {"success": True, "text": text, "error": None}
+    return await transcribe_audio_bytes(audio_bytes)
 
 
 async def transcribe_audio_tool(file_path: str) -> Dict[str, Any]:
@@ -4,11 +4,18 @@ This module centralizes logger configuration for the application.
 TODO: Implement file-based handlers.
 """
 
-import json
 import logging
 import uuid
+from contextvars import ContextVar
 from typing import Optional
 
+import orjson
+
+
+# Correlation id for the request currently being handled. Set by the HTTP
+# middleware in main.py and inherited by any tasks spawned while handling it.
+REQUEST_ID: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
 
 def get_logger(name: Optional[str] = None) -> logging.Logger:
     """Return a configured logger instance.
@@ -50,16 +57,55 @@ def _format_structured_message(
     request_id: Optional[str] = None,
     extra: Optional[dict] = None,
 ) -> str:
-    """Format a log message as a JSON-like structured string."""
+    """Format a log message as a JSON-like structured string.
+
+    When request_id is not passed explicitly, the current REQUEST_ID context
+    value is used.
+    """
 
     payload: dict = {"message": message}
     if user_id is not None:
         payload["user_id"] = user_id
+    if request_id is None:
+        request_id = REQUEST_ID.get()
     if request_id is not None:
         payload["request_id"] = request_id
     if extra:
         payload["extra"] = extra
-    return json.dumps(payload, default=str)
+    return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def is_debug_enabled() -> bool:
+    """Return True when DEBUG output is enabled for Jarvis loggers.
+
+    The log_* helpers pin the level of the jarvis.telegram logger, so this
+    checks the parent "jarvis" logger instead.
+    """
+
+    return get_logger().isEnabledFor(logging.DEBUG)
+
+
+def log_debug(
+    msg: str,
+    user_id: Optional[str] = None,
+    request_id: Optional[str] = None,
+    **extra: object,
+) -> None:
+    """Log a debug message for Telegram-related activity.
+
+    Formatting is skipped entirely unless is_debug_enabled() is True, so
+    callers may pass large payloads without paying to serialize them.
+    """
+
+    if not is_debug_enabled():
+        return
+    structured = _format_structured_message(
+        _format_telegram_message(msg),
+        user_id=user_id,
+        request_id=request_id,
+        extra=extra or None,
+    )
+    get_logger().debug(structured)
 
 
 def log_info(
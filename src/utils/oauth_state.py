@@ -0,0 +1,94 @@
+"""OAuth state storage for the Google setup flow.
+
+The `/oauth/start` endpoint issues a random `state` token which must be
+presented back on `/oauth2/callback`. Tokens are kept in a bounded,
+expiring in-memory store by default. When REDIS_URL is set, a Redis-backed
+store is used instead so callbacks succeed across multiple workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+OAUTH_STATE_MAX = int(os.getenv("OAUTH_STATE_MAX", "10000"))
+OAUTH_STATE_TTL = int(os.getenv("OAUTH_STATE_TTL", "600"))
+
+_REDIS_KEY_PREFIX = "jarvis:oauth_state:"
+
+# In-memory store: state -> expiry timestamp (monotonic seconds). An
+# OrderedDict keeps reaching the oldest entry O(1) even after many deletions
+# from the front, which a plain dict's iterator has to skip over.
+_states: "OrderedDict[str, float]" = OrderedDict()
+_lock = asyncio.Lock()
+_redis = None
+
+
+def _get_redis():
+    """Return a lazily created Redis client, or None when REDIS_URL is unset."""
+
+    global _redis
+    if _redis is not None:
+        return _redis
+
+    url = os.getenv("REDIS_URL")
+    if not url:
+        return None
+
+    from redis import asyncio as redis_asyncio
+
+    _redis = redis_asyncio.Redis.from_url(url)
+    return _redis
+
+
+def _purge_expired(now: float) -> None:
+    """Drop expired states from the in-memory store."""
+
+    # Insertion order matches expiry order because the TTL is fixed, so only
+    # the expired prefix is visited; the store itself is never copied.
+    while _states:
+        state = next(iter(_states))
+        if _states[state] > now:
+            break
+        del _states[state]
+
+
+async def add_state(state: str) -> bool:
+    """Store a freshly issued state token.
+
+    Returns False when the store is at capacity; the caller should reject
+    the request rather than grow memory without bound.
+    """
+
+    redis_client = _get_redis()
+    if redis_client is not None:
+        return bool(await redis_client.set(_REDIS_KEY_PREFIX + state, "", ex=OAUTH_STATE_TTL, nx=True))
+
+    async with _lock:
+        now = time.monotonic()
+        _purge_expired(now)
+        if len(_states) >= OAUTH_STATE_MAX:
+            return False
+        _states[state] = now + OAUTH_STATE_TTL
+        return True
+
+
+async def consume_state(state: Optional[str]) -> bool:
+    """Atomically check and remove a state token.
+
+    Returns True only if the state was issued and has not expired.
+    """
+
+    if not state:
+        return False
+
+    redis_client = _get_redis()
+    if redis_client is not None:
+        return await redis_client.getdel(_REDIS_KEY_PREFIX + state) is not None
+
+    async with _lock:
+        expires_at = _states.pop(state, None)
+        return expires_at is not None and expires_at > time.monotonic()
@@ -0,0 +1,336 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import orjson
+
+import src.core.agent as agent_mod
+
+_GUARDS = (
+    "handle_gmail_delete_turn",
+    "handle_gmail_mark_read_turn",
+    "handle_gmail_spam_clean_turn",
+    "handle_gmail_send_turn",
+    "handle_calendar_note_turn",
+    "handle_calendar_cancel_turn",
+)
+
+
+class TestAgentGuardFlows(unittest.TestCase):
+    def _run_agent(self, parallel, replies):
+        mocks = {name: AsyncMock(return_value=replies.get(name)) for name in _GUARDS}
+
+        async def run():
+            with patch.multiple(
+                agent_mod,
+                _PARALLEL_GUARD_FLOWS=parallel,
+                _update_memory_background=AsyncMock(),
+                **mocks,
+            ):
+                return await agent_mod.agent(424242, "mark them read")
+
+        return asyncio.run(run()), mocks
+
+    def test_sequential_stops_at_first_reply(self):
+        reply, mocks = self._run_agent(False, {"handle_gmail_mark_read_turn": " Marked 3 as read. "})
+        self.assertEqual(reply, "Marked 3 as read.")
+        mocks["handle_gmail_delete_turn"].assert_awaited_once()
+        mocks["handle_gmail_send_turn"].assert_not_awaited()
+
+    def test_parallel_keeps_priority_order(self):
+        reply, mocks = self._run_agent(
+            True,
+            {
+                "handle_gmail_spam_clean_turn": {"status": "completed", "movedCount": 2},
+                "handle_calendar_cancel_turn": "Cancelled the event.",
+            },
+        )
+        self.assertEqual(reply, "Moved 2 spam emails to Trash.")
+        for mock in mocks.values():
+            mock.assert_awaited_once()
+
+    def test_guard_failure_returns_its_error_reply(self):
+        mocks = {name: AsyncMock(return_value=None) for name in _GUARDS}
+        mocks["handle_gmail_delete_turn"].side_effect = RuntimeError("boom")
+
+        async def run():
+            with patch.multiple(agent_mod, **mocks):
+                return await agent_mod.agent(424242, "delete everything")
+
+        self.assertEqual(asyncio.run(run()), "Error during Gmail delete handling. Nothing was changed.")
+        mocks["handle_gmail_mark_read_turn"].assert_not_awaited()
+
+
+    def test_memory_updates_are_tracked_until_done(self):
+        update = AsyncMock()
+
+        async def run():
+            with patch.object(agent_mod, "_update_memory_background", update):
+                agent_mod._spawn_memory_update("424242", "hi", "hello", "req-1")
+                self.assertEqual(len(agent_mod._BG_TASKS), 1)
+                await asyncio.gather(*agent_mod._BG_TASKS)
+                await asyncio.sleep(0)
+                self.assertEqual(len(agent_mod._BG_TASKS), 0)
+
+        asyncio.run(run())
+        update.assert_awaited_once_with(user_id_str="424242", message="hi", final_text="hello", request_id="req-1")
+
+    def test_drain_waits_for_in_flight_memory_updates(self):
+        done = []
+
+        async def slow_update(**kwargs):
+            await asyncio.sleep(0.01)
+            done.append(kwargs["user_id_str"])
+
+        async def run():
+            with patch.object(agent_mod, "_update_memory_background", slow_update):
+                agent_mod._spawn_memory_update("424242", "hi", "hello")
+                await agent_mod.drain_background_tasks(timeout=1)
+
+        asyncio.run(run())
+        self.assertEqual(done, ["424242"])
+
+    def test_memory_appends_run_before_summary(self):
+        calls = []
+
+        async def append(user_id, role, content):
+            calls.append(role)
+
+        async def recent(user_id, limit):
+            calls.append("recent")
+            return []
+
+        summarize = AsyncMock()
+
+        async def run():
+            with patch.multiple(
+                agent_mod,
+                append_message=append,
+                get_recent_messages=recent,
+                update_long_term_memory=summarize,
+            ):
+                with patch.dict(agent_mod._SUMMARY_TURN_COUNTS, {"424242": agent_mod._SUMMARY_EVERY_N - 1}):
+                    await agent_mod._update_memory_background("424242", "hi", "hello")
+
+        asyncio.run(run())
+        self.assertEqual(sorted(calls[:2]), ["assistant", "user"])
+        self.assertEqual(calls[2], "recent")
+        summarize.assert_awaited_once_with("424242", [])
+
+    def test_summary_rebuilds_every_nth_turn(self):
+        summarize = AsyncMock()
+
+        async def run():
+            with patch.multiple(
+                agent_mod,
+                append_message=AsyncMock(),
+                get_recent_messages=AsyncMock(return_value=[]),
+                update_long_term_memory=summarize,
+                _SUMMARY_EVERY_N=3,
+                _SUMMARY_TURN_COUNTS={},
+            ):
+                for _ in range(7):
+                    await agent_mod._update_memory_background("424242", "hi", "hello")
+
+        asyncio.run(run())
+        self.assertEqual(summarize.await_count, 2)
+
+    def test_memory_append_failure_skips_summary(self):
+        summarize = AsyncMock()
+
+        async def run():
+            with patch.multiple(
+                agent_mod,
+                append_message=AsyncMock(side_effect=RuntimeError("pool exhausted")),
+                update_long_term_memory=summarize,
+            ):
+                await agent_mod._update_memory_background("424242", "hi", "hello")
+
+        asyncio.run(run())
+        summarize.assert_not_awaited()
+
+
+class TestBoundedDumps(unittest.TestCase):
+    def test_small_results_match_orjson(self):
+        result = {"ok": True, 1: "é", "cards": [{"id": "a", "labels": []}, ("x", None)], "empty": {}}
+        self.assertEqual(
+            agent_mod._bounded_dumps(result),
+            orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS).decode(),
+        )
+
+    def test_large_results_are_a_truncated_prefix(self):
+        result = {"cards": [{"id": i, "name": "card é %d" % i} for i in range(2000)]}
+        full = orjson.dumps(result).decode()
+        content = agent_mod._bounded_dumps(result)
+        self.assertTrue(content.endswith("...[truncated]"))
+        body = content[: -len("...[truncated]")]
+        self.assertTrue(full.startswith(body))
+        self.assertLessEqual(len(body.encode()), agent_mod._MAX_TOOL_CONTENT_BYTES)
+
+    def test_long_strings_are_cut_before_encoding(self):
+        result = {"body": "é" * 50000}
+        with patch.object(agent_mod.orjson, "dumps", wraps=orjson.dumps) as dumps:
+            content = agent_mod._bounded_dumps(result)
+        self.assertNotIn(result["body"], [c.args[0] for c in dumps.call_args_list])
+        self.assertEqual(content, orjson.dumps(result)[:8000].decode(errors="ignore") + "...[truncated]")
+
+
+class TestToolSchemaIndex(unittest.TestCase):
+    def test_first_schema_per_name_wins_and_malformed_entries_are_skipped(self):
+        first = {"type": "function", "function": {"name": "echo"}}
+        schemas = [first, {"function": {"name": "echo", "x": 1}}, {"function": None}, "junk", {"function": {"name": "trello_dispatch"}}]
+        index = agent_mod._index_tool_schemas(schemas)
+        self.assertIs(index["echo"], first)
+        self.assertEqual(sorted(index), ["echo", "trello_dispatch"])
+        self.assertEqual(agent_mod._index_tool_schemas(None), {})
+
+
+class TestTrelloReroute(unittest.TestCase):
+    def _reroute(self, tool_name, args):
+        return agent_mod._reroute_trello_args(agent_mod._TRELLO_REROUTE[tool_name], args)
+
+    def test_move_renames_list_id_and_defaults_required_keys(self):
+        self.assertEqual(
+            self._reroute("trello_move_card", {"list_id": "L1", "board_id": None}),
+            {"action": "move", "card_id": "", "to_list_id": "L1"},
+        )
+
+    def test_archive_copies_only_set_optional_keys(self):
+        self.assertEqual(
+            self._reroute("trello_archive_card", {"card_name": "Invoice", "confirm": False, "board_id": None, "extra": 1}),
+            {"action": "archive", "card_name": "Invoice", "confirm": False},
+        )
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_plain_replies_are_reused_for_identical_messages(self):
+        guards = {name: AsyncMock(return_value=None) for name in _GUARDS}
+        llm = AsyncMock(return_value={"type": "message", "content": "Paris."})
+
+        async def run():
+            with patch.multiple(
+                agent_mod,
+                build_context=AsyncMock(return_value={"messages": [], "tool_schemas": []}),
+                call_llm=llm,
+                _update_memory_background=AsyncMock(),
+                _RESPONSE_CACHE_TTL=300,
+                _RESPONSE_CACHE={},
+                **guards,
+            ):
+                first = await agent_mod.agent(424242, "Capital of France?")
+                second = await agent_mod.agent(424242, " Capital of France? ")
+                other_user = await agent_mod.agent(7, "Capital of France?")
+                return first, second, other_user
+
+        self.assertEqual(asyncio.run(run()), ("Paris.", "Paris.", "Paris."))
+        self.assertEqual(llm.await_count, 2)
+
+    def test_expired_and_excess_entries_are_evicted(self):
+        with patch.multiple(agent_mod, _RESPONSE_CACHE={}, _RESPONSE_CACHE_MAX=2, _RESPONSE_CACHE_TTL=300):
+            for i in range(3):
+                agent_mod._store_response(("u", i), str(i))
+            self.assertEqual(list(agent_mod._RESPONSE_CACHE), [("u", 1), ("u", 2)])
+            agent_mod._RESPONSE_CACHE[("u", 1)] = (0.0, "stale")
+            self.assertIsNone(agent_mod._cached_response(("u", 1)))
+            self.assertEqual(agent_mod._cached_response(("u", 2)), "2")
+
+
+class TestMultipleToolCalls(unittest.TestCase):
+    def _run(self, run_tool, llm_results):
+        guards = {name: AsyncMock(return_value=None) for name in _GUARDS}
+        llm = self.llm = AsyncMock(side_effect=llm_results)
+        messages = []
+
+        async def run():
+            with patch.multiple(
+                agent_mod,
+                build_context=AsyncMock(return_value={"messages": messages, "tool_schemas": []}),
+                call_llm=llm,
+                run_tool=run_tool,
+                _update_memory_background=AsyncMock(),
+                **guards,
+            ):
+                return await agent_mod.agent(424242, "time and echo please")
+
+        return asyncio.run(run()), messages
+
+    def test_calls_run_concurrently_and_are_recorded_in_order(self):
+        started = []
+
+        async def run_tool(name, args, user_id=None):
+            started.append(name)
+            await asyncio.sleep(0.01 if name == "get_current_utc_time" else 0)
+            # Both calls must be in flight before either finishes.
+            self.assertEqual(len(started), 2)
+            return {"tool": name}
+
+        calls = [
+            {"id": "a", "name": "get_current_utc_time", "arguments": {}, "raw_arguments": "{}"},
+            {"id": "b", "name": "echo", "arguments": {"text": "hi"}, "raw_arguments": '{"text": "hi"}'},
+        ]
+        reply, messages = self._run(
+            run_tool,
+            [{"type": "tool", "tool_calls": calls}, {"type": "message", "content": "Done."}],
+        )
+        self.assertEqual(reply, "Done.")
+        self.assertEqual([c["id"] for c in messages[0]["tool_calls"]], ["a", "b"])
+        self.assertEqual(messages[0]["tool_calls"][1]["function"]["arguments"], '{"text": "hi"}')
+        self.assertEqual([(m["tool_call_id"], m["content"]) for m in messages[1:]], [
+            ("a", '{"tool":"get_current_utc_time"}'),
+            ("b", '{"tool":"echo"}'),
+        ])
+
+    def test_trello_dispatch_skips_the_confidence_check(self):
+        async def run_tool(name, args, user_id=None):
+            return {"ok": True}
+
+        calls = [{"id": "a", "name": "trello_move_card", "arguments": {"card_id": "c"}}]
+        with patch.object(agent_mod, "cached_tool_confidence") as confidence:
+            reply, messages = self._run(run_tool, [{"type": "tool", "tool_calls": calls}, {"type": "message", "content": "Moved."}])
+        confidence.assert_not_called()
+        self.assertEqual(reply, "Moved.")
+        self.assertEqual(messages[0]["tool_calls"][0]["function"]["name"], "trello_dispatch")
+
+    def test_single_confirmation_ends_the_turn(self):
+        async def run_tool(name, args, user_id=None):
+            return {"status": "confirmation_required", "message": f"Confirm {name}?", "data": {}}
+
+        calls = [{"id": "a", "name": "echo", "arguments": {}}]
+        with patch.object(agent_mod, "_set_pending_tool_confirm") as set_pending:
+            reply, _ = self._run(run_tool, [{"type": "tool", "tool_calls": calls}])
+        self.assertEqual(reply, "Confirm echo?")
+        set_pending.assert_called_once()
+
+    def test_confirmation_among_several_calls_keeps_every_result(self):
+        async def run_tool(name, args, user_id=None):
+            if name == "get_current_utc_time":
+                raise RuntimeError("clock down")
+            if name == "echo":
+                return {"success": True, "message": "echoed"}
+            return {"status": "confirmation_required", "message": f"Confirm {name}?", "data": {}}
+
+        calls = [
+            {"id": "a", "name": "echo", "arguments": {}},
+            {"id": "b", "name": "get_current_utc_time", "arguments": {}},
+            {"id": "c", "name": "gmail_delete_label", "arguments": {}},
+            {"id": "d", "name": "trello_delete_card", "arguments": {}},
+        ]
+        llm = [{"type": "tool", "tool_calls": calls}, {"type": "message", "content": "Echoed. Confirm delete?"}]
+        with patch.object(agent_mod, "_set_pending_tool_confirm") as set_pending, patch.object(
+            agent_mod, "cached_tool_confidence", return_value=SimpleNamespace(score=100, awaiting="", question="")
+        ):
+            reply, messages = self._run(run_tool, llm)
+
+        self.assertEqual(reply, "Echoed. Confirm delete?")
+        set_pending.assert_called_once()
+        self.assertEqual(set_pending.call_args.args[1]["tool_name"], "gmail_delete_label")
+        contents = {m["tool_call_id"]: m["content"] for m in messages[1:]}
+        self.assertIn("echoed", contents["a"])
+        self.assertIn("TOOL_EXECUTION_FAILED", contents["b"])
+        self.assertIn("Confirm gmail_delete_label?", contents["c"])
+        self.assertIn("deferred", contents["d"])
+        self.assertIsNone(self.llm.await_args.kwargs["tools"])
+
+if __name__ == "__main__":
+    unittest.main()
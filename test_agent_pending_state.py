@@ -0,0 +1,142 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from threading import Lock
+from unittest.mock import AsyncMock, patch
+
+import orjson
+
+import src.core.agent as agent_mod
+
+
+class TestPendingStateWriteBehind(unittest.TestCase):
+    def test_writes_are_coalesced_into_one_flush(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            store = {}
+            stores = {"tool_confirm": (store, agent_mod._lock_stripes(), directory)}
+
+            async def run():
+                with patch.object(agent_mod, "_PENDING_STORES", stores), patch.object(
+                    agent_mod, "_PENDING_TOOL_CONFIRM", store
+                ), patch.object(
+                    agent_mod, "_flush_pending_state", wraps=agent_mod._flush_pending_state
+                ) as flush:
+                    agent_mod._set_pending_tool_confirm("1", {"tool_name": "a"})
+                    agent_mod._set_pending_tool_confirm("2", {"tool_name": "b"})
+                    agent_mod._clear_pending_tool_confirm("1")
+                    self.assertEqual(list(directory.iterdir()), [])
+
+                    await asyncio.sleep(agent_mod._PENDING_FLUSH_DELAY * 4)
+                    self.assertEqual(flush.call_count, 1)
+
+            asyncio.run(run())
+            self.assertEqual(sorted(p.name for p in directory.iterdir()), ["2.json"])
+            self.assertEqual(orjson.loads((directory / "2.json").read_bytes()), {"tool_name": "b"})
+
+    def test_flushes_immediately_without_running_loop(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            store = {}
+            stores = {"tool_confirm": (store, agent_mod._lock_stripes(), directory)}
+
+            with patch.object(agent_mod, "_PENDING_STORES", stores), patch.object(
+                agent_mod, "_PENDING_TOOL_CONFIRM", store
+            ):
+                agent_mod._set_pending_tool_confirm("7", {"tool_name": "x"})
+                self.assertEqual(orjson.loads((directory / "7.json").read_bytes()), {"tool_name": "x"})
+
+                agent_mod._clear_pending_tool_confirm("7")
+                self.assertFalse((directory / "7.json").exists())
+
+    def test_flush_serializes_off_the_event_loop_thread(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = {}
+            stores = {"tool_confirm": (store, agent_mod._lock_stripes(), Path(tmp))}
+            dumps_threads = []
+            real_dumps = agent_mod._dumps_pending_entry
+
+            def dumps(entry):
+                dumps_threads.append(threading.get_ident())
+                return real_dumps(entry)
+
+            async def run():
+                with patch.object(agent_mod, "_PENDING_STORES", stores), patch.object(
+                    agent_mod, "_PENDING_TOOL_CONFIRM", store
+                ), patch.object(agent_mod, "_dumps_pending_entry", side_effect=dumps):
+                    agent_mod._set_pending_tool_confirm("3", {"tool_name": "a"})
+                    await asyncio.sleep(agent_mod._PENDING_FLUSH_DELAY * 4)
+
+            asyncio.run(run())
+            self.assertEqual(len(dumps_threads), 1)
+            self.assertNotEqual(dumps_threads[0], threading.get_ident())
+
+
+class TestPendingStateLoad(unittest.TestCase):
+    def test_files_are_loaded_through_normalize(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp) / "pending"
+            directory.mkdir()
+            (directory / "1.json").write_bytes(orjson.dumps({"awaiting": "details"}))
+            (directory / "2.json").write_bytes(orjson.dumps({"awaiting": "title"}))
+            target = {}
+
+            agent_mod._load_pending(
+                directory,
+                Path(tmp) / "legacy.json",
+                target,
+                Lock(),
+                agent_mod._normalize_pending_confidence_clarify,
+            )
+
+            self.assertEqual(target, {"2": {"awaiting": "title"}})
+
+    def test_legacy_single_file_is_migrated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp) / "pending"
+            legacy = Path(tmp) / "pending.json"
+            legacy.write_bytes(orjson.dumps({"5": {"tool_name": ""}}))
+            target = {}
+
+            agent_mod._load_pending(
+                directory, legacy, target, Lock(), agent_mod._normalize_pending_trello_dispatch
+            )
+
+            self.assertEqual(target, {"5": {"tool_name": "trello_dispatch"}})
+            self.assertFalse(legacy.exists())
+            self.assertEqual(orjson.loads((directory / "5.json").read_bytes()), {"tool_name": "trello_dispatch"})
+
+
+class TestPendingResume(unittest.TestCase):
+    def _confirm(self, run_tool):
+        store = {"99": {"tool_name": "gmail_delete", "tool_args": {"ids": ["a"]}}}
+
+        async def run():
+            with patch.multiple(
+                agent_mod,
+                _PENDING_TOOL_CONFIRM=store,
+                _save_pending_tool_confirm=lambda uid_key: None,
+                _spawn_memory_update=lambda **kwargs: None,
+                run_tool=run_tool,
+            ):
+                return await agent_mod.agent(99, "YES")
+
+        return asyncio.run(run()), store
+
+    def test_confirmed_tool_runs_and_clears_pending(self):
+        run_tool = AsyncMock(return_value={"message": " Deleted 1 email. "})
+        reply, store = self._confirm(run_tool)
+        self.assertEqual(reply, "Deleted 1 email.")
+        self.assertEqual(store, {})
+        run_tool.assert_awaited_once_with("gmail_delete", {"ids": ["a"], "confirm": True}, 99)
+
+    def test_failed_tool_clears_pending_and_apologizes(self):
+        reply, store = self._confirm(AsyncMock(side_effect=RuntimeError("boom")))
+        self.assertEqual(reply, "Sorry, I ran into an error while executing that confirmed action.")
+        self.assertEqual(store, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+
+def _gmail_state(message_buffer, page_token, total):
+    return {
+        "op_id": "op1",
+        "domain": "gmail",
+        "action": "archive",
+        "batch_size": 5,
+        "total": total,
+        "processed": 0,
+        "remaining_items": [],
+        "metadata": {
+            "prepared_context": {
+                "tool_name": "gmail",
+                "action": "archive",
+                "query_params": {"gmail_query": "from:a@b.com"},
+                "action_params": {},
+            },
+            "cursor": {"page_token": page_token, "message_buffer": message_buffer},
+        },
+    }
+
+
+class TestBulkGatePrefetch(unittest.TestCase):
+    def test_next_page_is_prefetched_during_batch_modify(self):
+        async def run():
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+            from src.core.bulk_gate import check_bulk_gate
+
+            next_page = {
+                "success": True,
+                "data": {"message_ids": ["m6", "m7"], "next_page_token": None, "result_size_estimate": 7},
+            }
+            list_mock = AsyncMock(return_value=next_page)
+            modify_mock = AsyncMock(return_value={"success": True, "data": {"modified": 5}})
+
+            state = _gmail_state(["m1", "m2", "m3", "m4", "m5"], "t1", 7)
+            with patch("src.adapters.gmail_bulk_adapter.gmail_list_message_ids_page", list_mock), patch(
+                "src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", modify_mock
+            ):
+                result = await check_bulk_gate("continue", state, GmailBulkAdapter())
+
+            self.assertTrue(result["handled"])
+            self.assertEqual(modify_mock.await_count, 1)
+            self.assertEqual(list_mock.await_count, 1)
+            self.assertEqual(list_mock.await_args.kwargs["page_token"], "t1")
+
+            md = result["new_state"]["metadata"]
+            self.assertEqual(md["cursor"], {"page_token": None, "message_buffer": ["m6", "m7"]})
+            self.assertNotIn("metadata", md["prepared_context"])
+
+        asyncio.run(run())
+
+    def test_no_second_list_call_when_page_fetched_this_turn(self):
+        async def run():
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+            from src.core.bulk_gate import check_bulk_gate
+
+            page = {
+                "success": True,
+                "data": {"message_ids": ["m1", "m2", "m3"], "next_page_token": "t2", "result_size_estimate": 20},
+            }
+            list_mock = AsyncMock(return_value=page)
+            modify_mock = AsyncMock(return_value={"success": True, "data": {"modified": 5}})
+
+            state = _gmail_state(["m0"], "t1", 20)
+            with patch("src.adapters.gmail_bulk_adapter.gmail_list_message_ids_page", list_mock), patch(
+                "src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", modify_mock
+            ):
+                result = await check_bulk_gate("continue", state, GmailBulkAdapter())
+
+            self.assertEqual(list_mock.await_count, 1)
+            self.assertEqual(result["new_state"]["metadata"]["cursor"]["page_token"], "t2")
+
+        asyncio.run(run())
+
+    def test_initiate_stores_count_and_cursor(self):
+        async def run():
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+            from src.core.bulk_gate import initiate_bulk_operation
+
+            page = {
+                "success": True,
+                "data": {"message_ids": ["m1", "m2"], "next_page_token": "t1", "result_size_estimate": 12},
+            }
+            list_mock = AsyncMock(return_value=page)
+            with patch("src.adapters.gmail_bulk_adapter.gmail_list_message_ids_page", list_mock):
+                result = await initiate_bulk_operation(
+                    GmailBulkAdapter(), {"action": "archive", "query_type": "sender", "query_value": "a@b.com"}, batch_size=5
+                )
+
+            self.assertTrue(result["success"])
+            state = result["state"]
+            self.assertEqual(state["remaining_items"], [])
+            self.assertEqual(state["total"], 12)
+            self.assertEqual(state["metadata"]["cursor"], {"page_token": "t1", "message_buffer": ["m1", "m2"]})
+
+        asyncio.run(run())
+
+    def test_last_batch_does_not_prefetch(self):
+        async def run():
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+            from src.core.bulk_gate import check_bulk_gate
+
+            list_mock = AsyncMock()
+            modify_mock = AsyncMock(return_value={"success": True, "data": {"modified": 5}})
+
+            state = _gmail_state(["m1", "m2", "m3", "m4", "m5"], "t1", 5)
+            with patch("src.adapters.gmail_bulk_adapter.gmail_list_message_ids_page", list_mock), patch(
+                "src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", modify_mock
+            ):
+                result = await check_bulk_gate("continue", state, GmailBulkAdapter())
+
+            self.assertTrue(result["clear_state"])
+            self.assertEqual(modify_mock.await_count, 1)
+            list_mock.assert_not_awaited()
+
+        asyncio.run(run())
+
+    def test_legacy_top_level_cursor_is_read(self):
+        async def run():
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+            from src.core.bulk_gate import check_bulk_gate
+
+            modify_mock = AsyncMock(return_value={"success": True, "data": {"modified": 5}})
+            state = _gmail_state(None, None, 7)
+            state["metadata"].update(state["metadata"].pop("cursor"))
+            state["metadata"]["message_buffer"] = [f"m{i}" for i in range(1, 8)]
+            with patch("src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", modify_mock):
+                result = await check_bulk_gate("continue", state, GmailBulkAdapter())
+
+            self.assertEqual(modify_mock.await_args.kwargs["message_ids"], ["m1", "m2", "m3", "m4", "m5"])
+            self.assertEqual(result["new_state"]["metadata"]["cursor"]["message_buffer"], ["m6", "m7"])
+
+        asyncio.run(run())
+
+    def test_final_batch_skips_state_serialization(self):
+        async def run():
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+            from src.controllers.bulk_operations import BulkOperationState
+            from src.core.bulk_gate import check_bulk_gate
+
+            modify_mock = AsyncMock(return_value={"success": True, "data": {"modified": 2}})
+            state = _gmail_state(["m1", "m2"], None, 2)
+            with patch("src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", modify_mock), patch.object(
+                BulkOperationState, "to_dict", autospec=True, side_effect=BulkOperationState.to_dict
+            ) as to_dict:
+                result = await check_bulk_gate("continue", state, GmailBulkAdapter())
+
+            self.assertTrue(result["clear_state"])
+            self.assertIsNone(result["new_state"])
+            to_dict.assert_not_called()
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from src.agents.bulk_intent_router import (
+    _classify_cached,
+    classify_bulk_intent,
+    requires_bulk_cancellation,
+    requires_bulk_continuation,
+)
+
+
+class TestBulkIntentRouter(unittest.TestCase):
+    def test_continue_phrases(self):
+        for msg in ("continue", "Yes, go ahead", "  OK  ", "keep going please", "yep"):
+            self.assertEqual(classify_bulk_intent(msg), "continue", msg)
+
+    def test_cancel_phrases(self):
+        for msg in ("stop", "CANCEL", "abort", "never mind", "please don't"):
+            self.assertEqual(classify_bulk_intent(msg), "cancel", msg)
+
+    def test_unknown(self):
+        for msg in ("", "what's the weather?", "thanks"):
+            self.assertEqual(classify_bulk_intent(msg), "unknown", msg)
+
+    def test_first_mentioned_intent_wins(self):
+        self.assertEqual(classify_bulk_intent("no, go ahead"), "cancel")
+        self.assertEqual(classify_bulk_intent("yes, cancel"), "continue")
+        self.assertEqual(classify_bulk_intent("please stop, don't continue"), "cancel")
+        self.assertEqual(classify_bulk_intent("hmm okay, never mind"), "continue")
+
+    def test_keywords_match_whole_words_only(self):
+        for msg in ("I know", "snow day", "send it", "good morning", "token", "yesterday", "yes_no"):
+            self.assertEqual(classify_bulk_intent(msg), "unknown", msg)
+
+    def test_wrappers(self):
+        self.assertTrue(requires_bulk_continuation("yes, continue"))
+        self.assertFalse(requires_bulk_continuation("cancel"))
+        self.assertTrue(requires_bulk_cancellation("stop"))
+        self.assertFalse(requires_bulk_cancellation("what time is it?"))
+
+    def test_dual_wrapper_check_classifies_once(self):
+        msg = "ok, carry on with the next batch"
+        _classify_cached.cache_clear()
+        requires_bulk_continuation(msg)
+        requires_bulk_cancellation(msg)
+        info = _classify_cached.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 1))
+
+    def test_exact_replies_skip_cache(self):
+        _classify_cached.cache_clear()
+        self.assertEqual(classify_bulk_intent(" Yes "), "continue")
+        self.assertEqual(classify_bulk_intent("Never Mind"), "cancel")
+        self.assertEqual(_classify_cached.cache_info().currsize, 0)
+
+    def test_case_and_whitespace_variants_share_cache_entry(self):
+        _classify_cached.cache_clear()
+        self.assertEqual(classify_bulk_intent("Yes, go ahead"), "continue")
+        self.assertEqual(classify_bulk_intent("  YES, GO AHEAD "), "continue")
+        info = _classify_cached.cache_info()
+        self.assertEqual((info.misses, info.hits, info.currsize), (1, 1, 1))
+
+    def test_long_messages_bypass_cache(self):
+        pasted = "lorem ipsum " * 100
+        _classify_cached.cache_clear()
+        self.assertEqual(classify_bulk_intent(pasted + "stop"), "cancel")
+        self.assertEqual(classify_bulk_intent(pasted + "go on, then stop"), "continue")
+        self.assertEqual(_classify_cached.cache_info().currsize, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+
+class TestBulkOperationsController(unittest.TestCase):
+    def test_batches_drain_remaining_items(self):
+        async def run():
+            from src.controllers.bulk_operations import (
+                BulkOperationState,
+                continue_bulk_operation,
+                start_bulk_operation,
+            )
+            from src.presenters import present_bulk_errors, present_bulk_status
+
+            started = await start_bulk_operation("gmail", "label", ["a", "b", "c"], batch_size=2)
+            self.assertEqual(started["state"]["remaining_items"], ["a", "b", "c"])
+            self.assertTrue(started["needs_confirmation"])
+
+            seen = []
+
+            async def action(item, meta):
+                seen.append(item)
+                if item == "b":
+                    raise RuntimeError("boom")
+
+            state = BulkOperationState.from_dict(started["state"])
+            first = await continue_bulk_operation(state, action)
+            self.assertEqual(first["processed_this_batch"], 2)
+            self.assertEqual(first["remaining"], 1)
+            self.assertTrue(first["needs_confirmation"])
+            self.assertEqual(first["state"]["remaining_items"], ["c"])
+            self.assertEqual(first["errors"], {"items": ["b"], "messages": ["boom"]})
+            self.assertIn("- b: boom", present_bulk_errors(first["errors"]))
+            self.assertIn("1 item(s) had errors", present_bulk_status(first))
+
+            state = BulkOperationState.from_dict(first["state"])
+            second = await continue_bulk_operation(state, action)
+            self.assertEqual(second["processed_total"], 3)
+            self.assertEqual(second["remaining"], 0)
+            self.assertFalse(second["needs_confirmation"])
+            self.assertIsNone(second["errors"])
+            self.assertEqual(seen, ["a", "b", "c"])
+
+        asyncio.run(run())
+
+    def test_concurrency_limit_caps_in_flight_items(self):
+        async def run():
+            from src.controllers.bulk_operations import (
+                BulkOperationState,
+                continue_bulk_operation,
+                start_bulk_operation,
+            )
+
+            started = await start_bulk_operation("gmail", "label", list(range(6)), batch_size=6)
+            state = BulkOperationState.from_dict(started["state"])
+
+            in_flight = 0
+            peak = 0
+
+            async def action(item, meta):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0)
+                in_flight -= 1
+
+            result = await continue_bulk_operation(state, action, concurrency_limit=2)
+            self.assertEqual(result["processed_this_batch"], 6)
+            self.assertEqual(peak, 2)
+
+        asyncio.run(run())
+
+
+    def test_unserialized_state_round_trip(self):
+        async def run():
+            from src.controllers.bulk_operations import (
+                BulkOperationState,
+                continue_bulk_operation,
+                start_bulk_operation,
+            )
+
+            async def action(item, meta):
+                return item
+
+            started = await start_bulk_operation("gmail", "label", ["a", "b", "c"], batch_size=2, serialize=False)
+            state = started["state"]
+            self.assertIsInstance(state, BulkOperationState)
+
+            result = await continue_bulk_operation(state, action, serialize=False)
+            self.assertIs(result["state"], state)
+            self.assertEqual(list(state.remaining_items), ["c"])
+            self.assertEqual(state.processed, 2)
+
+        asyncio.run(run())
+
+    def test_count_only_operation_stores_no_items(self):
+        async def run():
+            from src.controllers.bulk_operations import BulkOperationState, start_bulk_operation
+
+            started = await start_bulk_operation("gmail", "archive", total=12, batch_size=5)
+            self.assertEqual(started["remaining"], 12)
+            self.assertEqual(started["state"]["remaining_items"], [])
+
+            state = BulkOperationState.from_dict(started["state"])
+            state.processed += 5
+            self.assertEqual(state.remaining, 7)
+        asyncio.run(run())
+
+    def test_count_only_state_is_rejected_by_continue(self):
+        async def run():
+            from src.controllers.bulk_operations import (
+                BulkOperationState,
+                continue_bulk_operation,
+                start_bulk_operation,
+            )
+
+            started = await start_bulk_operation("gmail", "archive", total=12, batch_size=5)
+            state = BulkOperationState.from_dict(started["state"])
+            action = AsyncMock()
+            with self.assertRaises(ValueError):
+                await continue_bulk_operation(state, action)
+            action.assert_not_awaited()
+            self.assertEqual(state.processed, 0)
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import src.core.calendar_cancel_flow as flow
+
+
+class TestCalendarCancelFlow(unittest.TestCase):
+    def test_single_event_uses_the_cancel_tool(self):
+        calls = []
+
+        async def run_tool(name, args, user_id):
+            calls.append(name)
+            return {"cancelled": True}
+
+        async def run():
+            with patch.multiple(flow, run_tool=run_tool, _set=lambda *a: None, _clear=lambda *a: None):
+                return await flow._execute_selected_cancellations(424242, {"cancel_scope": "single"}, ["e1"])
+
+        self.assertEqual(asyncio.run(run()), "Cancelled 1 event(s).")
+        self.assertEqual(calls, ["calendar_cancel_meeting"])
+
+    def test_several_events_use_one_batch_call(self):
+        batch = AsyncMock(return_value={"success": True, "cancelled_count": 2, "results": []})
+        run_tool = AsyncMock()
+
+        async def run():
+            with patch.multiple(
+                flow, calendar_cancel_meeting_batch=batch, run_tool=run_tool, _set=lambda *a: None, _clear=lambda *a: None
+            ):
+                return await flow._execute_selected_cancellations(424242, {"delete": True}, ["e1", "e2", "e3"])
+
+        self.assertEqual(asyncio.run(run()), "Cancelled 2 event(s).")
+        batch.assert_awaited_once_with(event_ids=["e1", "e2", "e3"], confirm=True, cancel_scope=None, delete=True)
+        run_tool.assert_not_awaited()
+
+    def test_batch_cancel_is_not_an_llm_tool(self):
+        from src.core.tools import get_tool_schemas
+
+        names = {schema["function"]["name"] for schema in get_tool_schemas()}
+        self.assertIn("calendar_cancel_meeting", names)
+        self.assertNotIn("calendar_cancel_meeting_batch", names)
+
+    def test_batch_tool_shares_auth_and_client(self):
+        import src.services.calendar_advanced as cal
+
+        seen = []
+
+        async def cancel_one(**kwargs):
+            seen.append((kwargs["event_id"], kwargs["_client"], kwargs["_headers"]))
+            if kwargs["event_id"] == "e2":
+                raise RuntimeError("boom")
+            return {"success": True, "cancelled": True}
+
+        async def run():
+            with patch.object(cal, "_calendar_auth_headers", return_value={"Authorization": "Bearer t"}) as auth, patch.object(
+                cal, "calendar_cancel_meeting", side_effect=cancel_one
+            ):
+                result = await cal.calendar_cancel_meeting_batch(event_ids=["e1", "e2", "e3"], confirm=True)
+            return result, auth.await_count
+
+        result, auth_calls = asyncio.run(run())
+        self.assertEqual(auth_calls, 1)
+        self.assertEqual(result["cancelled_count"], 2)
+        self.assertEqual([r["event_id"] for r in result["results"]], ["e1", "e2", "e3"])
+        self.assertFalse(result["results"][1]["cancelled"])
+        self.assertEqual(len({id(client) for _, client, _ in seen}), 1)
+        self.assertTrue(all(headers == {"Authorization": "Bearer t"} for _, _, headers in seen))
+
+    def test_confirm_and_cancel_predicates_take_normalized_text(self):
+        self.assertTrue(flow._is_confirm(flow._normalize("  Yes, go ahead ")))
+        self.assertTrue(flow._is_confirm(flow._normalize("Cancel them")))
+        self.assertFalse(flow._is_confirm(flow._normalize("yesterday")))
+        self.assertFalse(flow._is_confirm(flow._normalize(None)))
+        self.assertTrue(flow._is_cancel(flow._normalize(" STOP ")))
+        self.assertFalse(flow._is_cancel(flow._normalize("stop it")))
+
+    def test_parse_selection(self):
+        self.assertEqual(flow._parse_selection("Cancel them all please", 3), [1, 2, 3])
+        self.assertEqual(flow._parse_selection("3, 1 and 3 and 9", 3), [3, 1])
+        self.assertIsNone(flow._parse_selection("the second one", 3))
+        self.assertEqual(flow._parse_selection("all of them", 2), [1, 2])
+        self.assertEqual(flow._parse_selection("cancel allergy check 2", 3), [2])
+        self.assertIsNone(flow._parse_selection("1", 0))
+
+    def test_batch_concurrency_is_capped(self):
+        import src.services.calendar_advanced as cal
+
+        peak = []
+        in_flight = [0]
+
+        async def cancel_one(**kwargs):
+            in_flight[0] += 1
+            peak.append(in_flight[0])
+            await asyncio.sleep(0)
+            in_flight[0] -= 1
+            return {"cancelled": True}
+
+        async def run():
+            with patch.object(cal, "_calendar_auth_headers", return_value={"Authorization": "Bearer t"}), patch.object(
+                cal, "calendar_cancel_meeting", side_effect=cancel_one
+            ):
+                return await cal.calendar_cancel_meeting_batch(event_ids=[f"e{i}" for i in range(20)], confirm=True)
+
+        self.assertEqual(asyncio.run(run())["cancelled_count"], 20)
+        self.assertEqual(max(peak), cal._CANCEL_BATCH_CONCURRENCY)
+
+
+class TestCalendarCancelPendingLog(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        patcher = patch.multiple(
+            flow,
+            _PENDING={},
+            _PENDING_TS={},
+            _FILE=root / "pending.json",
+            _WAL=root / "pending.log",
+            _COMPACT_EVERY=3,
+            _wal_writes=0,
+            _wal_buffer={},
+            _flush_task=None,
+            _loaded=True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _reload(self):
+        flow._PENDING.clear()
+        flow._load()
+        return dict(flow._PENDING)
+
+    def test_mutations_append_to_the_log_and_replay(self):
+        flow._set(1, {"intent": "cancel"})
+        flow._set(2, {"intent": "cancel", "event_id": "e2"})
+        self.assertFalse(flow._FILE.exists())
+        self.assertEqual(len(flow._WAL.read_text().splitlines()), 2)
+        with flow._WAL.open("a") as f:
+            f.write('{"op": "clear", "ui')
+        self.assertEqual(self._reload(), {"1": {"intent": "cancel"}, "2": {"intent": "cancel", "event_id": "e2"}})
+
+    def test_replayed_event_ids_are_shared(self):
+        flow._set(1, {"intent": "cancel", "options": [{"id": "evt_" + "a" * 26}], "selected_event_ids": ["evt_" + "a" * 26]})
+        state = self._reload()["1"]
+        self.assertIs(state["options"][0]["id"], state["selected_event_ids"][0])
+
+    def test_abandoned_state_expires_on_read(self):
+        flow._set(1, {"intent": "cancel"})
+        flow._set(2, {"intent": "cancel"})
+        flow._PENDING_TS["1"] -= flow._PENDING_TTL + 1
+        self.assertIsNone(flow._get(1))
+        self.assertIsNotNone(flow._get(2))
+        self.assertEqual(self._reload(), {"2": {"intent": "cancel"}})
+
+    def test_get_returns_a_read_only_view(self):
+        flow._set(1, {"intent": "cancel", "options": [{"id": "e1"}]})
+        view = flow._get(1)
+        with self.assertRaises(TypeError):
+            view["confirmed"] = True
+        mutable = flow._get_mutable(1)
+        mutable["confirmed"] = True
+        self.assertNotIn("confirmed", flow._get(1))
+        self.assertIsNone(flow._get_mutable(2))
+
+    def test_selection_turn_persists_the_picked_events(self):
+        flow._set(1, {"intent": "cancel", "options": [{"id": "e1"}, {"id": "e2"}], "delete": True})
+
+        async def run():
+            reply = await flow.handle_calendar_cancel_turn(1, "2")
+            await asyncio.sleep(flow._FLUSH_DELAY * 4)
+            return reply
+
+        reply = asyncio.run(run())
+        self.assertEqual(reply, "Confirm cancellation of 1 event(s)?")
+        self.assertEqual(flow._get(1)["selected_event_ids"], ["e2"])
+        self.assertTrue(flow._get(1)["confirmation_asked"])
+        self.assertTrue(self._reload()["1"]["confirmation_asked"])
+
+    def test_mutations_inside_the_loop_are_flushed_together(self):
+        async def run():
+            flow._set(1, {"intent": "cancel"})
+            flow._set(2, {"intent": "cancel"})
+            self.assertFalse(flow._WAL.exists())
+            await asyncio.sleep(flow._FLUSH_DELAY * 4)
+
+        with patch.object(flow, "_COMPACT_EVERY", 128):
+            asyncio.run(run())
+        self.assertEqual(len(flow._WAL.read_text().splitlines()), 2)
+        self.assertIsNone(flow._flush_task)
+        self.assertEqual(self._reload(), {"1": {"intent": "cancel"}, "2": {"intent": "cancel"}})
+
+    def test_unchanged_state_and_repeated_sets_in_a_turn_write_once(self):
+        async def run():
+            state = {"intent": "cancel", "options": [{"id": "e1"}]}
+            flow._set(1, state)
+            state["selected_event_ids"] = ["e1"]
+            flow._set(1, state)
+            flow._set(1, dict(state))
+            flow._clear(2)
+            await asyncio.sleep(flow._FLUSH_DELAY * 4)
+
+        with patch.object(flow, "_COMPACT_EVERY", 128):
+            asyncio.run(run())
+        lines = flow._WAL.read_text().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(self._reload(), {"1": {"intent": "cancel", "options": [{"id": "e1"}], "selected_event_ids": ["e1"]}})
+
+    def test_log_is_compacted_into_the_snapshot(self):
+        flow._set(1, {"intent": "cancel"})
+        flow._set(2, {"intent": "cancel"})
+        flow._clear(1)
+        self.assertFalse(flow._WAL.exists())
+        flow._set(3, {"intent": "cancel"})
+        self.assertEqual(self._reload(), {"2": {"intent": "cancel"}, "3": {"intent": "cancel"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
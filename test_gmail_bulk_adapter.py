@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+
+class TestGmailBulkAdapter(unittest.TestCase):
+    def test_execute_batch_success_and_failure(self):
+        async def run():
+            from src.adapters.bulk_tool_adapter import BulkItem, PreparedBulkContext
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+
+            ctx = PreparedBulkContext(
+                tool_name="gmail",
+                action="archive",
+                query_params={"gmail_query": "from:a@b.com"},
+                action_params={},
+                metadata={"page_token": None},
+            )
+            items = [BulkItem(id=mid, display_name=mid) for mid in ("m1", "m2")]
+            adapter = GmailBulkAdapter()
+
+            ok_mock = AsyncMock(return_value={"success": True, "data": {"modified": 2}})
+            with patch("src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", ok_mock):
+                results = await adapter.execute_batch(items, ctx)
+            self.assertEqual([(r.item_id, r.success, r.error) for r in results], [("m1", True, None), ("m2", True, None)])
+            kwargs = ok_mock.await_args.kwargs
+            self.assertEqual(kwargs["message_ids"], ["m1", "m2"])
+            self.assertEqual(kwargs["remove_label_ids"], ["INBOX"])
+
+            fail_mock = AsyncMock(return_value={"success": False, "error": "API_ERROR: 500", "status_code": 500})
+            with patch("src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", fail_mock):
+                results = await adapter.execute_batch(items, ctx)
+            self.assertTrue(all(not r.success and r.error == "API_ERROR: 500" for r in results))
+
+            auth_mock = AsyncMock(return_value={"success": False, "error": "API_ERROR: 401", "status_code": 401})
+            with patch("src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", auth_mock):
+                with self.assertRaises(PermissionError):
+                    await adapter.execute_batch(items, ctx)
+
+        asyncio.run(run())
+
+    def test_execute_batch_accepts_generator(self):
+        async def run():
+            from src.adapters.bulk_tool_adapter import BulkItem, PreparedBulkContext
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+
+            ctx = PreparedBulkContext(
+                tool_name="gmail",
+                action="archive",
+                query_params={"gmail_query": "from:a@b.com"},
+                action_params={},
+                metadata={"page_token": None},
+            )
+            items = (BulkItem.id_only(mid) for mid in ("m1", "m2"))
+            ok_mock = AsyncMock(return_value={"success": True, "data": {"modified": 2}})
+            with patch("src.adapters.gmail_bulk_adapter.gmail_batch_modify_labels", ok_mock):
+                results = await GmailBulkAdapter().execute_batch(items, ctx)
+            self.assertEqual([r.item_id for r in results], ["m1", "m2"])
+            self.assertEqual(ok_mock.await_args.kwargs["message_ids"], ["m1", "m2"])
+
+        asyncio.run(run())
+
+    def test_prepare_builds_gmail_query(self):
+        async def run():
+            from src.adapters.gmail_bulk_adapter import GmailBulkAdapter
+
+            adapter = GmailBulkAdapter()
+            ctx = await adapter.prepare({"action": "archive", "query_type": "sender", "query_value": "a@b.com"})
+            self.assertEqual(ctx.query_params, {"query_type": "sender", "sender": "a@b.com", "gmail_query": "from:a@b.com"})
+
+            ctx = await adapter.prepare({"action": "archive", "query_type": "date_range", "after": "2024/01/01"})
+            self.assertEqual(ctx.query_params["gmail_query"], "after:2024/01/01")
+
+            with self.assertRaises(ValueError):
+                await adapter.prepare({"action": "delete", "query_type": "sender", "query_value": "x"})
+            with self.assertRaises(ValueError):
+                await adapter.prepare({"action": "archive", "query_type": "thread", "query_value": "x"})
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+
+import src.core.memory as memory_mod
+
+
+class TestMemoryBatcher(unittest.TestCase):
+    def _run(self, coro_factory, batcher):
+        client = MagicMock()
+
+        async def run():
+            with patch.multiple(
+                memory_mod,
+                _get_supabase_client=MagicMock(return_value=client),
+                _MESSAGE_BATCHER=batcher,
+            ):
+                await coro_factory()
+
+        asyncio.run(run())
+        return [c.args[0] for c in client.table.return_value.insert.call_args_list]
+
+    def test_turn_messages_share_one_insert_in_order(self):
+        async def turn():
+            await asyncio.gather(
+                memory_mod.append_message("42", "user", "hi"),
+                memory_mod.append_message("42", "assistant", "hello"),
+            )
+
+        inserts = self._run(turn, memory_mod.MemoryBatcher())
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual([row["role"] for row in inserts[0]], ["user", "assistant"])
+
+    def test_rows_without_a_column_are_not_padded_with_null(self):
+        async def turn():
+            await asyncio.gather(
+                memory_mod.append_message("42", "user", "hi"),
+                memory_mod.append_message("42", "assistant", "hello", {"tool": "none"}),
+                memory_mod.append_message("43", "assistant", "hey", {"tool": "none"}),
+            )
+
+        inserts = self._run(turn, memory_mod.MemoryBatcher())
+        self.assertEqual([[row["role"] for row in rows] for rows in inserts], [["user"], ["assistant", "assistant"]])
+        self.assertNotIn("metadata", inserts[0][0])
+
+    def test_batches_are_capped_at_max_batch(self):
+        async def burst():
+            await asyncio.gather(*(memory_mod.append_message(str(i), "user", "x") for i in range(5)))
+
+        inserts = self._run(burst, memory_mod.MemoryBatcher(max_batch=2))
+        self.assertEqual([len(rows) for rows in inserts], [2, 2, 1])
+
+    def test_rows_are_grouped_per_table(self):
+        batcher = memory_mod.MemoryBatcher()
+        tables = {"conversation_messages": MagicMock(), "events": MagicMock()}
+        client = MagicMock()
+        client.table.side_effect = tables.__getitem__
+
+        async def run():
+            with patch.object(memory_mod, "_get_supabase_client", MagicMock(return_value=client)):
+                futures = [
+                    await batcher.enqueue({"user_id": "1"}, table="conversation_messages"),
+                    await batcher.enqueue({"user_id": "1", "event": "x"}, table="events"),
+                    await batcher.enqueue({"user_id": "2"}, table="conversation_messages"),
+                ]
+                await asyncio.gather(*futures)
+
+        asyncio.run(run())
+        self.assertEqual(tables["conversation_messages"].insert.call_args.args[0], [{"user_id": "1"}, {"user_id": "2"}])
+        self.assertEqual(tables["events"].insert.call_args.args[0], [{"user_id": "1", "event": "x"}])
+
+    def test_close_flushes_queued_rows(self):
+        batcher = memory_mod.MemoryBatcher(flush_seconds=60)
+        client = MagicMock()
+
+        async def run():
+            with patch.object(memory_mod, "_get_supabase_client", MagicMock(return_value=client)):
+                future = await batcher.enqueue({"user_id": "1"})
+                await batcher.aclose()
+                return future
+
+        self.assertTrue(asyncio.run(run()).done())
+        client.table.return_value.insert.assert_called_once()
+
+    def test_append_is_a_noop_without_supabase(self):
+        batcher = memory_mod.MemoryBatcher()
+
+        async def run():
+            with patch.multiple(
+                memory_mod,
+                _get_supabase_client=MagicMock(return_value=None),
+                _MESSAGE_BATCHER=batcher,
+            ):
+                await memory_mod.append_message("42", "user", "hi")
+
+        asyncio.run(run())
+        self.assertIsNone(batcher._task)
+
+
+if __name__ == "__main__":
+    unittest.main()
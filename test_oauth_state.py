@@ -0,0 +1,42 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+
+class TestOAuthState(unittest.TestCase):
+    def test_state_is_single_use(self):
+        async def run():
+            from src.utils import oauth_state
+
+            with patch.dict(oauth_state._states, clear=True):
+                self.assertTrue(await oauth_state.add_state("s1"))
+                self.assertTrue(await oauth_state.consume_state("s1"))
+                self.assertFalse(await oauth_state.consume_state("s1"))
+                self.assertFalse(await oauth_state.consume_state("unknown"))
+
+        asyncio.run(run())
+
+    def test_store_is_bounded(self):
+        async def run():
+            from src.utils import oauth_state
+
+            with patch.dict(oauth_state._states, clear=True), patch.object(oauth_state, "OAUTH_STATE_MAX", 2):
+                self.assertTrue(await oauth_state.add_state("a"))
+                self.assertTrue(await oauth_state.add_state("b"))
+                self.assertFalse(await oauth_state.add_state("c"))
+
+        asyncio.run(run())
+
+    def test_expired_state_is_rejected(self):
+        async def run():
+            from src.utils import oauth_state
+
+            with patch.dict(oauth_state._states, clear=True), patch.object(oauth_state, "OAUTH_STATE_TTL", 0):
+                self.assertTrue(await oauth_state.add_state("old"))
+                self.assertFalse(await oauth_state.consume_state("old"))
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
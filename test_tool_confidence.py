@@ -0,0 +1,35 @@
+import unittest
+from unittest.mock import patch
+
+import src.core.confidence as confidence_mod
+from src.core.confidence import cached_tool_confidence, compute_tool_confidence
+
+_SCHEMA = {"function": {"name": "gmail_send_email", "parameters": {"required": ["to", "subject"]}}}
+
+
+class TestCachedToolConfidence(unittest.TestCase):
+    def setUp(self):
+        confidence_mod._cached_assess.cache_clear()
+
+    def test_matches_uncached_assessment(self):
+        for args in ({"to": "a@b.co", "subject": "Hi", "body": "x"}, {"subject": ""}, {}):
+            self.assertEqual(
+                cached_tool_confidence(tool_name="gmail_send_email", tool_args=args, tool_schema=_SCHEMA),
+                compute_tool_confidence(tool_name="gmail_send_email", tool_args=args, tool_schema=_SCHEMA),
+            )
+
+    def test_key_order_does_not_miss_the_cache(self):
+        cached_tool_confidence(tool_name="trello_dispatch", tool_args={"action": "move", "card_id": "c"})
+        cached_tool_confidence(tool_name="trello_dispatch", tool_args={"card_id": "c", "action": "move"})
+        info = confidence_mod._cached_assess.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_unserializable_args_are_assessed_directly(self):
+        with patch.object(confidence_mod, "_cached_assess") as cached:
+            result = cached_tool_confidence(tool_name="echo", tool_args={1: object()})
+        cached.assert_not_called()
+        self.assertEqual(result, compute_tool_confidence(tool_name="echo", tool_args={1: object()}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import src.services.whisper as whisper_mod
+
+
+class TestWhisperTranscription(unittest.TestCase):
+    def test_transcription_runs_off_the_event_loop_thread(self):
+        threads = []
+
+        def fake_transcribe(audio_bytes):
+            threads.append(threading.current_thread())
+            return "hello" if audio_bytes else "TRANSCRIPTION_EMPTY"
+
+        async def run():
+            with patch.object(whisper_mod, "_transcribe_audio_bytes", fake_transcribe):
+                return await whisper_mod.transcribe_audio_bytes(b"ogg"), await whisper_mod.transcribe_audio_bytes(b"")
+
+        ok, empty = asyncio.run(run())
+        self.assertEqual(ok, {"success": True, "text": "hello", "error": None})
+        self.assertEqual(empty, {"success": False, "text": None, "error": "TRANSCRIPTION_EMPTY"})
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_file_transcription_reads_the_file(self):
+        with tempfile.NamedTemporaryFile(suffix=".ogg") as audio:
+            audio.write(b"ogg")
+            audio.flush()
+            with patch.object(whisper_mod, "_transcribe_audio_bytes", return_value="hi") as transcribe:
+                result = asyncio.run(whisper_mod.transcribe_audio(audio.name))
+        transcribe.assert_called_once_with(b"ogg")
+        self.assertTrue(result["success"])
+        missing = asyncio.run(whisper_mod.transcribe_audio("/nonexistent/voice.ogg"))
+        self.assertTrue(missing["error"].startswith("FILE_READ_ERROR"))
+
+
+if __name__ == "__main__":
+    unittest.main()